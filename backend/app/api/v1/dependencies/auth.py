@@ -8,7 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models.user import User, UserRole
 from app.schemas.user import TokenPayload
 from app.utils.errors import ErrorCodes, forbidden, http_error, unauthorized
@@ -18,7 +18,7 @@ bearer_scheme = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> User:
     """Return the current authenticated user from JWT token."""
 
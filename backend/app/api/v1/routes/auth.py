@@ -14,7 +14,7 @@ from app.core.security import (
     get_password_hash,
     verify_password,
 )
-from app.db.session import get_db
+from app.db.session import get_db, get_write_db
 from app.models.user import User, UserRole
 from app.schemas.user import TokenPair, UserCreate, UserRead
 from app.utils.errors import ErrorCodes, http_error
@@ -55,7 +55,7 @@ async def refresh_tokens(token: str, db: AsyncSession = Depends(get_db)) -> Toke
 @router.post("/users", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_user(
     payload: UserCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     user=Depends(require_roles(UserRole.admin)),
 ) -> UserRead:
     user_obj = User(
@@ -3,26 +3,31 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.dependencies.auth import require_roles
-from app.db.session import get_db
+from app.core.responses import FastJSONResponse
+from app.db.session import get_read_db, get_write_db
 from app.models.user import UserRole
-from app.schemas.product import PaginatedProducts, ProductCreate, ProductRead, ProductUpdate
+from app.schemas.product import (
+    BulkDeleteRequest,
+    BulkResult,
+    BulkUpdateRequest,
+    PaginatedProducts,
+    ProductCreate,
+    ProductFacets,
+    ProductRead,
+    ProductUpdate,
+)
+from app.services.products import query as product_query
 from app.services.products import service as product_service
+from app.utils.conditional import not_modified
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
-@router.get("/", response_model=PaginatedProducts, summary="Получить список товаров с фильтрами")
-async def list_products(
-    page: int | None = Query(None, ge=1, description="Номер страницы"),
-    size: int | None = Query(None, ge=1, le=200, description="Размер страницы"),
-    limit: int | None = Query(None, ge=1, le=200, description="Количество записей для offset-пагинации"),
-    offset: int | None = Query(None, ge=0, description="Смещение записей для offset-пагинации"),
-    sort_by: str = Query("id", description="Поле сортировки"),
-    sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Порядок сортировки"),
+def product_filters(
     title_contains: str | None = Query(None, description="Фильтр по части названия"),
     title_eq: str | None = Query(None, description="Фильтр по точному названию"),
     price_from: float | None = Query(None, description="Минимальная цена"),
@@ -31,63 +36,129 @@ async def list_products(
     in_stock: bool | None = Query(None, description="Наличие на складе"),
     created_from: datetime | None = Query(None, description="Создан с даты"),
     created_to: datetime | None = Query(None, description="Создан до даты"),
-    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Filter query parameters shared by the list and facets endpoints."""
+
+    return product_service.collect_filters(
+        title_contains=title_contains,
+        title_eq=title_eq,
+        price_from=price_from,
+        price_to=price_to,
+        price_in=price_in,
+        in_stock=in_stock,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+
+@router.get("/", response_model=PaginatedProducts, summary="Получить список товаров с фильтрами")
+async def list_products(
+    request: Request,
+    page: int | None = Query(None, ge=1, description="Номер страницы"),
+    size: int | None = Query(None, ge=1, le=200, description="Размер страницы"),
+    limit: int | None = Query(None, ge=1, le=200, description="Количество записей для offset-пагинации"),
+    offset: int | None = Query(None, ge=0, description="Смещение записей для offset-пагинации"),
+    sort_by: str = Query("id", description="Поле сортировки"),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Порядок сортировки"),
+    sort: str | None = Query(None, description="Сортировка вида field,asc;field2,desc (заменяет sort_by/sort_order)"),
+    filter_expr: str | None = Query(None, alias="filters", description="JSON-массив фильтров field/operator/value"),
+    filters: dict = Depends(product_filters),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(require_roles(UserRole.admin, UserRole.office, UserRole.supervisor, UserRole.promoter)),
-) -> PaginatedProducts:
-    filters: dict = {}
-    if title_contains:
-        filters["title_contains"] = title_contains
-    if title_eq:
-        filters["title_eq"] = title_eq
-    if price_from is not None and price_to is not None:
-        filters["price_between"] = (price_from, price_to)
-    if price_in:
-        filters["price_in"] = price_in
-    if in_stock is not None:
-        filters["in_stock"] = in_stock
-    if created_from:
-        filters["created_from"] = created_from
-    if created_to:
-        filters["created_to"] = created_to
+) -> Response:
     pagination_params = product_service.prepare_pagination_params(
         page=page,
         size=size,
         limit=limit,
         offset=offset,
     )
-    return await product_service.list_products(
+    query = dict(
         db=db,
         pagination=pagination_params,
         sort_by=sort_by,
         sort_order=sort_order,
         filters=filters,
+        dsl_filters=product_query.parse_filters(filter_expr),
+        sort=sort,
     )
+    validator = await product_service.list_validator(**query)
+    if not_modified(request.headers, validator):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator.headers())
+    # Pre-serialized body shared by identical concurrent requests.
+    body = await product_service.list_products_json(**query, etag=validator.etag)
+    return Response(content=body, media_type="application/json", headers=validator.headers())
+
+
+@router.get("/facets", response_model=ProductFacets, summary="Агрегаты по товарам с фильтрами")
+async def product_facets(
+    buckets: int = Query(product_service.FACET_BUCKETS, ge=1, le=100, description="Число интервалов гистограммы цен"),
+    filter_expr: str | None = Query(None, alias="filters", description="JSON-массив фильтров field/operator/value"),
+    filters: dict = Depends(product_filters),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(require_roles(UserRole.admin, UserRole.office, UserRole.supervisor, UserRole.promoter)),
+) -> ProductFacets:
+    return await product_service.product_facets(
+        db=db, filters=filters, dsl_filters=product_query.parse_filters(filter_expr), buckets=buckets
+    )
+
+
+@router.get("/{product_id}", response_model=ProductRead, summary="Получить товар")
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(require_roles(UserRole.admin, UserRole.office, UserRole.supervisor, UserRole.promoter)),
+) -> ProductRead:
+    validator = await product_service.product_validator(db, product_id)
+    if not_modified(request.headers, validator):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator.headers())
+    product, validator = await product_service.get_product(db, product_id)
+    response.headers.update(validator.headers())
+    return product
 
 
 @router.post("/", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
 async def create_product(
     payload: ProductCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     user=Depends(require_roles(UserRole.admin, UserRole.office)),
 ) -> ProductRead:
     return await product_service.create_product(db, payload)
 
 
+@router.post("/bulk-update", response_model=BulkResult, summary="Массовое изменение товаров")
+async def bulk_update_products(
+    payload: BulkUpdateRequest,
+    db: AsyncSession = Depends(get_write_db),
+    user=Depends(require_roles(UserRole.admin, UserRole.office)),
+) -> BulkResult:
+    return await product_service.bulk_update_products(db, payload)
+
+
+@router.post("/bulk-delete", response_model=BulkResult, summary="Массовое удаление товаров")
+async def bulk_delete_products(
+    payload: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_write_db),
+    user=Depends(require_roles(UserRole.admin)),
+) -> BulkResult:
+    return await product_service.bulk_delete_products(db, payload)
+
+
 @router.put("/{product_id}", response_model=ProductRead)
 async def update_product(
     product_id: int,
     payload: ProductUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     user=Depends(require_roles(UserRole.admin, UserRole.office)),
 ) -> ProductRead:
     return await product_service.update_product(db, product_id, payload)
 
 
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response, response_model=None)
 async def delete_product(
     product_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     user=Depends(require_roles(UserRole.admin)),
-) -> Response:
+) -> None:
     await product_service.delete_product(db, product_id)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
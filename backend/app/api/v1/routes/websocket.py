@@ -1,16 +1,35 @@
-"""WebSocket endpoints for product events."""
+"""WebSocket endpoints for product events.
+
+Clients choose the event encoding with a subprotocol (``products.json``,
+``products.cbor``, ``products.msgpack`` when msgpack is installed) or, where
+subprotocols are awkward, ``?encoding=cbor``. JSON is the default and goes
+out as text frames, binary encodings as binary frames. Each event is encoded
+once per encoding, not once per subscriber. permessage-deflate is negotiated
+by the server (uvicorn enables it by default) on top of any encoding.
+"""
 from __future__ import annotations
 
-import json
-from typing import Dict, Set
+from typing import Any, Callable, Dict, Set
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.core.responses import dumps as json_dumps
 from app.core.security import decode_token
 from app.models.user import UserRole
+from app.utils import cbor
+
+try:  # Optional: ``pip install msgpack`` enables ``products.msgpack``.
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
 
 router = APIRouter()
 
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {"json": json_dumps, "cbor": cbor.dumps}
+if msgpack is not None:
+    ENCODERS["msgpack"] = lambda value: msgpack.packb(value, default=str)
+SUBPROTOCOL_PREFIX = "products."
+
 connections: Dict[UserRole, Set[WebSocket]] = {
     UserRole.admin: set(),
     UserRole.office: set(),
@@ -32,9 +51,22 @@ async def authorize_websocket(websocket: WebSocket) -> UserRole:
     return role
 
 
+def negotiate_encoding(websocket: WebSocket) -> tuple[str, str | None]:
+    """(encoding, subprotocol to echo): the client's first supported subprotocol, else ``?encoding=``."""
+
+    for subprotocol in websocket.scope.get("subprotocols", []):
+        encoding = subprotocol.removeprefix(SUBPROTOCOL_PREFIX)
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX) and encoding in ENCODERS:
+            return encoding, subprotocol
+    encoding = websocket.query_params.get("encoding", "json")
+    return (encoding if encoding in ENCODERS else "json"), None
+
+
 @router.websocket("/products")
 async def product_events(websocket: WebSocket) -> None:
-    await websocket.accept()
+    encoding, subprotocol = negotiate_encoding(websocket)
+    websocket.state.encoding = encoding
+    await websocket.accept(subprotocol=subprotocol)
     try:
         role = await authorize_websocket(websocket)
     except Exception:
@@ -50,12 +82,21 @@ async def product_events(websocket: WebSocket) -> None:
 
 
 async def broadcast_product_event(event: str, payload: dict) -> None:
-    message = json.dumps({"event": event, "data": payload}, default=str)
+    envelope = {"event": event, "data": payload}
+    encoded: Dict[str, Any] = {}
     for role_connections in connections.values():
         stale: Set[WebSocket] = set()
         for conn in role_connections:
+            encoding = getattr(conn.state, "encoding", "json")
+            message = encoded.get(encoding)
+            if message is None:
+                message = ENCODERS[encoding](envelope)
+                encoded[encoding] = message = message.decode() if encoding == "json" else message
             try:
-                await conn.send_text(message)
+                if encoding == "json":
+                    await conn.send_text(message)
+                else:
+                    await conn.send_bytes(message)
             except RuntimeError:
                 stale.add(conn)
         role_connections.difference_update(stale)
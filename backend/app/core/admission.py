@@ -0,0 +1,157 @@
+"""Adaptive admission control: concurrency limit with fast 503s when exceeded."""
+from __future__ import annotations
+
+import json
+import math
+import time
+from typing import Any, Callable, Dict
+
+from fastapi import status
+
+from app.utils.errors import ErrorCodes, http_error
+
+OPS_PATHS = frozenset(
+    {"/api/v1/health", "/api/v1/ready", "/api/v1/version", "/api/v1/pool", "/api/v1/loop", "/api/v1/coalescing"}
+)
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class AdmissionController:
+    """AIMD concurrency limit driven by request latency and DB pool saturation.
+
+    Each completed request either grows the limit by ``1 / limit`` (about +1
+    per limit's worth of completions) or, when it took longer than
+    ``latency_target_ms`` or the pool was saturated, shrinks it by
+    ``backoff``, at most once per target interval so one slow burst does not
+    collapse the limit. Writes may use the whole limit, reads only
+    ``read_share`` of it, and ops endpoints are never limited.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target_ms: float,
+        read_share: float = 0.8,
+        saturation_threshold: float = 0.9,
+        backoff: float = 0.9,
+        shed_window: float = 5.0,
+        pressure: Callable[[], float] = lambda: 0.0,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_ms = latency_target_ms
+        self.read_share = read_share
+        self.saturation_threshold = saturation_threshold
+        self.backoff = backoff
+        self.shed_window = shed_window
+        self.pressure = pressure
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.latency_ms = 0.0
+        self.last_rejection = -math.inf
+        self.last_decrease = -math.inf
+
+    @staticmethod
+    def classify(method: str, path: str) -> str:
+        if path in OPS_PATHS:
+            return "ops"
+        return "read" if method in READ_METHODS else "write"
+
+    def try_acquire(self, kind: str) -> bool:
+        if kind == "ops":
+            return True
+        ceiling = self.limit if kind == "write" else self.limit * self.read_share
+        if self.inflight >= max(ceiling, 1):
+            self.rejected += 1
+            self.last_rejection = time.monotonic()
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed: float) -> None:
+        self.inflight -= 1
+        elapsed_ms = elapsed * 1000
+        self.latency_ms = elapsed_ms if not self.latency_ms else 0.9 * self.latency_ms + 0.1 * elapsed_ms
+        now = time.monotonic()
+        if elapsed_ms > self.latency_target_ms or self.pressure() >= self.saturation_threshold:
+            if (now - self.last_decrease) * 1000 >= self.latency_target_ms:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+        elif self.inflight + 1 >= self.limit / 2:
+            # Only grow while the limit is actually being used.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    @property
+    def shedding(self) -> bool:
+        return time.monotonic() - self.last_rejection < self.shed_window
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: a couple of typical request durations, at least 1."""
+
+        return max(1, math.ceil(2 * self.latency_ms / 1000))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "latency_ms": round(self.latency_ms, 3),
+            "pool_saturation": round(self.pressure(), 3),
+            "shedding": self.shedding,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI layer that admits HTTP requests through an :class:`AdmissionController`."""
+
+    def __init__(self, app: Any, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller
+        kind = controller.classify(scope["method"], scope["path"])
+        if kind == "ops":
+            await self.app(scope, receive, send)
+            return
+        if not controller.try_acquire(kind):
+            await self.reject(send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
+
+    async def reject(self, send) -> None:
+        retry_after = self.controller.retry_after()
+        # Same ``{"detail": {...}}`` envelope as errors raised with ``http_error``.
+        error = http_error(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            ErrorCodes.SERVICE_OVERLOADED,
+            "Сервис перегружен, повторите запрос позже",
+            {"retry_after": retry_after},
+        )
+        body = json.dumps({"detail": error.detail}, ensure_ascii=False).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": error.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,174 @@
+"""Negotiated response compression (br when available, gzip, deflate)."""
+from __future__ import annotations
+
+import zlib
+from typing import Any, Dict, List
+
+try:  # Optional: ``pip install brotli`` enables ``br``.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Server preference when the client rates several codings equally.
+PREFERENCE = ("br", "gzip", "deflate") if brotli is not None else ("gzip", "deflate")
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Best coding from an ``Accept-Encoding`` header, honouring q-values; None for identity."""
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding] = quality
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in PREFERENCE:
+        quality = weights.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _Compressor:
+    """Incremental compressor with a common interface over zlib and brotli."""
+
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int) -> None:
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            wbits = 16 + zlib.MAX_WBITS if coding == "gzip" else zlib.MAX_WBITS
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, wbits)
+            self._brotli = None
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress ``data`` and flush, so a streaming client receives it now."""
+
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+        return self._brotli.process(data) + self._brotli.finish()
+
+
+def _compressible(headers: List[tuple[bytes, bytes]]) -> bool:
+    content_type = b""
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered == b"content-encoding":
+            return False
+        if lowered == b"content-type":
+            content_type = value.lower()
+    return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses the client accepts in a compressed coding.
+
+    Single-body responses below ``minimum_size`` bytes are sent as is, larger
+    ones are compressed in one go and get an exact ``Content-Length``.
+    Streaming responses (``more_body``) are compressed chunk by chunk with a
+    sync flush after each, so nothing is buffered beyond the chunk in hand.
+    """
+
+    def __init__(self, app: Any, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                coding = negotiate(value.decode("latin-1"))
+                break
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict[str, Any] | None = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_compressed(message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = message["status"] in (204, 304) or not _compressible(message.get("headers", []))
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(self._with_headers(start, coding=None, length=None))
+                    await send(message)
+                    return
+                compressor = _Compressor(coding, self.gzip_level, self.brotli_quality)
+                if not more_body:
+                    body = compressor.finish(body)
+                    await send(self._with_headers(start, coding=coding, length=len(body)))
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(self._with_headers(start, coding=coding, length=None))
+            body = compressor.chunk(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _with_headers(start: Dict[str, Any], *, coding: str | None, length: int | None) -> Dict[str, Any]:
+        """Copy of the start message with ``Vary`` and, when compressing, the new length/encoding."""
+
+        headers = []
+        vary = None
+        for name, value in start.get("headers", []):
+            lowered = name.lower()
+            if coding is not None and lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary = value
+                continue
+            headers.append((name, value))
+        if vary is None:
+            headers.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary.lower():
+            headers.append((b"vary", vary + b", Accept-Encoding"))
+        else:
+            headers.append((b"vary", vary))
+        if coding is not None:
+            headers.append((b"content-encoding", coding.encode()))
+            if length is not None:
+                headers.append((b"content-length", str(length).encode()))
+        return {**start, "headers": headers}
@@ -31,8 +31,11 @@ def configure_logging(level: str = "INFO") -> ContextFilter:
     handler.setFormatter(formatter)
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
-    root_logger.handlers = [handler]
     context_filter = ContextFilter()
+    # Logger filters only see records logged on that logger itself; the handler
+    # filter also covers records propagated from child loggers.
+    handler.addFilter(context_filter)
+    root_logger.handlers = [handler]
     root_logger.addFilter(context_filter)
     return context_filter
 
@@ -0,0 +1,119 @@
+"""Event-loop lag monitor with optional capture of the blocking call's stack."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Lag samples kept for percentiles; at the default 100 ms tick about 3.5 minutes.
+LAG_SAMPLES = 2048
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a sleeping task.
+
+    A ticker coroutine sleeps ``interval`` seconds and records how much later
+    than that it actually resumed. With ``capture_stacks`` a watchdog thread
+    also watches the ticker's heartbeat: once the loop has not run the ticker
+    for ``threshold_ms`` beyond the tick, it samples the loop thread's stack,
+    which is then the code blocking the loop. Captured stacks are kept in a
+    bounded log, one per stall.
+    """
+
+    def __init__(
+        self, interval: float = 0.1, threshold_ms: float = 100.0, capture_stacks: bool = False, max_stacks: int = 50
+    ) -> None:
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.capture_stacks = capture_stacks
+        self.lags_ms: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self.stacks: deque[Dict[str, Any]] = deque(maxlen=max_stacks)
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self.heartbeat = time.perf_counter()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._captured_for: float | None = None
+
+    def record(self, lag_ms: float) -> None:
+        self.lags_ms.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms >= self.threshold_ms:
+            self.stalls += 1
+            logger.warning("Event loop blocked", extra={"lag_ms": round(lag_ms, 1)})
+
+    async def _tick(self) -> None:
+        while True:
+            self.heartbeat = started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+
+    def _watch(self) -> None:
+        poll = max(self.threshold_ms / 4000, 0.005)
+        while not self._stopped.wait(poll):
+            heartbeat = self.heartbeat
+            overdue_ms = (time.perf_counter() - heartbeat - self.interval) * 1000
+            if overdue_ms >= self.threshold_ms and self._captured_for != heartbeat:
+                self._captured_for = heartbeat
+                self.capture(overdue_ms)
+
+    def capture(self, overdue_ms: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        self.stacks.append(
+            {
+                "at": datetime.now(timezone.utc).isoformat(),
+                "blocked_ms": round(overdue_ms, 1),
+                "stack": traceback.format_stack(frame),
+            }
+        )
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self.heartbeat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        if self.capture_stacks:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        lags = sorted(self.lags_ms)
+
+        def percentile(fraction: float) -> float:
+            return round(lags[min(len(lags) - 1, int(len(lags) * fraction))], 3) if lags else 0.0
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "samples": len(lags),
+            "lag_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "max": round(self.max_lag_ms, 3)},
+            "stalls": self.stalls,
+            "stacks": list(self.stacks) if self.capture_stacks else None,
+        }
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
 from pydantic import AnyHttpUrl, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,8 +21,41 @@ class Settings(BaseSettings):
     app_name: str = Field(default="OPPO KZ Data Platform API")
     app_version: str = Field(default="0.1.0")
     environment: str = Field(default="dev")
+    debug: bool = Field(default=False, alias="DEBUG")
 
     database_url: str = Field(default="sqlite+aiosqlite:///./app.db", alias="DATABASE_URL")
+    database_replica_url: str | None = Field(default=None, alias="DATABASE_REPLICA_URL")
+    read_your_writes_seconds: int = Field(default=5, alias="READ_YOUR_WRITES_SECONDS")
+    replica_retry_seconds: int = Field(default=10, alias="REPLICA_RETRY_SECONDS")
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    db_pool_prewarm: bool = Field(default=True, alias="DB_POOL_PREWARM")
+    db_statement_cache_size: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    sqlite_tuning: bool = Field(default=True, alias="SQLITE_TUNING")
+    sqlite_single_writer: bool = Field(default=True, alias="SQLITE_SINGLE_WRITER")
+    sqlite_mmap_size: int = Field(default=256 * 1024 * 1024, alias="SQLITE_MMAP_SIZE")
+    sqlite_cache_size_kib: int = Field(default=64 * 1024, alias="SQLITE_CACHE_SIZE_KIB")
+    sqlite_busy_timeout_ms: int = Field(default=5000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    request_deadline_ms: float = Field(default=10_000.0, alias="REQUEST_DEADLINE_MS")
+    request_deadline_max_ms: float = Field(default=60_000.0, alias="REQUEST_DEADLINE_MAX_MS")
+    request_deadlines_ms: Dict[str, float] = Field(default_factory=dict, alias="REQUEST_DEADLINES_MS")
+    admission_control: bool = Field(default=True, alias="ADMISSION_CONTROL")
+    admission_initial_limit: int = Field(default=64, alias="ADMISSION_INITIAL_LIMIT")
+    admission_min_limit: int = Field(default=4, alias="ADMISSION_MIN_LIMIT")
+    admission_max_limit: int = Field(default=512, alias="ADMISSION_MAX_LIMIT")
+    admission_latency_target_ms: float = Field(default=500.0, alias="ADMISSION_LATENCY_TARGET_MS")
+    admission_read_share: float = Field(default=0.8, alias="ADMISSION_READ_SHARE")
+    admission_pool_saturation: float = Field(default=0.9, alias="ADMISSION_POOL_SATURATION")
+    loop_lag_interval_ms: float = Field(default=100.0, alias="LOOP_LAG_INTERVAL_MS")
+    loop_lag_threshold_ms: float = Field(default=100.0, alias="LOOP_LAG_THRESHOLD_MS")
+    loop_lag_max_stacks: int = Field(default=50, alias="LOOP_LAG_MAX_STACKS")
+    compression: bool = Field(default=True, alias="COMPRESSION")
+    compression_min_size: int = Field(default=1024, alias="COMPRESSION_MIN_SIZE")
+    compression_gzip_level: int = Field(default=6, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=4, alias="COMPRESSION_BROTLI_QUALITY")
     secret_key: str = Field(default="insecure-secret", alias="SECRET_KEY")
     access_token_expire_minutes: int = Field(default=15)
     refresh_token_expire_minutes: int = Field(default=60 * 24 * 7)
@@ -0,0 +1,192 @@
+"""Per-request deadlines enforced inside the database.
+
+Each request gets a time budget: ``Settings.request_deadline_ms``, a per-route
+entry in ``Settings.request_deadlines_ms`` (keyed ``"GET /api/v1/products/"``)
+or a shorter/longer value from the ``X-Request-Timeout-Ms`` header, capped at
+``Settings.request_deadline_max_ms``. Whatever is left of it when a session
+transaction begins becomes ``SET LOCAL statement_timeout`` on Postgres; on
+SQLite a progress handler aborts the running statement once it has passed.
+A client disconnect expires the deadline and cancels the request, so its
+connection goes back to the pool without waiting for the query.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.util import await_only
+
+from app.core.settings import Settings
+from app.utils.errors import deadline_exceeded
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# Key in the pool entry's ``info`` holding the deadline of the session using it.
+DEADLINE_KEY = "request_deadline"
+# SQLite VM instructions between progress handler calls.
+PROGRESS_STEPS = 1000
+POSTGRES_QUERY_CANCELED = "57014"
+
+
+class Deadline:
+    """A request's time budget on the monotonic clock."""
+
+    def __init__(self, budget_ms: float) -> None:
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+
+    def remaining_ms(self) -> float:
+        return (self.expires_at - time.monotonic()) * 1000
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def expire(self) -> None:
+        self.expires_at = -math.inf
+
+
+def request_deadline(request: Request, config: Settings) -> Deadline:
+    route = request.scope.get("route")
+    key = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    budget_ms = config.request_deadlines_ms.get(key, config.request_deadline_ms)
+    raw = request.headers.get(DEADLINE_HEADER)
+    if raw is not None:
+        try:
+            requested = float(raw)
+        except ValueError:
+            requested = 0.0
+        if requested > 0:
+            budget_ms = requested
+    return Deadline(min(budget_ms, config.request_deadline_max_ms))
+
+
+def install_progress_handler(target: AsyncEngine) -> None:
+    """Let SQLite connections of ``target`` abort statements past the session's deadline."""
+
+    if target.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target.sync_engine, "connect")
+    def _set_progress_handler(_dbapi_connection, record) -> None:
+        info = record.info
+
+        def interrupt() -> bool:
+            deadline = info.get(DEADLINE_KEY)
+            return deadline is not None and deadline.expired
+
+        await_only(record.driver_connection.set_progress_handler(interrupt, PROGRESS_STEPS))
+
+    @event.listens_for(target.sync_engine, "checkin")
+    def _clear_deadline(_dbapi_connection, record) -> None:
+        record.info.pop(DEADLINE_KEY, None)
+
+
+def apply_deadline(session: AsyncSession, deadline: Deadline) -> None:
+    """Carry ``deadline`` into every transaction the session begins."""
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def _limit_transaction(_session, _transaction, connection) -> None:
+        remaining = deadline.remaining_ms()
+        if remaining <= 0:
+            raise deadline_exceeded(deadline.budget_ms)
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(remaining))}")
+        elif connection.dialect.name == "sqlite":
+            connection.info[DEADLINE_KEY] = deadline
+
+
+def is_deadline_error(exc: DBAPIError) -> bool:
+    """Statement cancelled by ``statement_timeout`` or interrupted by the SQLite progress handler."""
+
+    if getattr(exc.orig, "sqlstate", None) == POSTGRES_QUERY_CANCELED:
+        return True
+    return isinstance(exc, OperationalError) and "interrupted" in str(exc.orig)
+
+
+class DisconnectWatcher:
+    """Waits for the client to disconnect, once per request, on behalf of all its sessions.
+
+    Kept on ``request.state`` so the read and the write session of one request
+    share it instead of competing for ``receive()``. On disconnect every
+    registered deadline expires and every registered task is cancelled.
+    """
+
+    STATE_KEY = "disconnect_watcher"
+
+    def __init__(self, request: Request) -> None:
+        self._request = request
+        self._entries: list[tuple[Deadline, asyncio.Task]] = []
+        self._task: asyncio.Task | None = None
+        self.disconnected = False
+
+    @classmethod
+    def for_request(cls, request: Request) -> DisconnectWatcher:
+        watcher = getattr(request.state, cls.STATE_KEY, None)
+        if watcher is None:
+            watcher = cls(request)
+            setattr(request.state, cls.STATE_KEY, watcher)
+        return watcher
+
+    def register(self, deadline: Deadline, task: asyncio.Task) -> Callable[[], None]:
+        """Cancel ``task`` and expire ``deadline`` on disconnect, until the returned callback runs."""
+
+        if self.disconnected:
+            deadline.expire()
+        entry = (deadline, task)
+        self._entries.append(entry)
+        if self._task is None and not self.disconnected:
+            self._task = asyncio.create_task(self._watch())
+
+        def unregister() -> None:
+            self._entries.remove(entry)
+            if not self._entries and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+        return unregister
+
+    async def _watch(self) -> None:
+        while (await self._request.receive())["type"] != "http.disconnect":
+            pass
+        self.disconnected = True
+        cancelled: set[asyncio.Task] = set()
+        for deadline, task in self._entries:
+            deadline.expire()
+            if task not in cancelled:
+                task.cancel()
+                cancelled.add(task)
+
+
+@asynccontextmanager
+async def deadline_session(factory: Callable[[], Any], request: Request, config: Settings) -> AsyncIterator[AsyncSession]:
+    """Session from ``factory`` bound to the request's deadline; deadline errors become 504."""
+
+    deadline = request_deadline(request, config)
+    task = asyncio.current_task()
+    watcher = DisconnectWatcher.for_request(request)
+    unregister = watcher.register(deadline, task)
+    try:
+        async with factory() as session:
+            apply_deadline(session, deadline)
+            try:
+                yield session
+            except DBAPIError as exc:
+                if is_deadline_error(exc):
+                    raise deadline_exceeded(deadline.budget_ms) from exc
+                raise
+    except asyncio.CancelledError:
+        if not watcher.disconnected or not task.cancelling():
+            raise
+        # Cancelled by the disconnect watcher: finish as an ordinary error so
+        # the request does not surface as a cancelled task.
+        task.uncancel()
+        raise deadline_exceeded(deadline.budget_ms) from None
+    finally:
+        unregister()
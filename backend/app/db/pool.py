@@ -0,0 +1,139 @@
+"""Connection pool configuration, checkout telemetry and pre-warm."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.settings import Settings
+
+# Checkout waits kept for percentiles; older samples fall off.
+WAIT_SAMPLES = 2048
+
+
+class PoolStats:
+    """Checkout wait times and saturation for one engine's pool."""
+
+    def __init__(self) -> None:
+        self.capacity = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waits_ms: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def record_checkout(self, waited: float) -> None:
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        self.waits_ms.append(waited * 1000)
+
+    def record_checkin(self) -> None:
+        self.in_use = max(0, self.in_use - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits_ms)
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * fraction))], 3) if waits else 0.0
+
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "saturation": round(self.in_use / self.capacity, 3) if self.capacity else 0.0,
+            "peak_saturation": round(self.peak_in_use / self.capacity, 3) if self.capacity else 0.0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+        }
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    # Keep pool log records under SQLAlchemy's logger (WARNING by default).
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self.stats.capacity = self.size() + max(self._max_overflow, 0)
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return record
+
+    def _do_return_conn(self, record: Any) -> None:
+        self.stats.record_checkin()
+        super()._do_return_conn(record)
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def in_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, config: Settings) -> Dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` built from the pool settings."""
+
+    options: Dict[str, Any] = {"echo": False, "future": True}
+    if in_memory_sqlite(url):
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout,
+        pool_recycle=config.db_pool_recycle,
+        pool_pre_ping=config.db_pool_pre_ping,
+    )
+    if make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": config.db_statement_cache_size}
+    return options
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, Any] | None:
+    """Telemetry snapshot for the engine's pool; None for pools without telemetry."""
+
+    pool = engine.sync_engine.pool
+    return pool.stats.snapshot() if isinstance(pool, TimedQueuePool) else None
+
+
+async def prewarm(engine: AsyncEngine, count: int) -> int:
+    """Open ``count`` connections at once and return them to the pool; returns how many opened."""
+
+    if count <= 0 or not isinstance(engine.sync_engine.pool, TimedQueuePool):
+        return 0
+    connections = [engine.connect() for _ in range(count)]
+    opened = await asyncio.gather(*(conn.start() for conn in connections), return_exceptions=True)
+    for conn, result in zip(connections, opened):
+        if not isinstance(result, BaseException):
+            await conn.close()
+    return sum(1 for result in opened if not isinstance(result, BaseException))
+
+
+def pool_saturation(engine: AsyncEngine) -> float:
+    """Share of the pool's connections checked out right now; 0.0 for pools without telemetry."""
+
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, TimedQueuePool) or not pool.stats.capacity:
+        return 0.0
+    return pool.stats.in_use / pool.stats.capacity
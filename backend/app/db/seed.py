@@ -1,10 +1,36 @@
-"""Seed script to populate sample data."""
+"""Seed script and synthetic dataset generator.
+
+Without options ``python -m app.db.seed`` adds the 250 deterministic demo
+products used by ``docs/manual-product-testing.md``. ``--rows``, ``--seed`` and
+the distribution options generate production-size catalogues::
+
+    python -m app.db.seed --rows 10000000 --seed 7 --price-distribution lognormal \\
+        --in-stock-ratio 0.8 --days 730 --workers 8
+
+Rows are generated in fixed-size batches (in worker processes when
+``--workers`` > 1) and written with COPY on Postgres/asyncpg or multi-row
+INSERT statements elsewhere. Every batch is derived from ``(seed, offset)``
+only, so the dataset does not depend on the worker count.
+"""
 from __future__ import annotations
 
+import argparse
 import asyncio
+import math
+import random
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Sequence
 
 from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.core.security import get_password_hash
 from app.db.session import AsyncSessionLocal
@@ -14,6 +40,27 @@ from app.models.user import User, UserRole
 TOTAL_PRODUCTS = 250
 PRICE_MIN = Decimal("50.00")
 PRICE_MAX = Decimal("1500.00")
+PRICE_DISTRIBUTIONS = ("linear", "uniform", "lognormal")
+COLUMNS = ("title", "price", "in_stock", "created_at", "updated_at")
+BATCH_ROWS = 20_000
+# Rows per transaction; keeps the SQLite WAL / Postgres transaction bounded.
+COMMIT_ROWS = 200_000
+# Bound-parameter ceiling per INSERT (SQLite < 3.32 allows only 999).
+MAX_BIND_PARAMS = 32_766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Shape of a generated catalogue; the defaults reproduce the demo seed."""
+
+    rows: int = TOTAL_PRODUCTS
+    seed: int = 0
+    price_min: Decimal = PRICE_MIN
+    price_max: Decimal = PRICE_MAX
+    price_distribution: str = "linear"
+    price_sigma: float = 0.6
+    in_stock_ratio: float | None = None
+    days: float = 0.0
 
 
 async def seed_users(session):
@@ -31,13 +78,15 @@ async def seed_users(session):
         )
 
 
-def build_price(index: int) -> Decimal:
+def build_price(
+    index: int, total: int = TOTAL_PRODUCTS, price_min: Decimal = PRICE_MIN, price_max: Decimal = PRICE_MAX
+) -> Decimal:
     """Return a price evenly distributed across the configured range."""
 
-    if TOTAL_PRODUCTS == 1:
-        return PRICE_MIN
-    step = (PRICE_MAX - PRICE_MIN) / Decimal(TOTAL_PRODUCTS - 1)
-    raw_price = PRICE_MIN + step * Decimal(index)
+    if total == 1:
+        return price_min
+    step = (price_max - price_min) / Decimal(total - 1)
+    raw_price = price_min + step * Decimal(index)
     return raw_price.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
@@ -47,30 +96,160 @@ def build_stock_flag(index: int) -> bool:
     return index % 2 == 0
 
 
-async def seed_products(session):
-    """Populate the catalogue with deterministic mock products."""
+@lru_cache(maxsize=None)
+def _bind_processors(dialect_url: str) -> tuple[Any, ...]:
+    """SQLAlchemy's per-column bind processors for e.g. ``sqlite+aiosqlite://``."""
+
+    dialect = make_url(dialect_url).get_dialect()()
+    table = Product.__table__
+    return tuple(table.c[name].type.dialect_impl(dialect).bind_processor(dialect) for name in COLUMNS)
+
+
+def generate_rows(
+    spec: DatasetSpec, start: int, stop: int, now: datetime, dialect_url: str | None = None
+) -> list[tuple[Any, ...]]:
+    """Rows ``start..stop-1`` of the dataset as tuples in :data:`COLUMNS` order.
+
+    With ``dialect_url`` the values are already converted for that driver, so
+    the conversion runs in the generating worker rather than in the writer.
+    """
+
+    rnd = random.Random(f"{spec.seed}:{start}")
+    span = spec.days * 86_400
+    low, high = int(spec.price_min * 100), int(spec.price_max * 100)
+    # Log-normal prices centre on the geometric middle of the range.
+    mu = math.log(math.sqrt(low * high))
+    rows = []
+    for index in range(start, stop):
+        if spec.price_distribution == "linear":
+            price = build_price(index, spec.rows, spec.price_min, spec.price_max)
+        elif spec.price_distribution == "uniform":
+            price = Decimal(rnd.randint(low, high)).scaleb(-2)
+        else:
+            price = Decimal(min(max(int(rnd.lognormvariate(mu, spec.price_sigma)), low), high)).scaleb(-2)
+        in_stock = build_stock_flag(index) if spec.in_stock_ratio is None else rnd.random() < spec.in_stock_ratio
+        created = now - timedelta(seconds=rnd.random() * span) if span else now
+        updated = created + (now - created) * rnd.random() if span else now
+        rows.append((f"Demo Product {index + 1:03d}", price, in_stock, created, updated))
+    if dialect_url is None:
+        return rows
+    processors = _bind_processors(dialect_url)
+    return [
+        tuple(processor(value) if processor else value for processor, value in zip(processors, row)) for row in rows
+    ]
+
+
+async def _copy_rows(conn: AsyncConnection, rows: Sequence[tuple[Any, ...]]) -> None:
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(Product.__tablename__, records=rows, columns=COLUMNS)
+
+
+async def _insert_rows(conn: AsyncConnection, rows: Sequence[tuple[Any, ...]]) -> None:
+    """Multi-row ``INSERT ... VALUES (..), (..)`` of driver-ready values."""
+
+    marker = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    group = "(" + ", ".join([marker] * len(COLUMNS)) + ")"
+    head = f"INSERT INTO {Product.__tablename__} ({', '.join(COLUMNS)}) VALUES "
+    per_statement = MAX_BIND_PARAMS // len(COLUMNS)
+    for offset in range(0, len(rows), per_statement):
+        chunk = rows[offset : offset + per_statement]
+        params = tuple(value for row in chunk for value in row)
+        await conn.exec_driver_sql(head + ", ".join([group] * len(chunk)), params)
+
+
+def dialect_url_for(conn: AsyncConnection) -> str | None:
+    """``generate_rows`` target: None for COPY (native values), else the driver to convert for."""
+
+    if conn.dialect.driver == "asyncpg":
+        return None
+    return f"{conn.dialect.name}+{conn.dialect.driver}://"
+
+
+async def write_rows(conn: AsyncConnection, rows: Sequence[tuple[Any, ...]]) -> None:
+    """Bulk-load rows from ``generate_rows(..., dialect_url_for(conn))``: COPY on asyncpg, batched INSERT otherwise."""
+
+    if conn.dialect.driver == "asyncpg":
+        await _copy_rows(conn, rows)
+    else:
+        await _insert_rows(conn, rows)
+
+
+async def seed_products(session, spec: DatasetSpec = DatasetSpec(), workers: int = 1, batch_rows: int = BATCH_ROWS) -> int:
+    """Top the catalogue up to ``spec.rows`` products; returns how many were added."""
 
     result = await session.execute(select(func.count()).select_from(Product))
     existing = int(result.scalar_one())
-    if existing >= TOTAL_PRODUCTS:
-        return
-    for i in range(existing, TOTAL_PRODUCTS):
-        session.add(
-            Product(
-                title=f"Demo Product {i + 1:03d}",
-                price=build_price(i),
-                in_stock=build_stock_flag(i),
-            )
-        )
+    if existing >= spec.rows:
+        return 0
+    now = datetime.now(timezone.utc)
+    dialect_url = dialect_url_for(await session.connection())
+    batches = [(start, min(start + batch_rows, spec.rows)) for start in range(existing, spec.rows, batch_rows)]
+    written = uncommitted = 0
+
+    async def write(rows: list[tuple[Any, ...]]) -> None:
+        nonlocal written, uncommitted
+        await write_rows(await session.connection(), rows)
+        written += len(rows)
+        uncommitted += len(rows)
+        if uncommitted >= COMMIT_ROWS:
+            await session.commit()
+            uncommitted = 0
+
+    if workers <= 1:
+        for start, stop in batches:
+            await write(generate_rows(spec, start, stop, now, dialect_url))
+        return written
+
+    # Workers generate ahead of the writer, at most two batches each, and
+    # batches are written in order so ids follow the row index.
+    loop = asyncio.get_running_loop()
+    queue = deque(batches)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[asyncio.Future] = deque()
+        while queue or pending:
+            while queue and len(pending) < workers * 2:
+                start, stop = queue.popleft()
+                pending.append(loop.run_in_executor(pool, generate_rows, spec, start, stop, now, dialect_url))
+            await write(await pending.popleft())
+    return written
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.db.seed", description="Наполнение каталога товарами")
+    parser.add_argument("--rows", type=int, default=TOTAL_PRODUCTS, help="Итоговое число товаров в таблице")
+    parser.add_argument("--seed", type=int, default=0, help="Seed генератора случайных чисел")
+    parser.add_argument("--price-min", type=Decimal, default=PRICE_MIN)
+    parser.add_argument("--price-max", type=Decimal, default=PRICE_MAX)
+    parser.add_argument("--price-distribution", choices=PRICE_DISTRIBUTIONS, default="linear")
+    parser.add_argument("--price-sigma", type=float, default=0.6, help="Sigma для lognormal")
+    parser.add_argument("--in-stock-ratio", type=float, default=None, help="Доля товаров в наличии (по умолчанию через один)")
+    parser.add_argument("--days", type=float, default=0.0, help="Разброс created_at в днях назад от текущего момента")
+    parser.add_argument("--workers", type=int, default=1, help="Процессы для генерации строк")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    return parser.parse_args(argv)
 
 
-async def main() -> None:
+async def main(argv: Sequence[str] | None = None) -> None:
     """Entry point for the async seed runner."""
 
+    args = parse_args(argv)
+    spec = DatasetSpec(
+        rows=args.rows,
+        seed=args.seed,
+        price_min=args.price_min,
+        price_max=args.price_max,
+        price_distribution=args.price_distribution,
+        price_sigma=args.price_sigma,
+        in_stock_ratio=args.in_stock_ratio,
+        days=args.days,
+    )
+    started = time.perf_counter()
     async with AsyncSessionLocal() as session:
         await seed_users(session)
-        await seed_products(session)
+        added = await seed_products(session, spec, workers=args.workers, batch_rows=args.batch_rows)
         await session.commit()
+    elapsed = time.perf_counter() - started
+    print(f"Добавлено товаров: {added} за {elapsed:.1f} с ({added / elapsed if elapsed else 0:.0f} строк/с)")
 
 
 if __name__ == "__main__":
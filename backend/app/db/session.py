@@ -1,18 +1,199 @@
 """Database session and engine configuration."""
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.settings import settings
+from app.core.settings import Settings, settings
+from app.db.deadlines import deadline_session, install_progress_handler, is_deadline_error
+from app.db.pool import engine_options, in_memory_sqlite
+
+logger = logging.getLogger(__name__)
+
+# Read-your-writes marker: a deadline (unix seconds) until which the client's
+# reads go to the primary. Browsers get it as a cookie, other clients can echo
+# the response header back.
+STICKY_COOKIE = "primary_until"
+STICKY_HEADER = "X-Primary-Until"
+REPLICA_PROBE_TIMEOUT = 1.0
+
+
+def sqlite_pragmas(config: Settings) -> list[str]:
+    """Per-connection SQLite pragmas; WAL lets readers run alongside the single writer."""
+
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={config.sqlite_mmap_size}",
+        f"PRAGMA cache_size=-{config.sqlite_cache_size_kib}",
+        f"PRAGMA busy_timeout={config.sqlite_busy_timeout_ms}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def tune_sqlite(target: AsyncEngine, config: Settings) -> None:
+    """Apply :func:`sqlite_pragmas` to every new connection of a SQLite engine."""
+
+    if target.dialect.name != "sqlite" or not config.sqlite_tuning:
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(target.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
 
+def create_engine_for(url: str, config: Settings) -> AsyncEngine:
+    created = create_async_engine(url, **engine_options(url, config))
+    tune_sqlite(created, config)
+    install_progress_handler(created)
+    return created
 
-engine: AsyncEngine = create_async_engine(settings.database_url, echo=False, future=True)
+
+def create_writer_engine(url: str, config: Settings) -> AsyncEngine | None:
+    """Single-connection engine that serializes writes to a file-backed SQLite database.
+
+    SQLite allows one writer at a time; queueing writers on one pooled
+    connection keeps them in order inside the process instead of letting
+    each transaction spin on ``SQLITE_BUSY``. Other databases return None.
+    """
+
+    if make_url(url).get_backend_name() != "sqlite" or in_memory_sqlite(url) or not config.sqlite_single_writer:
+        return None
+    options = {**engine_options(url, config), "pool_size": 1, "max_overflow": 0}
+    writer = create_async_engine(url, **options)
+    tune_sqlite(writer, config)
+    install_progress_handler(writer)
+    return writer
+
+
+engine: AsyncEngine = create_engine_for(settings.database_url, settings)
 
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
+writer_engine = create_writer_engine(settings.database_url, settings)
+
+WriteSessionLocal = (
+    async_sessionmaker(bind=writer_engine, expire_on_commit=False, class_=AsyncSession)
+    if writer_engine is not None
+    else AsyncSessionLocal
+)
+
+
+class ReadRouter:
+    """Chooses the primary or the replica session factory for read-only requests.
+
+    The replica is used unless the client wrote recently (sticky deadline) or
+    the replica failed a probe or a query; a failed replica is skipped for
+    ``retry_seconds`` and then probed again with ``SELECT 1``.
+    """
+
+    def __init__(self, primary: AsyncEngine, replica: AsyncEngine | None, retry_seconds: float) -> None:
+        self.primary = async_sessionmaker(bind=primary, expire_on_commit=False, class_=AsyncSession)
+        self.replica = (
+            async_sessionmaker(bind=replica, expire_on_commit=False, class_=AsyncSession) if replica is not None else None
+        )
+        self.replica_engine = replica
+        self.retry_seconds = retry_seconds
+        self.healthy_until = 0.0
+        self.down_until = 0.0
+
+    def mark_down(self, exc: BaseException) -> None:
+        logger.warning("Replica unavailable, reading from primary", extra={"error": repr(exc)})
+        self.healthy_until = 0.0
+        self.down_until = time.monotonic() + self.retry_seconds
 
-async def get_db() -> AsyncSession:
-    """Yield an async database session."""
+    async def replica_available(self) -> bool:
+        if self.replica_engine is None:
+            return False
+        now = time.monotonic()
+        if now < self.down_until:
+            return False
+        if now < self.healthy_until:
+            return True
+        try:
+            # Connecting is inside the timeout too: a down host can stall there for the driver's connect timeout.
+            await asyncio.wait_for(self._probe(), REPLICA_PROBE_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, DBAPIError) as exc:
+            self.mark_down(exc)
+            return False
+        self.healthy_until = now + self.retry_seconds
+        return True
 
-    async with AsyncSessionLocal() as session:
+    async def _probe(self) -> None:
+        async with self.replica_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def factory_for(self, sticky: bool) -> tuple[async_sessionmaker, bool]:
+        """Return (session factory, is_replica) for one read request."""
+
+        if not sticky and self.replica is not None and await self.replica_available():
+            return self.replica, True
+        return self.primary, False
+
+
+def _replica_engine() -> AsyncEngine | None:
+    if not settings.database_replica_url:
+        return None
+    return create_engine_for(settings.database_replica_url, settings)
+
+
+read_router = ReadRouter(engine, _replica_engine(), settings.replica_retry_seconds)
+
+
+def sticky_to_primary(request: Request) -> bool:
+    """True while the read-your-writes deadline set by a previous write is in the future."""
+
+    raw = request.headers.get(STICKY_HEADER) or request.cookies.get(STICKY_COOKIE)
+    try:
+        return raw is not None and float(raw) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """Yield an async database session bound to the request deadline."""
+
+    async with deadline_session(AsyncSessionLocal, request, settings) as session:
+        yield session
+
+
+async def get_writer_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Yield a session on the write connection (the primary pool unless SQLite single-writer is on)."""
+
+    async with deadline_session(WriteSessionLocal, request, settings) as session:
         yield session
+
+
+async def get_write_db(response: Response, session: AsyncSession = Depends(get_writer_session)) -> AsyncSession:
+    """Primary session that also pins the client's reads to the primary for a short while."""
+
+    deadline = f"{time.time() + settings.read_your_writes_seconds:.3f}"
+    response.set_cookie(STICKY_COOKIE, deadline, max_age=settings.read_your_writes_seconds, httponly=True, samesite="lax")
+    response.headers[STICKY_HEADER] = deadline
+    return session
+
+
+async def get_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """Yield a session for read-only work: the replica when healthy and the client is not sticky."""
+
+    factory, is_replica = await read_router.factory_for(sticky_to_primary(request))
+    async with deadline_session(factory, request, settings) as session:
+        try:
+            yield session
+        except (OperationalError, DBAPIError) as exc:
+            # A statement cut off by its deadline says nothing about the replica's health.
+            if is_replica and not is_deadline_error(exc) and (isinstance(exc, OperationalError) or exc.connection_invalidated):
+                read_router.mark_down(exc)
+            raise
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+from contextlib import asynccontextmanager
 from typing import Annotated
 
 from fastapi import Depends, FastAPI
@@ -13,13 +14,65 @@ from app.api.v1.routes import auth as auth_routes
 from app.api.v1.routes import products as product_routes
 from app.api.v1.routes import websocket as ws_routes
 from app.api.v1.dependencies.auth import get_correlation_id
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.logging import configure_logging
+from app.core.loop_monitor import LoopLagMonitor
 from app.core.settings import settings
+from app.db.pool import pool_saturation, pool_stats, prewarm
+from app.db.session import engine, read_router, writer_engine
+from app.services.products import service as product_service
 
 logger = logging.getLogger(__name__)
 context_filter = configure_logging(settings.log_level)
-
-app = FastAPI(title=settings.app_name, version=settings.app_version, openapi_url="/api/v1/openapi.json")
+loop_monitor = LoopLagMonitor(
+    interval=settings.loop_lag_interval_ms / 1000,
+    threshold_ms=settings.loop_lag_threshold_ms,
+    capture_stacks=settings.debug,
+    max_stacks=settings.loop_lag_max_stacks,
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Pre-open the pools' base connections so the first requests skip connect latency."""
+
+    loop_monitor.start()
+    if settings.db_pool_prewarm:
+        for name, pool_engine in (("primary", engine), ("replica", read_router.replica_engine)):
+            if pool_engine is not None:
+                opened = await prewarm(pool_engine, settings.db_pool_size)
+                logger.info("Pool pre-warmed", extra={"pool": name, "connections": opened})
+    yield
+    await loop_monitor.stop()
+    for pool_engine in (engine, writer_engine, read_router.replica_engine):
+        if pool_engine is not None:
+            await pool_engine.dispose()
+
+
+app = FastAPI(title=settings.app_name, version=settings.app_version, openapi_url="/api/v1/openapi.json", lifespan=lifespan)
+
+
+def pool_pressure() -> float:
+    # The SQLite writer engine is a one-connection queue by design, so it is
+    # left out: any write would read as a saturated pool.
+    pools = (engine, read_router.replica_engine)
+    return max(pool_saturation(pool_engine) for pool_engine in pools if pool_engine is not None)
+
+
+admission = AdmissionController(
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    latency_target_ms=settings.admission_latency_target_ms,
+    read_share=settings.admission_read_share,
+    saturation_threshold=settings.admission_pool_saturation,
+    pressure=pool_pressure,
+)
+
+# Added first so it sits innermost: rejections still get CORS and security headers.
+if settings.admission_control:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
 
 if settings.cors_origins:
     app.add_middleware(
@@ -32,6 +85,14 @@ if settings.cors_origins:
 
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
+if settings.compression:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
 
 @app.middleware("http")
 async def add_security_headers(request, call_next):
@@ -52,7 +113,9 @@ async def health():
 
 @app.get("/api/v1/ready", tags=["ops"], summary="Готовность к трафику")
 async def ready():
-    return {"status": "ready"}
+    if admission.shedding:
+        return JSONResponse(status_code=503, content={"status": "shedding", "admission": admission.snapshot()})
+    return {"status": "ready", "admission": admission.snapshot()}
 
 
 @app.get("/api/v1/version", tags=["ops"], summary="Версия сервиса")
@@ -60,6 +123,22 @@ async def version():
     return {"version": settings.app_version}
 
 
+@app.get("/api/v1/pool", tags=["ops"], summary="Телеметрия пула соединений")
+async def pool_telemetry():
+    pools = {"primary": engine, "writer": writer_engine, "replica": read_router.replica_engine}
+    return {name: pool_stats(pool_engine) if pool_engine is not None else None for name, pool_engine in pools.items()}
+
+
+@app.get("/api/v1/loop", tags=["ops"], summary="Задержка event loop")
+async def loop_lag():
+    return loop_monitor.snapshot()
+
+
+@app.get("/api/v1/coalescing", tags=["ops"], summary="Объединение одинаковых запросов списка товаров")
+async def coalescing():
+    return {"products.list": product_service.list_flights.snapshot()}
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):  # type: ignore[override]
     logger.exception("Unhandled error", extra={"path": request.url.path})
@@ -46,7 +46,57 @@ class PaginatedProducts(BaseModel):
     page: int
     size: int
     sort: SortMeta
+    sort_keys: list[SortMeta] = []
     filters_applied: dict[str, object]
     next_offset: int | None
     prev_offset: int | None
     items: list[ProductRead]
+
+
+class FacetCount(BaseModel):
+    value: object
+    count: int
+
+
+class HistogramBucket(BaseModel):
+    start: Decimal
+    end: Decimal
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    filters_applied: dict[str, object]
+    in_stock: list[FacetCount]
+    price: list[HistogramBucket]
+
+
+class ProductFilterSet(BaseModel):
+    title_contains: str | None = None
+    title_eq: str | None = None
+    price_from: float | None = None
+    price_to: float | None = None
+    price_in: list[float] | None = None
+    in_stock: bool | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+class BulkSelection(BaseModel):
+    """Target products either by ``ids`` or by ``filters`` (exactly one)."""
+
+    ids: list[int] | None = Field(None, min_length=1, max_length=10000)
+    filters: ProductFilterSet | None = None
+
+
+class BulkUpdateRequest(BulkSelection):
+    changes: ProductUpdate
+
+
+class BulkDeleteRequest(BulkSelection):
+    pass
+
+
+class BulkResult(BaseModel):
+    affected: int
+    ids: list[int]
@@ -0,0 +1,284 @@
+"""Filter/sort DSL for the product API, compiled to cached SQLAlchemy statements.
+
+Filters are ``{"field", "operator", "value"}`` objects (the same model as
+``backend_main.py``); sorting is ``field,asc;field2,desc``.  Statements are
+built once per *shape* - the fields, operators and sort keys of a request -
+from named bound parameters, so requests that differ only in values reuse the
+same statement object and SQLAlchemy's compiled cache entry.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, Iterable
+
+from fastapi import status
+from sqlalchemy import Select, and_, asc, bindparam, desc, func, select
+
+from app.models.product import Product
+from app.utils.errors import ErrorCodes, http_error
+
+FIELD_META: Dict[str, Dict[str, Any]] = {
+    "id": {"type": int, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between", "in"}},
+    "title": {"type": str, "ops": {"eq", "neq", "contains", "startswith", "endswith", "in"}},
+    "price": {"type": Decimal, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between", "in"}},
+    "in_stock": {"type": bool, "ops": {"eq", "neq", "istrue", "isfalse"}},
+    "created_at": {"type": datetime, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between", "isnull"}},
+    "updated_at": {"type": datetime, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between", "isnull"}},
+}
+SORTABLE_FIELDS = {"id", "title", "price", "created_at", "updated_at"}
+STATEMENT_CACHE_SIZE = 512
+LIKE_ESCAPE = "\\"
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """One parsed filter; ``value`` is coerced to the field type."""
+
+    field: str
+    operator: str
+    value: Any
+
+    def as_dict(self) -> Dict[str, Any]:
+        value = self.value
+        if isinstance(value, tuple):
+            value = list(value)
+        return {"field": self.field, "operator": self.operator, "value": value}
+
+
+def _invalid(message: str, details: dict | None = None) -> Exception:
+    return http_error(status.HTTP_400_BAD_REQUEST, ErrorCodes.VALIDATION_ERROR, message, details)
+
+
+def _coerce(value: Any, target: type) -> Any:
+    if target is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in {"true", "1", "yes", "да"}:
+            return True
+        if isinstance(value, str) and value.lower() in {"false", "0", "no", "нет"}:
+            return False
+        raise _invalid("Неверное булево значение", {"value": value})
+    if target is datetime:
+        try:
+            return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+        except ValueError as exc:
+            raise _invalid("Некорректная дата", {"value": value}) from exc
+    if target is Decimal:
+        try:
+            return Decimal(str(value))
+        except InvalidOperation as exc:
+            raise _invalid("Не удалось привести значение", {"value": value, "type": "decimal"}) from exc
+    try:
+        return target(value)
+    except (TypeError, ValueError) as exc:
+        raise _invalid("Не удалось привести значение", {"value": value, "type": target.__name__}) from exc
+
+
+def parse_filter(field: str, operator: str, raw: Any) -> FilterSpec:
+    meta = FIELD_META.get(field)
+    if not meta:
+        raise _invalid("Неизвестное поле", {"field": field})
+    operator = str(operator).lower()
+    if operator not in meta["ops"]:
+        raise _invalid("Оператор не поддерживается", {"field": field, "operator": operator})
+    target = meta["type"]
+    if operator == "between":
+        if isinstance(raw, str):
+            raw = [chunk.strip() for chunk in raw.split(",") if chunk.strip()]
+        if not isinstance(raw, (list, tuple)) or len(raw) != 2:
+            raise _invalid("between ожидает два значения", {"field": field})
+        value: Any = tuple(_coerce(item, target) for item in raw)
+    elif operator == "in":
+        if isinstance(raw, str):
+            raw = [chunk.strip() for chunk in raw.split(",") if chunk.strip()]
+        if not isinstance(raw, (list, tuple)) or not raw:
+            raise _invalid("in ожидает непустой список", {"field": field})
+        value = tuple(_coerce(item, target) for item in raw)
+    elif operator in {"istrue", "isfalse", "isnull"}:
+        value = None
+    else:
+        value = _coerce(raw, target)
+    return FilterSpec(field, operator, value)
+
+
+def parse_filters(raw: str | None) -> list[FilterSpec]:
+    """Parse the ``filters`` query parameter (a JSON object or array of objects)."""
+
+    if not raw:
+        return []
+    try:
+        items = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise _invalid("Не удалось распарсить filters", {"filters": raw}) from exc
+    items = items if isinstance(items, list) else [items]
+    specs = []
+    for item in items:
+        if not isinstance(item, dict) or not {"field", "operator"}.issubset(item):
+            raise _invalid("Каждый фильтр должен содержать field/operator/value", {"filter": item})
+        specs.append(parse_filter(item["field"], item["operator"], item.get("value")))
+    return specs
+
+
+def parse_sort(raw: str) -> tuple[tuple[str, bool], ...]:
+    """``field,asc;field2,desc`` -> ((field, descending), ...), always ending on ``id``."""
+
+    order: list[tuple[str, bool]] = []
+    for chunk in [segment.strip() for segment in raw.split(";") if segment.strip()]:
+        parts = [piece.strip() for piece in chunk.split(",") if piece.strip()]
+        field = parts[0]
+        direction = parts[1].lower() if len(parts) > 1 else "asc"
+        if field not in SORTABLE_FIELDS or direction not in {"asc", "desc"}:
+            raise _invalid("Недопустимое поле сортировки", {"segment": chunk})
+        order.append((field, direction == "desc"))
+    if all(field != "id" for field, _ in order):
+        order.append(("id", False))
+    return tuple(order)
+
+
+def specs_from_params(params: Dict[str, Any]) -> list[FilterSpec]:
+    """Translate the legacy filter keys (see ``collect_filters``) into the DSL."""
+
+    specs: list[FilterSpec] = []
+    if "title_contains" in params:
+        specs.append(FilterSpec("title", "contains", params["title_contains"]))
+    if "price_between" in params:
+        start, end = params["price_between"]
+        specs.append(FilterSpec("price", "between", (_coerce(start, Decimal), _coerce(end, Decimal))))
+    if "price_in" in params:
+        specs.append(FilterSpec("price", "in", tuple(_coerce(item, Decimal) for item in params["price_in"])))
+    if "in_stock" in params:
+        specs.append(FilterSpec("in_stock", "eq", params["in_stock"]))
+    if "created_from" in params and "created_to" in params:
+        specs.append(FilterSpec("created_at", "between", (params["created_from"], params["created_to"])))
+    elif "created_from" in params:
+        specs.append(FilterSpec("created_at", "gte", params["created_from"]))
+    elif "created_to" in params:
+        specs.append(FilterSpec("created_at", "lte", params["created_to"]))
+    if "title_eq" in params:
+        specs.append(FilterSpec("title", "eq", params["title_eq"]))
+    return specs
+
+
+def _escape_like(value: str) -> str:
+    return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
+
+
+def _condition(field: str, operator: str, value: Any) -> Any:
+    """SQL expression for one filter; ``value`` may be a literal or a ``bindparam``."""
+
+    column = getattr(Product, field)
+    if operator == "eq":
+        return column == value
+    if operator == "neq":
+        return column != value
+    if operator in {"contains", "startswith", "endswith"}:
+        return column.ilike(value, escape=LIKE_ESCAPE)
+    if operator == "gt":
+        return column > value
+    if operator == "gte":
+        return column >= value
+    if operator == "lt":
+        return column < value
+    if operator == "lte":
+        return column <= value
+    if operator == "between":
+        return column.between(*value)
+    if operator == "in":
+        return column.in_(value)
+    if operator == "istrue":
+        return column.is_(True)
+    if operator == "isfalse":
+        return column.is_(False)
+    return column.is_(None)
+
+
+def _pattern(operator: str, value: str) -> str:
+    escaped = _escape_like(value)
+    if operator == "contains":
+        return f"%{escaped}%"
+    if operator == "startswith":
+        return f"{escaped}%"
+    return f"%{escaped}"
+
+
+def compile_filters(specs: Iterable[FilterSpec]) -> list[Any]:
+    """Expressions with literal values, for one-off statements (facets, bulk writes)."""
+
+    expressions = []
+    for spec in specs:
+        value = spec.value
+        if spec.operator in {"contains", "startswith", "endswith"}:
+            value = _pattern(spec.operator, value)
+        expressions.append(_condition(spec.field, spec.operator, value))
+    return expressions
+
+
+Shape = tuple[tuple[tuple[str, str], ...], tuple[tuple[str, bool], ...]]
+
+
+def shape_of(specs: Iterable[FilterSpec], order: tuple[tuple[str, bool], ...]) -> Shape:
+    return tuple((spec.field, spec.operator) for spec in specs), order
+
+
+def _bound_conditions(filters: tuple[tuple[str, str], ...]) -> list[Any]:
+    conditions = []
+    for index, (field, operator) in enumerate(filters):
+        name = f"f{index}"
+        if operator == "between":
+            value: Any = (bindparam(f"{name}_lo"), bindparam(f"{name}_hi"))
+        elif operator == "in":
+            value = bindparam(name, expanding=True)
+        elif operator in {"istrue", "isfalse", "isnull"}:
+            value = None
+        else:
+            value = bindparam(name)
+        conditions.append(_condition(field, operator, value))
+    return conditions
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def list_statements(shape: Shape) -> tuple[Select, Select]:
+    """(page, count) statements for a shape, built from named bound parameters."""
+
+    filters, order = shape
+    conditions = _bound_conditions(filters)
+    page_stmt = select(Product)
+    count_stmt = select(func.count()).select_from(Product)
+    if conditions:
+        page_stmt = page_stmt.where(and_(*conditions))
+        count_stmt = count_stmt.where(and_(*conditions))
+    page_stmt = page_stmt.order_by(
+        *(desc(getattr(Product, field)) if descending else asc(getattr(Product, field)) for field, descending in order)
+    )
+    page_stmt = page_stmt.offset(bindparam("offset")).limit(bindparam("limit"))
+    return page_stmt, count_stmt
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def validator_statement(filters: tuple[tuple[str, str], ...]) -> Select:
+    """``count(*), max(updated_at)`` over the filtered set; same parameters as :func:`list_statements`."""
+
+    conditions = _bound_conditions(filters)
+    stmt = select(func.count(), func.max(Product.updated_at)).select_from(Product)
+    return stmt.where(and_(*conditions)) if conditions else stmt
+
+
+def bind_values(specs: Iterable[FilterSpec]) -> Dict[str, Any]:
+    """Parameter values matching :func:`list_statements` for the same specs."""
+
+    values: Dict[str, Any] = {}
+    for index, spec in enumerate(specs):
+        name = f"f{index}"
+        if spec.operator == "between":
+            values[f"{name}_lo"], values[f"{name}_hi"] = spec.value
+        elif spec.operator == "in":
+            values[name] = list(spec.value)
+        elif spec.operator in {"contains", "startswith", "endswith"}:
+            values[name] = _pattern(spec.operator, spec.value)
+        elif spec.operator not in {"istrue", "isfalse", "isnull"}:
+            values[name] = spec.value
+    return values
@@ -2,20 +2,75 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from typing import Any, Dict, Iterable, Literal
 
 from fastapi import status
-from sqlalchemy import and_, asc, desc, func, select
+from sqlalchemy import and_, case, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.routes.websocket import broadcast_product_event
 from app.models.product import Product
-from app.schemas.product import PaginatedProducts, ProductCreate, ProductRead, ProductUpdate
+from app.schemas.product import (
+    BulkDeleteRequest,
+    BulkResult,
+    BulkSelection,
+    BulkUpdateRequest,
+    FacetCount,
+    HistogramBucket,
+    PaginatedProducts,
+    ProductCreate,
+    ProductFacets,
+    ProductRead,
+    ProductUpdate,
+)
+from app.services.products.query import (
+    SORTABLE_FIELDS,
+    FilterSpec,
+    bind_values,
+    compile_filters,
+    list_statements,
+    parse_sort,
+    shape_of,
+    specs_from_params,
+    validator_statement,
+)
+from app.utils.conditional import Validator
 from app.utils.errors import ErrorCodes, http_error, not_found
+from app.utils.singleflight import SingleFlight
 
 FILTERABLE_FIELDS = {"title", "price", "in_stock", "created_at"}
-SORTABLE_FIELDS = {"id", "title", "price", "created_at"}
+FACET_BUCKETS = 10
+FACET_CACHE_SIZE = 256
+PRICE_STEP = Decimal("0.01")
+# Rows per bulk UPDATE/DELETE statement; each chunk commits on its own so
+# locks are held for one chunk at a time.
+BULK_CHUNK_SIZE = 500
+
+# Facet results per normalized filter set and data version (the filtered
+# ``count, max(updated_at)``), so writes made by any worker miss the cache.
+_facet_cache: dict[tuple[Any, ...], ProductFacets] = {}
+# Identical concurrent list queries share one DB execution and one JSON body.
+list_flights = SingleFlight()
+# Bumped on every write made through this process, so reads that start after
+# a write never join a query that may have run before it.
+_write_generation = 0
+
+
+def _invalidate_reads() -> None:
+    global _write_generation
+    _write_generation += 1
+    _facet_cache.clear()
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
 
 
 @dataclass(frozen=True)
@@ -79,26 +134,39 @@ def prepare_pagination_params(
     )
 
 
+def collect_filters(
+    *,
+    title_contains: str | None = None,
+    title_eq: str | None = None,
+    price_from: float | None = None,
+    price_to: float | None = None,
+    price_in: list[float] | None = None,
+    in_stock: bool | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> Dict[str, Any]:
+    """Map filter parameters to the keys understood by :func:`build_filters`."""
+
+    filters: Dict[str, Any] = {}
+    if title_contains:
+        filters["title_contains"] = title_contains
+    if title_eq:
+        filters["title_eq"] = title_eq
+    if price_from is not None and price_to is not None:
+        filters["price_between"] = (price_from, price_to)
+    if price_in:
+        filters["price_in"] = price_in
+    if in_stock is not None:
+        filters["in_stock"] = in_stock
+    if created_from:
+        filters["created_from"] = created_from
+    if created_to:
+        filters["created_to"] = created_to
+    return filters
+
+
 def build_filters(params: Dict[str, Any]) -> Iterable[Any]:
-    expressions: list[Any] = []
-    if "title_contains" in params:
-        expressions.append(Product.title.ilike(f"%{params['title_contains']}%"))
-    if "price_between" in params:
-        start, end = params["price_between"]
-        expressions.append(Product.price.between(start, end))
-    if "price_in" in params:
-        expressions.append(Product.price.in_(params["price_in"]))
-    if "in_stock" in params:
-        expressions.append(Product.in_stock.is_(params["in_stock"]))
-    if "created_from" in params and "created_to" in params:
-        expressions.append(Product.created_at.between(params["created_from"], params["created_to"]))
-    elif "created_from" in params:
-        expressions.append(Product.created_at >= params["created_from"])
-    elif "created_to" in params:
-        expressions.append(Product.created_at <= params["created_to"])
-    if "title_eq" in params:
-        expressions.append(Product.title == params["title_eq"])
-    return expressions
+    return compile_filters(specs_from_params(params))
 
 
 def _serialize_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
@@ -116,36 +184,41 @@ def _serialize_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
     return {key: _serialize_value(value) for key, value in filters.items()}
 
 
-async def list_products(
-    *,
-    db: AsyncSession,
-    pagination: PaginationParams,
+def _list_plan(
     sort_by: str,
     sort_order: str,
     filters: Dict[str, Any],
-) -> PaginatedProducts:
-    statements = build_filters(filters)
-    stmt = select(Product)
-    if statements:
-        stmt = stmt.where(and_(*statements))
-
-    if sort_by not in SORTABLE_FIELDS:
+    dsl_filters: list[FilterSpec] | None,
+    sort: str | None,
+) -> tuple[tuple[tuple[str, bool], ...], list[FilterSpec]]:
+    if sort is None and sort_by not in SORTABLE_FIELDS:
         raise http_error(
             status.HTTP_400_BAD_REQUEST,
             ErrorCodes.VALIDATION_ERROR,
             "Недопустимое поле сортировки",
         )
+    order = parse_sort(sort or f"{sort_by},{sort_order}")
+    return order, specs_from_params(filters) + list(dsl_filters or [])
 
-    order_column = getattr(Product, sort_by)
-    stmt = stmt.order_by(asc(order_column) if sort_order == "asc" else desc(order_column))
-    stmt = stmt.offset(pagination.offset).limit(pagination.limit)
-    result = await db.execute(stmt)
-    items = result.scalars().all()
 
-    count_stmt = select(func.count()).select_from(Product)
-    if statements:
-        count_stmt = count_stmt.where(and_(*statements))
-    total = (await db.execute(count_stmt)).scalar_one()
+async def list_products(
+    *,
+    db: AsyncSession,
+    pagination: PaginationParams,
+    sort_by: str,
+    sort_order: str,
+    filters: Dict[str, Any],
+    dsl_filters: list[FilterSpec] | None = None,
+    sort: str | None = None,
+) -> PaginatedProducts:
+    order, specs = _list_plan(sort_by, sort_order, filters, dsl_filters, sort)
+
+    # Statements are cached per shape; only the bound values differ per request.
+    page_stmt, count_stmt = list_statements(shape_of(specs, order))
+    values = bind_values(specs)
+    result = await db.execute(page_stmt, {**values, "offset": pagination.offset, "limit": pagination.limit})
+    items = result.scalars().all()
+    total = (await db.execute(count_stmt, values)).scalar_one()
 
     next_offset = pagination.offset + pagination.limit
     if next_offset >= total:
@@ -156,12 +229,16 @@ async def list_products(
         prev_offset = None if pagination.offset == 0 else 0
 
     filters_applied = _serialize_filters(filters)
+    if dsl_filters:
+        filters_applied["filters"] = [spec.as_dict() for spec in dsl_filters]
+    sort_keys = [{"by": field, "order": "desc" if descending else "asc"} for field, descending in order]
 
     return PaginatedProducts(
         total=total,
         page=pagination.page,
         size=pagination.size,
-        sort={"by": sort_by, "order": sort_order},
+        sort=sort_keys[0],
+        sort_keys=sort_keys,
         filters_applied=filters_applied,
         next_offset=next_offset,
         prev_offset=prev_offset,
@@ -169,13 +246,214 @@ async def list_products(
     )
 
 
+def _list_identity(
+    order: tuple[tuple[str, bool], ...],
+    specs: list[FilterSpec],
+    pagination: PaginationParams,
+    filters: Dict[str, Any],
+    dsl_filters: list[FilterSpec] | None,
+) -> tuple[Any, ...]:
+    """Everything that determines a list response besides the data itself."""
+
+    return (
+        shape_of(specs, order),
+        tuple(sorted((name, repr(value)) for name, value in bind_values(specs).items())),
+        pagination,
+        _facet_key(filters, 0),
+        tuple(repr(spec) for spec in dsl_filters or ()),
+    )
+
+
+async def list_validator(
+    *,
+    db: AsyncSession,
+    pagination: PaginationParams,
+    sort_by: str,
+    sort_order: str,
+    filters: Dict[str, Any],
+    dsl_filters: list[FilterSpec] | None = None,
+    sort: str | None = None,
+) -> Validator:
+    """ETag of a list page from one ``count, max(updated_at)`` query; no rows are loaded.
+
+    Everything comes from the database, so every worker sends the same ETag
+    for the same data. Deletes show up in the count; there is no
+    Last-Modified because a delete leaves ``max(updated_at)`` unchanged.
+    """
+
+    order, specs = _list_plan(sort_by, sort_order, filters, dsl_filters, sort)
+    filter_shape, _ = shape_of(specs, order)
+    total, last_updated = (await db.execute(validator_statement(filter_shape), bind_values(specs))).one()
+    return Validator.from_parts(
+        *_list_identity(order, specs, pagination, filters, dsl_filters), total, _as_utc(last_updated)
+    )
+
+
+async def list_products_json(
+    *,
+    db: AsyncSession,
+    pagination: PaginationParams,
+    sort_by: str,
+    sort_order: str,
+    filters: Dict[str, Any],
+    dsl_filters: list[FilterSpec] | None = None,
+    sort: str | None = None,
+    etag: str | None = None,
+) -> bytes:
+    """:func:`list_products` serialized to JSON, coalesced across identical concurrent calls.
+
+    ``etag`` is the caller's :func:`list_validator` result, read before this
+    call. It is part of the flight key, so a request only joins a query
+    started by a caller that saw the same data version. The body is then
+    never older than the ETag sent with it, whichever worker made the write.
+    """
+
+    order, specs = _list_plan(sort_by, sort_order, filters, dsl_filters, sort)
+    key = (db.bind, _write_generation, etag, *_list_identity(order, specs, pagination, filters, dsl_filters))
+
+    async def run() -> bytes:
+        page = await list_products(
+            db=db,
+            pagination=pagination,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            filters=filters,
+            dsl_filters=dsl_filters,
+            sort=sort,
+        )
+        return page.model_dump_json().encode()
+
+    return await list_flights.do(key, run)
+
+
+def _facet_key(filters: Dict[str, Any], buckets: int) -> tuple[Any, ...]:
+    return tuple(sorted((key, repr(value)) for key, value in filters.items())), buckets
+
+
+async def _price_histogram(
+    db: AsyncSession,
+    statements: list[Any],
+    low: Decimal,
+    high: Decimal,
+    total: int,
+    buckets: int,
+) -> list[HistogramBucket]:
+    if low == high:
+        return [HistogramBucket(start=low, end=high, count=total)]
+    width = (high - low) / buckets
+    edges = [low] + [(low + width * index).quantize(PRICE_STEP) for index in range(1, buckets)] + [high]
+    bucket = case(
+        *((Product.price < edge, index) for index, edge in enumerate(edges[1:-1])),
+        else_=buckets - 1,
+    )
+    stmt = select(bucket, func.count()).group_by(bucket)
+    if statements:
+        stmt = stmt.where(and_(*statements))
+    counts = dict((await db.execute(stmt)).all())
+    return [
+        HistogramBucket(start=edges[index], end=edges[index + 1], count=counts.get(index, 0))
+        for index in range(buckets)
+    ]
+
+
+async def product_facets(
+    *,
+    db: AsyncSession,
+    filters: Dict[str, Any],
+    dsl_filters: list[FilterSpec] | None = None,
+    buckets: int = FACET_BUCKETS,
+) -> ProductFacets:
+    """Availability counts and a price histogram for products matching the same filters as the list."""
+
+    specs = specs_from_params(filters) + list(dsl_filters or [])
+    filter_shape, _ = shape_of(specs, ())
+    version = tuple((await db.execute(validator_statement(filter_shape), bind_values(specs))).one())
+    key = (_facet_key(filters, buckets), tuple(repr(spec) for spec in dsl_filters or ()), version)
+    cached = _facet_cache.get(key)
+    if cached is not None:
+        return cached
+
+    statements = compile_filters(specs)
+    summary_stmt = select(func.count(), func.min(Product.price), func.max(Product.price))
+    stock_stmt = select(Product.in_stock, func.count()).group_by(Product.in_stock)
+    if statements:
+        summary_stmt = summary_stmt.where(and_(*statements))
+        stock_stmt = stock_stmt.where(and_(*statements))
+    total, low, high = (await db.execute(summary_stmt)).one()
+    in_stock = [
+        FacetCount(value=value, count=count)
+        for value, count in sorted((await db.execute(stock_stmt)).all(), key=lambda row: -row[1])
+    ]
+    price: list[HistogramBucket] = []
+    if total:
+        price = await _price_histogram(db, statements, Decimal(str(low)), Decimal(str(high)), total, buckets)
+
+    filters_applied = _serialize_filters(filters)
+    if dsl_filters:
+        filters_applied["filters"] = [spec.as_dict() for spec in dsl_filters]
+    facets = ProductFacets(
+        total=total,
+        filters_applied=filters_applied,
+        in_stock=in_stock,
+        price=price,
+    )
+    if len(_facet_cache) >= FACET_CACHE_SIZE:
+        _facet_cache.pop(next(iter(_facet_cache)))
+    _facet_cache[key] = facets
+    return facets
+
+
+async def product_validator(db: AsyncSession, product_id: int) -> Validator:
+    """Validator of one product from its ``updated_at`` alone."""
+
+    updated_at = (await db.execute(select(Product.updated_at).where(Product.id == product_id))).scalar_one_or_none()
+    if updated_at is None:
+        raise not_found("Товар не найден", ErrorCodes.PRODUCT_NOT_FOUND)
+    return _product_validator(product_id, updated_at)
+
+
+def _product_validator(product_id: int, updated_at: datetime) -> Validator:
+    updated_at = _as_utc(updated_at)
+    return Validator.from_parts("product", product_id, updated_at, last_modified=updated_at)
+
+
+async def get_product(db: AsyncSession, product_id: int) -> tuple[ProductRead, Validator]:
+    """The product and a validator matching exactly the version returned."""
+
+    product = (await db.execute(select(Product).where(Product.id == product_id))).scalar_one_or_none()
+    if not product:
+        raise not_found("Товар не найден", ErrorCodes.PRODUCT_NOT_FOUND)
+    return ProductRead.model_validate(product), _product_validator(product_id, product.updated_at)
+
+
+def product_version(updated_at: datetime) -> int:
+    """``updated_at`` in microseconds since the epoch; the version carried by WS events."""
+
+    return (_as_utc(updated_at) - _EPOCH) // timedelta(microseconds=1)
+
+
+def product_diff(before: ProductRead, after: ProductRead) -> Dict[str, Any]:
+    """``product.updated`` payload: changed fields only, applicable to a copy at ``base_version``."""
+
+    old, new = before.model_dump(mode="json"), after.model_dump(mode="json")
+    return {
+        "id": after.id,
+        "version": product_version(after.updated_at),
+        "base_version": product_version(before.updated_at),
+        "changes": {field: value for field, value in new.items() if field != "updated_at" and old[field] != value},
+    }
+
+
 async def create_product(db: AsyncSession, payload: ProductCreate) -> ProductRead:
     product = Product(**payload.model_dump())
     db.add(product)
     await db.commit()
+    _invalidate_reads()
     await db.refresh(product)
     product_read = ProductRead.model_validate(product)
-    await broadcast_product_event("product.created", product_read.model_dump())
+    await broadcast_product_event(
+        "product.created", {**product_read.model_dump(mode="json"), "version": product_version(product_read.updated_at)}
+    )
     return product_read
 
 
@@ -184,12 +462,14 @@ async def update_product(db: AsyncSession, product_id: int, payload: ProductUpda
     product = result.scalar_one_or_none()
     if not product:
         raise not_found("Товар не найден", ErrorCodes.PRODUCT_NOT_FOUND)
+    before = ProductRead.model_validate(product)
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(product, field, value)
     await db.commit()
+    _invalidate_reads()
     await db.refresh(product)
     product_read = ProductRead.model_validate(product)
-    await broadcast_product_event("product.updated", product_read.model_dump())
+    await broadcast_product_event("product.updated", product_diff(before, product_read))
     return product_read
 
 
@@ -200,4 +480,92 @@ async def delete_product(db: AsyncSession, product_id: int) -> None:
         raise not_found("Товар не найден", ErrorCodes.PRODUCT_NOT_FOUND)
     await db.delete(product)
     await db.commit()
+    _invalidate_reads()
     await broadcast_product_event("product.deleted", {"id": product_id})
+
+
+def _bulk_predicate(selection: BulkSelection) -> list[Any]:
+    """Validate a bulk selection; return the WHERE expressions of its filters."""
+
+    if (selection.ids is None) == (selection.filters is None):
+        raise http_error(
+            status.HTTP_400_BAD_REQUEST,
+            ErrorCodes.VALIDATION_ERROR,
+            "Укажите либо ids, либо filters",
+        )
+    if selection.ids is not None:
+        return []
+    filters = collect_filters(**selection.filters.model_dump())
+    if not filters:
+        raise http_error(
+            status.HTTP_400_BAD_REQUEST,
+            ErrorCodes.VALIDATION_ERROR,
+            "Пустой фильтр затронул бы все товары",
+        )
+    return list(build_filters(filters))
+
+
+async def _bulk_targets(db: AsyncSession, selection: BulkSelection, statements: list[Any]) -> list[int]:
+    if selection.ids is not None:
+        return sorted(set(selection.ids))
+    result = await db.execute(select(Product.id).where(and_(*statements)).order_by(Product.id))
+    return list(result.scalars().all())
+
+
+def _chunks(ids: list[int]) -> Iterable[list[int]]:
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        yield ids[start : start + BULK_CHUNK_SIZE]
+
+
+async def _bulk_applied(event: str, affected: list[int], extra: dict[str, Any]) -> None:
+    _invalidate_reads()
+    affected.sort()
+    if affected:
+        await broadcast_product_event(event, {"ids": affected, **extra})
+
+
+async def bulk_update_products(db: AsyncSession, request: BulkUpdateRequest) -> BulkResult:
+    """Apply ``request.changes`` with chunked ``UPDATE ... WHERE id IN (...)`` statements."""
+
+    changes = request.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise http_error(status.HTTP_400_BAD_REQUEST, ErrorCodes.VALIDATION_ERROR, "Нет изменений")
+    # Checked up front: a NOT NULL failure would surface after earlier chunks committed.
+    columns = Product.__table__.c
+    nulls = sorted(field for field, value in changes.items() if value is None and not columns[field].nullable)
+    if nulls:
+        raise http_error(
+            status.HTTP_400_BAD_REQUEST,
+            ErrorCodes.VALIDATION_ERROR,
+            "Поля не могут быть пустыми",
+            {"fields": nulls},
+        )
+    statements = _bulk_predicate(request)
+    affected: list[int] = []
+    try:
+        for chunk in _chunks(await _bulk_targets(db, request, statements)):
+            # Filters are re-applied so rows changed since the id scan are skipped.
+            stmt = update(Product).where(Product.id.in_(chunk), *statements).values(**changes).returning(Product.id)
+            ids = (await db.execute(stmt)).scalars().all()
+            await db.commit()
+            affected.extend(ids)
+    finally:
+        # Chunks committed before a failure are visible: readers and subscribers must hear of them.
+        await _bulk_applied("product.bulk_updated", affected, {"changes": changes})
+    return BulkResult(affected=len(affected), ids=affected)
+
+
+async def bulk_delete_products(db: AsyncSession, request: BulkDeleteRequest) -> BulkResult:
+    """Delete the selected products with chunked ``DELETE ... WHERE id IN (...)`` statements."""
+
+    statements = _bulk_predicate(request)
+    affected: list[int] = []
+    try:
+        for chunk in _chunks(await _bulk_targets(db, request, statements)):
+            stmt = delete(Product).where(Product.id.in_(chunk), *statements).returning(Product.id)
+            ids = (await db.execute(stmt)).scalars().all()
+            await db.commit()
+            affected.extend(ids)
+    finally:
+        await _bulk_applied("product.bulk_deleted", affected, {})
+    return BulkResult(affected=len(affected), ids=affected)
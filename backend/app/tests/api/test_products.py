@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+from uuid import uuid4
+
 import pytest
 
 from app.core.security import create_access_token
@@ -23,6 +26,8 @@ async def test_create_product(client: AsyncClient, seeded_admin):
     assert response.status_code == 201
     data = response.json()
     assert data["title"] == "Test"
+    assert float(response.headers["x-primary-until"]) > 0
+    assert response.headers["set-cookie"].startswith("primary_until=")
 
 
 @pytest.mark.asyncio
@@ -196,3 +201,174 @@ async def test_refresh_flow(client: AsyncClient, seeded_admin):
     response = await client.post("/api/v1/auth/refresh", params={"token": refresh_token})
     assert response.status_code == 200
     assert response.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_product_facets(client: AsyncClient, seeded_admin):
+    headers = await auth_headers("admin@test.kz", UserRole.admin)
+    marker = f"Facet {uuid4().hex[:8]}"
+    for price, in_stock in (("10.00", True), ("20.00", True), ("30.00", False), ("50.00", True)):
+        await client.post(
+            "/api/v1/products/",
+            json={"title": marker, "price": price, "in_stock": in_stock},
+            headers=headers,
+        )
+    response = await client.get(f"/api/v1/products/facets?title_eq={marker}&buckets=4", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 4
+    assert body["filters_applied"] == {"title_eq": marker}
+    assert body["in_stock"] == [{"value": True, "count": 3}, {"value": False, "count": 1}]
+    assert [bucket["count"] for bucket in body["price"]] == [1, 1, 1, 1]
+    assert body["price"][0]["start"] == "10.00" and body["price"][-1]["end"] == "50.00"
+
+    await client.post(
+        "/api/v1/products/",
+        json={"title": marker, "price": "15.00", "in_stock": False},
+        headers=headers,
+    )
+    response = await client.get(f"/api/v1/products/facets?title_eq={marker}&buckets=4", headers=headers)
+    body = response.json()
+    assert body["total"] == 5
+    assert [bucket["count"] for bucket in body["price"]] == [2, 1, 1, 1]
+
+    expr = json.dumps([{"field": "title", "operator": "eq", "value": marker}, {"field": "price", "operator": "gte", "value": 20}])
+    response = await client.get("/api/v1/products/facets", params={"filters": expr, "buckets": 2}, headers=headers)
+    body = response.json()
+    assert body["total"] == 3
+    assert body["filters_applied"]["filters"][1] == {"field": "price", "operator": "gte", "value": "20"}
+    assert body["in_stock"] == [{"value": True, "count": 2}, {"value": False, "count": 1}]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete(client: AsyncClient, seeded_admin):
+    headers = await auth_headers("admin@test.kz", UserRole.admin)
+    marker = f"Bulk {uuid4().hex[:8]}"
+    ids = []
+    for price in ("10.00", "20.00", "30.00"):
+        created = await client.post(
+            "/api/v1/products/",
+            json={"title": marker, "price": price, "in_stock": True},
+            headers=headers,
+        )
+        ids.append(created.json()["id"])
+
+    response = await client.post(
+        "/api/v1/products/bulk-update",
+        json={"filters": {"title_eq": marker, "price_from": 15, "price_to": 40}, "changes": {"in_stock": False}},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2, "ids": ids[1:]}
+    listed = await client.get(f"/api/v1/products/?title_eq={marker}&in_stock=false", headers=headers)
+    assert [item["id"] for item in listed.json()["items"]] == ids[1:]
+
+    response = await client.post(
+        "/api/v1/products/bulk-delete",
+        json={"ids": [ids[0], ids[2], 10**9]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2, "ids": [ids[0], ids[2]]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_requires_single_selector(client: AsyncClient, seeded_admin):
+    response = await client.post(
+        "/api/v1/products/bulk-delete",
+        json={"filters": {}},
+        headers=await auth_headers("admin@test.kz", UserRole.admin),
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["error_code"] == ErrorCodes.VALIDATION_ERROR
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_rejects_null_for_required_fields(client: AsyncClient, seeded_admin):
+    headers = await auth_headers("admin@test.kz", UserRole.admin)
+    created = await client.post("/api/v1/products/", json={"title": "Bulk null", "price": "7.00", "in_stock": True}, headers=headers)
+    product_id = created.json()["id"]
+    response = await client.post(
+        "/api/v1/products/bulk-update",
+        json={"ids": [product_id], "changes": {"price": None, "in_stock": False}},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["details"] == {"fields": ["price"]}
+    unchanged = await client.get(f"/api/v1/products/{product_id}", headers=headers)
+    assert unchanged.json()["in_stock"] is True
+
+
+@pytest.mark.asyncio
+async def test_filter_dsl_and_multi_sort(client: AsyncClient, seeded_admin):
+    headers = await auth_headers("admin@test.kz", UserRole.admin)
+    marker = f"Dsl {uuid4().hex[:8]}"
+    for suffix, price in (("a", "5.00"), ("b", "15.00"), ("c", "15.00"), ("d", "25.00")):
+        await client.post(
+            "/api/v1/products/",
+            json={"title": f"{marker} {suffix}", "price": price, "in_stock": suffix != "c"},
+            headers=headers,
+        )
+    filters = json.dumps(
+        [
+            {"field": "title", "operator": "startswith", "value": marker},
+            {"field": "price", "operator": "between", "value": [10, 30]},
+        ]
+    )
+    response = await client.get(
+        "/api/v1/products/",
+        params={"filters": filters, "sort": "price,desc;title,asc"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["title"][-1] for item in body["items"]] == ["d", "b", "c"]
+    assert body["sort"] == {"by": "price", "order": "desc"}
+    assert body["filters_applied"]["filters"][1] == {"field": "price", "operator": "between", "value": ["10", "30"]}
+
+    response = await client.get(
+        "/api/v1/products/",
+        params={"filters": json.dumps({"field": "in_stock", "operator": "like", "value": 1})},
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"]["error_code"] == ErrorCodes.VALIDATION_ERROR
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_single_product_and_list(client: AsyncClient, seeded_admin):
+    headers = await auth_headers("admin@test.kz", UserRole.admin)
+    title = f"Conditional {uuid4().hex[:8]}"
+    created = await client.post("/api/v1/products/", json={"title": title, "price": "12.00", "in_stock": True}, headers=headers)
+    product_id = created.json()["id"]
+
+    first = await client.get(f"/api/v1/products/{product_id}", headers=headers)
+    assert first.status_code == 200 and first.json()["title"] == title
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+    cached = await client.get(f"/api/v1/products/{product_id}", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.text == "" and cached.headers["etag"] == etag
+    since = await client.get(f"/api/v1/products/{product_id}", headers={**headers, "If-Modified-Since": last_modified})
+    assert since.status_code == 304
+
+    await client.put(f"/api/v1/products/{product_id}", json={"price": "13.00"}, headers=headers)
+    changed = await client.get(f"/api/v1/products/{product_id}", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    missing = await client.get("/api/v1/products/999999", headers=headers)
+    assert missing.status_code == 404
+
+    page = await client.get("/api/v1/products/", params={"title_eq": title}, headers=headers)
+    assert page.status_code == 200 and page.json()["total"] == 1
+    list_etag = page.headers["etag"]
+    assert "last-modified" not in page.headers
+    cached = await client.get("/api/v1/products/", params={"title_eq": title}, headers={**headers, "If-None-Match": list_etag})
+    assert cached.status_code == 304
+    other_page = await client.get(
+        "/api/v1/products/", params={"title_eq": title, "page": 2}, headers={**headers, "If-None-Match": list_etag}
+    )
+    assert other_page.status_code == 200
+
+    await client.delete(f"/api/v1/products/{product_id}", headers=headers)
+    after_delete = await client.get(
+        "/api/v1/products/", params={"title_eq": title}, headers={**headers, "If-None-Match": list_etag}
+    )
+    assert after_delete.status_code == 200 and after_delete.json()["total"] == 0
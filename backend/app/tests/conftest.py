@@ -16,7 +16,7 @@ from app.core import settings as settings_module  # noqa: E402
 from app.core.security import get_password_hash  # noqa: E402
 from app.core.settings import Settings  # noqa: E402
 from app.db.base import Base  # noqa: E402
-from app.db.session import get_db  # noqa: E402
+from app.db.session import get_db, get_read_db, get_writer_session  # noqa: E402
 from app.main import app  # noqa: E402
 from app.models.user import User, UserRole  # noqa: E402
 from app.tests.utils.simple_client import AsyncClient  # noqa: E402
@@ -65,6 +65,8 @@ async def client(db_session) -> AsyncClient:
         yield db_session
 
     app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
+    app.dependency_overrides[get_writer_session] = _get_db
     client = AsyncClient(app=app, base_url="http://testserver")
     yield client
     app.dependency_overrides.clear()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.main import admission
+from app.tests.utils.simple_client import AsyncClient
+
+
+def make_controller(**overrides) -> AdmissionController:
+    options = dict(initial_limit=10, min_limit=2, max_limit=20, latency_target_ms=100, read_share=0.5)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_limit_grows_when_fast_and_backs_off_when_slow_or_saturated():
+    controller = make_controller()
+    for _ in range(10):
+        assert controller.try_acquire("write")
+    for _ in range(10):
+        controller.release(0.01)
+    assert controller.limit > 10
+
+    before = controller.limit
+    controller.try_acquire("write")
+    controller.release(0.5)
+    assert controller.limit == pytest.approx(before * 0.9)
+    # Back-to-back slow completions only count once per target interval.
+    controller.try_acquire("write")
+    controller.release(0.5)
+    assert controller.limit == pytest.approx(before * 0.9)
+
+    saturated = make_controller(pressure=lambda: 1.0)
+    saturated.try_acquire("read")
+    saturated.release(0.01)
+    assert saturated.limit == 9
+
+
+def test_reads_are_shed_before_writes_and_ops():
+    controller = make_controller()
+    assert all(controller.try_acquire("read") for _ in range(5))
+    assert not controller.try_acquire("read")
+    assert all(controller.try_acquire("write") for _ in range(5))
+    assert not controller.try_acquire("write")
+    assert controller.try_acquire("ops")
+    assert controller.shedding and controller.rejected == 2
+    assert AdmissionController.classify("GET", "/api/v1/products/") == "read"
+    assert AdmissionController.classify("POST", "/api/v1/products/") == "write"
+    assert AdmissionController.classify("GET", "/api/v1/ready") == "ops"
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_over_limit_with_retry_after():
+    release = asyncio.Event()
+    inner = FastAPI()
+
+    @inner.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @inner.post("/write")
+    async def write():
+        return {"ok": True}
+
+    controller = make_controller(initial_limit=2, read_share=0.5)
+    client = AsyncClient(app=AdmissionMiddleware(inner, controller))
+    held = asyncio.create_task(client.get("/slow"))
+    await asyncio.sleep(0.01)
+
+    rejected = await client.get("/slow")
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "1"
+    assert rejected.json()["detail"]["error_code"] == "SERVICE_OVERLOADED"
+    assert (await client.post("/write")).status_code == 200
+
+    release.set()
+    assert (await held).status_code == 200
+    assert controller.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_shedding(client):
+    response = await client.get("/api/v1/ready")
+    assert response.status_code == 200 and response.json()["admission"]["shedding"] is False
+
+    saved = admission.last_rejection
+    admission.last_rejection = time.monotonic()
+    try:
+        response = await client.get("/api/v1/ready")
+        assert response.status_code == 503 and response.json()["status"] == "shedding"
+    finally:
+        admission.last_rejection = saved
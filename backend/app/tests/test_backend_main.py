@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from array import array
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+import backend_main  # noqa: E402
+from backend_main import (  # noqa: E402
+    CatalogueUnavailable,
+    CatalogueWriter,
+    PaginatedProducts,
+    ProductCreate,
+    ProductRow,
+    ProductUpdate,
+    QueryCache,
+    QueryPool,
+    SharedCatalogue,
+    Snapshot,
+    WriteAheadStore,
+)
+
+NOW_US = 1_700_000_000_000_000
+
+
+def make_rows(count: int, start: int = 1) -> list[ProductRow]:
+    return [
+        ProductRow(
+            idx,
+            f"Product {idx}",
+            ("Audio", "Tablets", "Wearables")[idx % 3],
+            round(10 + idx * 1.5, 2),
+            idx % 7,
+            idx % 4 != 0,
+            None if idx % 5 == 0 else f"SKU {idx}",
+            NOW_US + idx,
+            NOW_US + 2 * idx,
+        )
+        for idx in range(start, start + count)
+    ]
+
+
+def by_id(rows) -> dict[int, dict]:
+    return {row.id: row.as_dict() for row in rows}
+
+
+async def list_page(module, **params) -> dict:
+    """Call the ``/products`` handler directly with query defaults filled in."""
+
+    query = {"page": 1, "page_size": 100, "q": None, "filters": None, "field": None, "operator": None, "value": None, "sort": None}
+    response = await module.list_products(**{**query, **params})
+    return json.loads(response.body)
+
+
+@pytest.fixture()
+def booster():
+    """``backend_main`` with its module-level dataset restored to the demo rows afterwards."""
+
+    yield backend_main
+    backend_main._seed(0)
+
+
+def test_wal_replays_after_crash_and_truncates_torn_tail(tmp_path):
+    store = WriteAheadStore(tmp_path, fsync_policy="off")
+    assert store.recover() is None
+    rows = make_rows(10)
+    store.write_snapshot(rows, 11, store.rotate())
+
+    expected = by_id(rows)
+    for row in make_rows(3, start=11):
+        store.log_upsert(row)
+        expected[row.id] = row.as_dict()
+    changed = rows[1].copy()
+    changed.title, changed.updated_us = "Renamed", NOW_US + 999
+    store.log_upsert(changed)
+    expected[changed.id] = changed.as_dict()
+    for product_id in (4, 12):
+        store.log_delete(product_id)
+        del expected[product_id]
+
+    # Crash: the process dies mid-append, leaving half a record behind.
+    segment = max(tmp_path.glob("wal-*.log"))
+    intact = segment.stat().st_size
+    with open(segment, "ab") as handle:
+        handle.write(WriteAheadStore.RECORD.pack(64, 0, WriteAheadStore.OP_UPSERT) + b"torn")
+
+    recovered = WriteAheadStore(tmp_path, fsync_policy="off")
+    rows_after, next_id = recovered.recover()
+    assert by_id(rows_after) == expected
+    assert next_id == 14
+    assert segment.stat().st_size == intact
+
+    # The log stays usable after recovery: new records land in a fresh segment and replay too.
+    extra = make_rows(1, start=next_id)[0]
+    recovered.log_upsert(extra)
+    expected[extra.id] = extra.as_dict()
+    again, next_id = WriteAheadStore(tmp_path, fsync_policy="off").recover()
+    assert by_id(again) == expected and next_id == 15
+
+
+def test_wal_snapshot_drops_covered_segments(tmp_path):
+    store = WriteAheadStore(tmp_path, fsync_policy="off")
+    store.recover()
+    rows = make_rows(5)
+    for row in rows:
+        store.log_upsert(row)
+    store.log_delete(2)
+    store.write_snapshot([row for row in rows if row.id != 2], 6, store.rotate())
+    assert [path.name for path in tmp_path.glob("wal-*.log")] == [f"wal-{store._segment:08d}.log"]
+    loaded, next_id = WriteAheadStore(tmp_path, fsync_policy="off").recover()
+    assert sorted(by_id(loaded)) == [1, 3, 4, 5] and next_id == 6
+    assert (tmp_path / WriteAheadStore.SNAPSHOT).exists()
+
+
+def test_snapshot_versions_and_compaction_after_deletes():
+    rows = make_rows(3 * Snapshot.CHUNK)
+    base = Snapshot.build(rows)
+    current = base
+    deleted = set(range(2, len(rows) + 1, 2))
+    for product_id in sorted(deleted):
+        current = current.remove(current.locate(product_id))
+
+    # Older versions are untouched by later writes.
+    assert len(base) == len(rows) and base.get(2) is rows[1]
+    assert len(current) == len(rows) - len(deleted) and current.tombstones == len(deleted)
+    assert current.get(2) is None and current.locate(2) is None and current.get(3) is rows[2]
+    assert current.needs_compaction()
+
+    compacted = current.compacted()
+    assert compacted.tombstones == 0 and compacted.slots == len(compacted) == len(current)
+    assert [row.id for row in compacted] == [row.id for row in current]
+    assert compacted.ids is not current.ids and all(compacted.get(pid) is None for pid in deleted)
+    assert [compacted.locate(row.id) for row in compacted] == list(range(len(compacted)))
+
+
+@pytest.mark.asyncio
+async def test_background_compaction_keeps_writes_made_meanwhile(booster):
+    rows = make_rows(2 * Snapshot.CHUNK)
+    booster._install(rows, len(rows) + 1)
+    for product_id in range(1, Snapshot.CHUNK + 1):
+        await booster.delete_product(product_id)
+    compaction = booster._COMPACTION
+    assert compaction is not None and not compaction.done()
+
+    # Writes made while the compaction runs are replayed onto its result.
+    updated = await booster.update_product(Snapshot.CHUNK + 1, ProductUpdate(title="Updated meanwhile"))
+    await booster.delete_product(Snapshot.CHUNK + 2)
+    created = await booster.create_product(ProductCreate(title="Created meanwhile", category="Audio", price=1.0, stock=1))
+    await compaction
+
+    snapshot = booster._SNAPSHOT
+    # Only the delete made during the compaction is left as a tombstone.
+    assert snapshot.tombstones == 1 and snapshot.slots == len(rows) - Snapshot.CHUNK + 1
+    live = by_id(snapshot)
+    expected = [pid for pid in range(Snapshot.CHUNK + 1, len(rows) + 1) if pid != Snapshot.CHUNK + 2]
+    assert sorted(live) == expected + [created.id]
+    assert live[updated.id]["title"] == "Updated meanwhile"
+    assert live[created.id]["title"] == "Created meanwhile"
+
+
+@pytest.mark.asyncio
+async def test_query_pool_merge_matches_inline_search(booster, monkeypatch):
+    rows = make_rows(3000)
+    booster._install(rows, len(rows) + 1)
+    queries = [
+        ('[{"field": "price", "operator": "gte", "value": 1000}]', None, "price,desc"),
+        (None, "product 12", "relevance,desc"),
+        ('[{"field": "available", "operator": "istrue", "value": null}]', None, "stock,asc;title,desc"),
+    ]
+
+    def inline(filters, needle, order, limit):
+        ordered = booster._apply_sort(
+            booster._apply_filters(booster._apply_search(booster._SNAPSHOT, needle), filters), order, needle
+        )
+        return [row.id for row in ordered[:limit]], len(ordered)
+
+    async def check() -> None:
+        for raw, q, sort in queries:
+            filters = booster._normalize_filters(raw, None, None, None)
+            needle, order = booster._normalize_query(q), booster._parse_sort(sort)
+            _, ids, total = await pool.run(filters, needle, order, 50)
+            assert (list(ids), total) == inline(filters, needle, order, 50), (raw, q, sort)
+
+    pool = QueryPool(2)
+    monkeypatch.setattr(booster, "_QUERY_POOL", pool)
+    try:
+        await check()
+        # Rows written after the export are skipped by the workers and merged in from the parent.
+        await booster.update_product(7, ProductUpdate(price=9_999.0, title="Product 12 moved"))
+        await booster.delete_product(2_500)
+        await booster.create_product(ProductCreate(title="Product 12 new", category="Audio", price=5_000.0, stock=0))
+        assert len(pool._current.dirty) == 3
+        await check()
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_catalogue_versions_and_visibility(booster, monkeypatch, tmp_path):
+    writer = CatalogueWriter(tmp_path)
+    monkeypatch.setattr(booster, "_CATALOGUE_WRITER", writer)
+    rows = make_rows(20)
+    booster._install(rows, len(rows) + 1)
+    reader = SharedCatalogue(tmp_path)
+    first = reader.view()
+    assert first.version == writer.version and len(first) == 20
+    assert {row.id: row.as_dict() for row in first} == by_id(rows)
+
+    created = await booster.create_product(ProductCreate(title="Shared", category="Audio", price=3.0, stock=2))
+    after_create = reader.view()
+    assert after_create.version == first.version + 1 and len(after_create) == 21
+    assert after_create.get(created.id).title == "Shared" and first.get(created.id) is None
+
+    await booster.update_product(3, ProductUpdate(title="Shared update"))
+    after_update = reader.view()
+    assert after_update.version == first.version + 2
+    assert after_update.get(3).title == "Shared update" and after_create.get(3).title == "Product 3"
+
+    await booster.delete_product(5)
+    after_delete = reader.view()
+    assert after_delete.version == first.version + 3 and len(after_delete) == 20
+    assert after_delete.get(5) is None and after_update.get(5).title == "Product 5"
+    assert sorted(row.id for row in after_delete) == [pid for pid in range(1, 21) if pid != 5] + [created.id]
+    writer.close()
+
+
+def test_catalogue_reader_gives_up_on_a_stuck_header(booster, monkeypatch, tmp_path):
+    writer = CatalogueWriter(tmp_path)
+    monkeypatch.setattr(booster, "_CATALOGUE_WRITER", writer)
+    booster._install(make_rows(10), 11)
+    reader = SharedCatalogue(tmp_path)
+    version = reader.view().version
+
+    # The writer dies mid-publish: the sequence number stays odd.
+    writer.SEQ.pack_into(writer._map, writer.SEQ_OFFSET, 2 * writer.version + 1)
+    writer.close()
+    started = time.monotonic()
+    with pytest.raises(CatalogueUnavailable):
+        reader.view()
+    assert time.monotonic() - started < 1
+    monkeypatch.setattr(booster, "_CATALOGUE", reader)
+    with pytest.raises(HTTPException) as error:
+        booster._view()
+    assert error.value.status_code == 503
+
+    # A restarted writer publishes a new file; the reader moves over to it.
+    restarted = CatalogueWriter(tmp_path)
+    restarted.rebuild(booster._SNAPSHOT)
+    view = reader.view()
+    assert view.version > version and len(view) == 10
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_socket_rejects_non_object_requests(tmp_path):
+    path = str(tmp_path / "writer.sock")
+    server = await asyncio.start_unix_server(backend_main._serve_worker, path=path)
+    try:
+        for line in (b"[1, 2]\n", b'{"op": "update"}\n'):
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(line)
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            writer.close()
+            assert reply["status"] == 400 and reply["body"]["error_code"] == "invalid_request"
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_forward_reports_a_writer_that_hangs_up(monkeypatch, tmp_path):
+    async def hang_up(reader, writer):
+        await reader.readline()
+        writer.close()
+
+    monkeypatch.setattr(backend_main, "CATALOGUE_DIR", str(tmp_path))
+    server = await asyncio.start_unix_server(hang_up, path=backend_main._writer_socket())
+    try:
+        with pytest.raises(HTTPException) as error:
+            await backend_main._forward({"op": "delete", "product_id": 1})
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert error.value.status_code == 503 and error.value.detail["error_code"] == "writer_unavailable"
+
+
+def test_catalogue_reader_retries_a_file_replaced_while_opening(booster, monkeypatch, tmp_path):
+    writer = CatalogueWriter(tmp_path)
+    monkeypatch.setattr(booster, "_CATALOGUE_WRITER", writer)
+    booster._install(make_rows(10), 11)
+    current = SharedCatalogue.latest(tmp_path)
+
+    # The first listing still names a file the writer has since unlinked.
+    listings = iter([current - 1])
+    monkeypatch.setattr(SharedCatalogue, "latest", classmethod(lambda cls, directory: next(listings, current)))
+    view = SharedCatalogue(tmp_path).view()
+    assert len(view) == 10 and view.version == writer.version
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_group_commit_waiters_see_a_cancelled_flush(tmp_path):
+    store = WriteAheadStore(tmp_path, fsync_policy="group", group_commit_ms=1_000)
+    store.recover()
+    committing = asyncio.create_task(store.commit(store.log_delete(1)))
+    await asyncio.sleep(0.01)
+    flush = next(task for task in asyncio.all_tasks() if task.get_coro().__name__ == "_group_flush")
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(committing, timeout=1)
+    assert store._pending is None
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_compaction_is_logged(booster, monkeypatch, caplog):
+    def explode(self):
+        raise RuntimeError("out of memory")
+
+    rows = make_rows(2 * Snapshot.CHUNK)
+    booster._install(rows, len(rows) + 1)
+    monkeypatch.setattr(Snapshot, "compacted", explode)
+    for product_id in range(1, Snapshot.CHUNK + 1):
+        await booster.delete_product(product_id)
+    with pytest.raises(RuntimeError):
+        await booster._COMPACTION
+    await asyncio.sleep(0)
+    assert "Snapshot compaction failed" in caplog.text
+    assert len(booster._SNAPSHOT) == Snapshot.CHUNK and booster._DIRTY is None
+
+
+@pytest.mark.asyncio
+async def test_trigram_lookups_match_a_substring_scan_across_writes(booster):
+    booster._install(make_rows(300), 301)
+    await booster.create_product(ProductCreate(title="Наушники Enco Air", category="Audio", price=9.0, stock=1, description="Беспроводные"))
+    await booster.update_product(12, ProductUpdate(title="Watch Enco edition", description=None))
+    await booster.update_product(13, ProductUpdate(description="enco case"))
+    for product_id in (14, 120, 299):
+        await booster.delete_product(product_id)
+
+    live = {row.id for row in booster._SNAPSHOT}
+    for needle in ("product 1", "enco", "sku 2", "oduct 29", "audio", "наушники", "tablets", "zzz"):
+        expected = {row.id for row in booster._SNAPSHOT if booster._matches_query(row, needle)}
+        candidates = booster._SEARCH_INDEX.lookup(needle)
+        # The index prunes but never loses a match, and holds no deleted or stale ids.
+        assert candidates >= expected and candidates <= live, needle
+        assert {row.id for row in booster._apply_search(booster._SNAPSHOT.rows_for(candidates), needle)} == expected
+        assert {item["id"] for item in (await list_page(booster, q=needle, page_size=100))["items"]} <= expected
+    assert 14 not in booster._SEARCH_INDEX.lookup("product 14")
+    assert 12 not in booster._SEARCH_INDEX.lookup("sku 12")
+
+
+@pytest.mark.asyncio
+async def test_short_needles_fall_back_to_a_scan(booster):
+    booster._install(make_rows(40), 41)
+    for needle in ("9", "ud", "a"):
+        assert booster._SEARCH_INDEX.lookup(needle) is None
+        expected = sorted(row.id for row in booster._SNAPSHOT if booster._matches_query(row, needle))
+        page = await list_page(booster, q=needle, sort="id,asc")
+        assert [item["id"] for item in page["items"]] == expected and page["total"] == len(expected)
+
+
+@pytest.mark.asyncio
+async def test_relevance_sort_requires_a_query(booster):
+    booster._install(make_rows(5), 6)
+    with pytest.raises(HTTPException) as error:
+        await list_page(booster, sort="relevance,desc")
+    assert error.value.status_code == 400 and error.value.detail["details"] == {"sort": "relevance,desc"}
+    assert (await list_page(booster, q="product", sort="relevance,desc"))["total"] == 5
+
+
+def test_query_cache_evicts_least_recently_used_within_budget():
+    ids = array("q", range(10))
+    cache = QueryCache(3 * (len(ids) * ids.itemsize + QueryCache.ENTRY_OVERHEAD))
+    for key in ("a", "b", "c"):
+        cache.put((key,), 1, ids, 10)
+    assert cache.get(("a",), 1, 10) is not None
+    cache.put(("d",), 1, ids, 10)
+    assert cache.get(("b",), 1, 10) is None
+    assert all(cache.get((key,), 1, 10) is not None for key in ("a", "c", "d"))
+    assert cache.used <= cache.budget
+    # A newer generation drops every entry; results computed for an older one are not stored.
+    assert cache.get(("a",), 2, 10) is None and cache.used == 0
+    cache.put(("a",), 1, ids, 10)
+    assert cache.get(("a",), 2, 10) is None
+
+
+@pytest.mark.asyncio
+async def test_query_cache_serves_later_pages_and_drops_on_writes(booster, monkeypatch):
+    booster._install(make_rows(60), 61)
+    cache = QueryCache(1 << 20)
+    monkeypatch.setattr(booster, "_QUERY_CACHE", cache)
+    scans = []
+    execute = booster._execute
+
+    async def counting(*args):
+        scans.append(args)
+        return await execute(*args)
+
+    monkeypatch.setattr(booster, "_execute", counting)
+    first = await list_page(booster, page_size=20, sort="price,desc")
+    second = await list_page(booster, page=2, page_size=20, sort="price,desc")
+    assert len(scans) == 1 and cache.hits == 1
+    assert [item["id"] for item in first["items"] + second["items"]] == list(range(60, 20, -1))
+
+    # The write bumps the snapshot version the cache is keyed on.
+    await booster.update_product(60, ProductUpdate(price=1.0))
+    after = await list_page(booster, page_size=20, sort="price,desc")
+    assert len(scans) == 2 and cache.generation == booster._SNAPSHOT.version
+    assert after["items"][0]["id"] == 59 and 60 not in [item["id"] for item in after["items"]]
+
+
+@pytest.mark.asyncio
+async def test_list_body_matches_the_response_model(booster):
+    rows = make_rows(12)
+    rows[0].price, rows[1].price, rows[2].price = 0.1 + 0.2, 13.0, 1e-7
+    rows[3].title = 'Product "4" \\ кавычки'
+    booster._install(rows, len(rows) + 1)
+    params = {"page": 2, "page_size": 5, "q": " Product ", "filters": '[{"field": "price", "operator": "lt", "value": 1000}]', "sort": "id,asc"}
+
+    response = await booster.list_products(**{"field": None, "operator": None, "value": None, **params})
+    expected = PaginatedProducts(
+        items=[row.to_product() for row in rows[5:10]],
+        page=2,
+        page_size=5,
+        total=12,
+        total_pages=3,
+        sort="id,asc",
+        filters=booster._normalize_filters(params["filters"], None, None, None),
+        q=" Product ",
+    )
+    assert response.body == expected.model_dump_json().encode()
+
+    first = await booster.list_products(**{"field": None, "operator": None, "value": None, **params, "page": 1})
+    items = json.loads(first.body)["items"]
+    assert [item["description"] for item in items] == [row.description for row in rows[:5]] and items[4]["description"] is None
+    assert PaginatedProducts.model_validate_json(first.body).model_dump_json().encode() == first.body
+
+
+def test_histogram_bucket_edges():
+    buckets = backend_main._histogram([10.0, 20.0, 30.0, 40.0, 12.5], 3)
+    assert [(bucket["start"], bucket["end"]) for bucket in buckets] == [(10.0, 20.0), (20.0, 30.0), (30.0, 40.0)]
+    # ``start <= value < end``, except that the top edge falls into the last bucket.
+    assert [bucket["count"] for bucket in buckets] == [2, 1, 2]
+    assert backend_main._histogram([7.5, 7.5, 7.5], 4) == [{"start": 7.5, "end": 7.5, "count": 3}]
+    assert backend_main._histogram([], 4) == []
+
+
+@pytest.mark.asyncio
+async def test_facets_count_matching_rows_and_follow_writes(booster):
+    rows = make_rows(30)
+    booster._install(rows, len(rows) + 1)
+    query = {"q": None, "field": None, "operator": None, "value": None, "buckets": 5}
+    in_stock = '[{"field": "stock", "operator": "gte", "value": 2}]'
+
+    async def facets() -> dict:
+        return json.loads((await booster.product_facets(**query, filters=in_stock)).body)
+
+    def expected_counts(matching, name) -> dict:
+        counts: dict = {}
+        for row in matching:
+            counts[getattr(row, name)] = counts.get(getattr(row, name), 0) + 1
+        return counts
+
+    first = await facets()
+    matching = [row for row in booster._SNAPSHOT if row.stock >= 2]
+    assert first["total"] == len(matching)
+    for name in ("category", "available"):
+        assert {item["value"]: item["count"] for item in first["counts"][name]} == expected_counts(matching, name)
+    prices = first["histograms"]["price"]
+    assert prices[0]["start"] == min(row.price for row in matching) and prices[-1]["end"] == max(row.price for row in matching)
+    assert sum(bucket["count"] for bucket in prices) == len(matching)
+    assert await facets() == first
+
+    # Writes change the snapshot version, which drops the cached body.
+    await booster.update_product(2, ProductUpdate(stock=50, category="Phones"))
+    await booster.delete_product(3)
+    after = await facets()
+    matching = [row for row in booster._SNAPSHOT if row.stock >= 2]
+    assert after["total"] == len(matching) == first["total"] - 1
+    assert {item["value"]: item["count"] for item in after["counts"]["category"]} == expected_counts(matching, "category")
+    assert after["histograms"]["stock"][-1]["end"] == 50
+
+
+def test_seed_generates_contiguous_reproducible_rows(booster, monkeypatch):
+    monkeypatch.setattr(booster, "SEED", 11)
+    booster._seed(500)
+    first = list(booster._SNAPSHOT)
+    assert [row.id for row in first] == list(range(1, 501)) and booster._NEXT_ID == 501
+
+    def stable(rows) -> list[tuple]:
+        # Timestamps are relative to the seeding time; everything else comes from the seed.
+        return [tuple(getattr(row, name) for name in ProductRow.FIELDS if not name.endswith("_us")) for row in rows]
+
+    booster._seed(500)
+    assert stable(booster._SNAPSHOT) == stable(first)
+    assert by_id(booster._synthetic_rows(500, 11, NOW_US)) == by_id(booster._synthetic_rows(500, 11, NOW_US))
+    assert stable(booster._synthetic_rows(500, 12, NOW_US)) != stable(first)
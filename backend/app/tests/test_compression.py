@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.core.compression import CompressionMiddleware, negotiate
+from app.core.responses import FastJSONResponse, dumps
+from app.tests.utils.simple_client import AsyncClient
+
+ROWS = [{"id": index, "title": f"Product {index}", "price": "10.00", "in_stock": True} for index in range(200)]
+
+
+def make_client(minimum_size: int = 512) -> AsyncClient:
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return ROWS
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for row in ROWS[:3]:
+                yield (json.dumps(row) + "\n").encode()
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson; charset=utf-8")
+
+    return AsyncClient(app=CompressionMiddleware(app, minimum_size=minimum_size))
+
+
+def test_negotiate_honours_q_values_and_wildcards():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("deflate;q=1.0, gzip;q=0.5") == "deflate"
+    assert negotiate("gzip;q=0, *;q=0.3") == "deflate"
+    assert negotiate("identity") is None
+    assert negotiate("") is None
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed_and_small_ones_pass_through():
+    client = make_client()
+    response = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(response._body)
+    assert json.loads(gzip.decompress(response._body)) == ROWS
+
+    deflated = await client.get("/big", headers={"Accept-Encoding": "deflate"})
+    assert json.loads(zlib.decompress(deflated._body)) == ROWS
+
+    small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.json() == {"ok": True}
+    plain = await client.get("/big")
+    assert "content-encoding" not in plain.headers and plain.json() == ROWS
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_are_compressed_per_chunk():
+    client = make_client(minimum_size=10_000)
+    response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(response._body).decode().splitlines()
+    assert [json.loads(line) for line in lines] == ROWS[:3]
+
+
+@pytest.mark.asyncio
+async def test_product_list_is_compressed(client: AsyncClient, seeded_admin):
+    from app.core.security import create_access_token
+    from app.models.user import UserRole
+
+    headers = {"Authorization": f"Bearer {create_access_token('admin@test.kz', UserRole.admin)}"}
+    for index in range(3):
+        await client.post("/api/v1/products/", json={"title": f"Zip {index}", "price": "1.00", "in_stock": True}, headers=headers)
+    response = await client.get("/api/v1/products/", params={"size": 200}, headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response._body))["total"] >= 3
+
+
+def test_fast_json_matches_api_conventions():
+    payload = {"price": Decimal("10.50"), "at": datetime(2024, 1, 2, 3, 4, 5), "title": "Телефон"}
+    assert json.loads(dumps(payload)) == {"price": "10.50", "at": "2024-01-02T03:04:05", "title": "Телефон"}
+    assert FastJSONResponse({"ok": True}).body == b'{"ok":true}'
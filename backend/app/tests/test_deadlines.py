@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.settings import Settings
+from app.db import deadlines
+from app.db.deadlines import DEADLINE_HEADER, Deadline, apply_deadline, deadline_session, is_deadline_error, request_deadline
+from app.db.pool import pool_stats
+from app.db.session import create_engine_for
+from app.tests.utils.simple_client import AsyncClient
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000) SELECT count(*) FROM c"
+)
+
+
+def make_request(headers: dict[str, str], path: str = "/api/v1/products/") -> Request:
+    raw = [(key.lower().encode(), value.encode()) for key, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": raw})
+
+
+def test_request_deadline_from_route_settings_and_header():
+    config = Settings(
+        request_deadline_ms=1000, request_deadline_max_ms=5000, request_deadlines_ms={"GET /api/v1/products/": 200}
+    )
+    assert request_deadline(make_request({}), config).budget_ms == 200
+    assert request_deadline(make_request({}, "/api/v1/auth/me"), config).budget_ms == 1000
+    assert request_deadline(make_request({DEADLINE_HEADER: "50"}), config).budget_ms == 50
+    assert request_deadline(make_request({DEADLINE_HEADER: "99999"}), config).budget_ms == 5000
+    assert request_deadline(make_request({DEADLINE_HEADER: "soon"}), config).budget_ms == 200
+
+
+@pytest.mark.asyncio
+async def test_sqlite_statement_aborted_at_deadline(tmp_path):
+    engine = create_engine_for(f"sqlite+aiosqlite:///{tmp_path / 'deadline.db'}", Settings(db_pool_size=1, db_max_overflow=0))
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+    started = time.perf_counter()
+    async with factory() as session:
+        apply_deadline(session, Deadline(50))
+        with pytest.raises(OperationalError) as caught:
+            await session.execute(SLOW_QUERY)
+    assert is_deadline_error(caught.value)
+    assert time.perf_counter() - started < 2
+
+    # The pooled connection no longer carries the expired deadline.
+    async with factory() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar_one() == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_deadline_and_disconnect_answer_504_and_release_connection(tmp_path):
+    engine = create_engine_for(f"sqlite+aiosqlite:///{tmp_path / 'deadline.db'}", Settings(db_pool_size=1, db_max_overflow=0))
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    config = Settings(request_deadline_ms=30_000)
+
+    async def get_session(request: Request):
+        async with deadline_session(factory, request, config) as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow(db: AsyncSession = Depends(get_session)):
+        return {"count": (await db.execute(SLOW_QUERY)).scalar_one()}
+
+    response = await AsyncClient(app=app).get("/slow", headers={DEADLINE_HEADER: "50"})
+    assert response.status_code == 504
+    assert response.json()["detail"]["error_code"] == "DEADLINE_EXCEEDED"
+
+    messages = asyncio.Queue()
+    await messages.put({"type": "http.request", "body": b"", "more_body": False})
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def disconnect_soon():
+        await asyncio.sleep(0.1)
+        await messages.put({"type": "http.disconnect"})
+
+    scope = {"type": "http", "method": "GET", "path": "/slow", "query_string": b"", "headers": [], "root_path": ""}
+    started = time.perf_counter()
+    await asyncio.gather(app(scope, messages.get, send), disconnect_soon())
+    assert time.perf_counter() - started < 2
+    assert sent[0]["status"] == 504
+    assert pool_stats(engine)["in_use"] == 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_and_write_sessions_share_one_disconnect_watcher(tmp_path, monkeypatch):
+    engines = [
+        create_engine_for(f"sqlite+aiosqlite:///{tmp_path / name}", Settings(db_pool_size=1, db_max_overflow=0))
+        for name in ("read.db", "write.db")
+    ]
+    read_factory, write_factory = (async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession) for engine in engines)
+    config = Settings(request_deadline_ms=30_000)
+    issued: list[Deadline] = []
+
+    def recording_deadline(request, settings):
+        issued.append(request_deadline(request, settings))
+        return issued[-1]
+
+    monkeypatch.setattr(deadlines, "request_deadline", recording_deadline)
+
+    async def get_read(request: Request):
+        async with deadline_session(read_factory, request, config) as session:
+            yield session
+
+    async def get_write(request: Request):
+        async with deadline_session(write_factory, request, config) as session:
+            yield session
+
+    app = FastAPI()
+    watchers = []
+
+    @app.get("/both")
+    async def both(request: Request, read: AsyncSession = Depends(get_read), write: AsyncSession = Depends(get_write)):
+        watchers.append(request.state.disconnect_watcher)
+        await write.execute(text("SELECT 1"))
+        return {"count": (await read.execute(SLOW_QUERY)).scalar_one()}
+
+    messages = asyncio.Queue()
+    await messages.put({"type": "http.request", "body": b"", "more_body": False})
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def disconnect_soon():
+        await asyncio.sleep(0.1)
+        await messages.put({"type": "http.disconnect"})
+
+    scope = {"type": "http", "method": "GET", "path": "/both", "query_string": b"", "headers": [], "root_path": ""}
+    started = time.perf_counter()
+    await asyncio.gather(app(scope, messages.get, send), disconnect_soon())
+    assert time.perf_counter() - started < 2
+    assert sent[0]["status"] == 504
+    assert len(issued) == 2 and all(deadline.expired for deadline in issued)
+    assert len(watchers) == 1 and watchers[0].disconnected
+    assert all(pool_stats(engine)["in_use"] == 0 for engine in engines)
+    for engine in engines:
+        await engine.dispose()
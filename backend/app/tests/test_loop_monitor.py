@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import LoopLagMonitor
+
+
+def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_lag_is_measured_and_blocking_stack_captured():
+    monitor = LoopLagMonitor(interval=0.01, threshold_ms=50, capture_stacks=True, max_stacks=2)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        block_the_loop(0.2)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["samples"] >= 3
+    assert snapshot["lag_ms"]["max"] >= 150 and snapshot["stalls"] == 1
+    assert len(snapshot["stacks"]) == 1
+    assert snapshot["stacks"][0]["blocked_ms"] >= 50
+    assert any("block_the_loop" in line for line in snapshot["stacks"][0]["stack"])
+
+
+@pytest.mark.asyncio
+async def test_loop_endpoint_is_exposed(client):
+    response = await client.get("/api/v1/loop")
+    assert response.status_code == 200
+    assert set(response.json()["lag_ms"]) == {"p50", "p99", "max"}
+    assert response.json()["stacks"] is None
@@ -1,8 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
 
-from app.services.products.service import build_filters
+import pytest
+
+from app.models.product import Product
+from app.schemas.product import BulkDeleteRequest
+from app.services.products import service
+from app.services.products.query import bind_values, list_statements, parse_filters, parse_sort, shape_of
+from app.services.products.service import (
+    build_filters,
+    bulk_delete_products,
+    list_flights,
+    list_products_json,
+    prepare_pagination_params,
+    product_facets,
+)
 
 
 def test_build_filters_handles_contains():
@@ -15,3 +32,77 @@ def test_build_filters_handles_date_range():
     end = datetime(2023, 1, 31)
     filters = list(build_filters({"created_from": start, "created_to": end}))
     assert len(filters) == 1
+
+
+def test_list_statements_are_cached_per_shape():
+    first = parse_filters('[{"field": "price", "operator": "in", "value": [1, 2]}, {"field": "title", "operator": "contains", "value": "a%"}]')
+    second = parse_filters('[{"field": "price", "operator": "in", "value": [3]}, {"field": "title", "operator": "contains", "value": "b"}]')
+    order = parse_sort("price,desc")
+    assert list_statements(shape_of(first, order)) is list_statements(shape_of(second, order))
+    assert bind_values(first) == {"f0": [Decimal("1"), Decimal("2")], "f1": "%a\\%%"}
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_list_queries_are_coalesced(db_session):
+    pagination = prepare_pagination_params(page=1, size=5, limit=None, offset=None)
+    arguments = dict(db=db_session, pagination=pagination, sort_by="price", sort_order="desc", filters={"in_stock": True})
+    before = dict(list_flights.snapshot())
+
+    bodies = await asyncio.gather(*(list_products_json(**arguments) for _ in range(4)))
+    after = list_flights.snapshot()
+    assert len(set(bodies)) == 1 and json.loads(bodies[0])["size"] == 5
+    assert after["executions"] - before["executions"] == 1
+    assert after["coalesced"] - before["coalesced"] == 3
+
+    # Callers that saw different data versions never share a body.
+    await asyncio.gather(list_products_json(**arguments, etag='W/"a"'), list_products_json(**arguments, etag='W/"b"'))
+    assert list_flights.snapshot()["executions"] - after["executions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_facet_cache_sees_writes_from_other_workers(db_session):
+    marker = f"Facets {uuid4().hex[:8]}"
+    db_session.add(Product(title=marker, price=Decimal("10.00"), in_stock=True))
+    await db_session.commit()
+    assert (await product_facets(db=db_session, filters={"title_eq": marker})).total == 1
+
+    # Written straight to the database, as another worker would: no in-process invalidation.
+    db_session.add(Product(title=marker, price=Decimal("20.00"), in_stock=False))
+    await db_session.commit()
+    facets = await product_facets(db=db_session, filters={"title_eq": marker})
+    assert facets.total == 2
+    assert {facet.value: facet.count for facet in facets.in_stock} == {True: 1, False: 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_failure_still_publishes_committed_chunks(db_session, monkeypatch):
+    products = [Product(title=f"Bulk {uuid4().hex[:8]}", price=Decimal("1.00"), in_stock=True) for _ in range(4)]
+    db_session.add_all(products)
+    await db_session.commit()
+    ids = sorted(product.id for product in products)
+
+    events = []
+
+    async def record(event, data):
+        events.append((event, data))
+
+    execute, deletes = db_session.execute, 0
+
+    async def fail_second_chunk(statement, *args, **kwargs):
+        nonlocal deletes
+        if statement.is_delete:
+            deletes += 1
+            if deletes == 2:
+                raise RuntimeError("connection lost")
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(service, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(service, "broadcast_product_event", record)
+    monkeypatch.setattr(db_session, "execute", fail_second_chunk)
+    generation = service._write_generation
+    with pytest.raises(RuntimeError):
+        await bulk_delete_products(db_session, BulkDeleteRequest(ids=ids))
+    await db_session.rollback()
+
+    assert service._write_generation == generation + 1
+    assert events == [("product.bulk_deleted", {"ids": ids[:2]})]
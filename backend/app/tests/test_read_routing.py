@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from app.db import session as session_module
+from app.db.session import STICKY_COOKIE, STICKY_HEADER, ReadRouter, sticky_to_primary
+
+
+def make_request(headers: dict[str, str]) -> Request:
+    raw = [(key.lower().encode(), value.encode()) for key, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+async def database_name(factory) -> str:
+    async with factory() as session:
+        return (await session.execute(text("SELECT name FROM marker"))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_until_sticky_or_down(tmp_path):
+    engines = {}
+    for name in ("primary", "replica"):
+        engines[name] = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        async with engines[name].begin() as conn:
+            await conn.execute(text("CREATE TABLE marker (name TEXT)"))
+            await conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    router = ReadRouter(engines["primary"], engines["replica"], retry_seconds=60)
+
+    factory, is_replica = await router.factory_for(sticky=False)
+    assert is_replica and await database_name(factory) == "replica"
+    factory, is_replica = await router.factory_for(sticky=True)
+    assert not is_replica and await database_name(factory) == "primary"
+
+    router.mark_down(RuntimeError("replica lost"))
+    factory, is_replica = await router.factory_for(sticky=False)
+    assert not is_replica and await database_name(factory) == "primary"
+
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReadRouter(engines["primary"], broken, retry_seconds=60)
+    factory, is_replica = await router.factory_for(sticky=False)
+    assert not is_replica and router.down_until > time.monotonic()
+    for engine in (*engines.values(), broken):
+        await engine.dispose()
+
+
+class HangingEngine:
+    """Replica whose host never answers the connect."""
+
+    @asynccontextmanager
+    async def connect(self):
+        await asyncio.Event().wait()
+        yield
+
+
+@pytest.mark.asyncio
+async def test_replica_probe_timeout_covers_connect(monkeypatch, tmp_path):
+    monkeypatch.setattr(session_module, "REPLICA_PROBE_TIMEOUT", 0.05)
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary'}.db")
+    router = ReadRouter(primary, HangingEngine(), retry_seconds=60)
+    factory, is_replica = await asyncio.wait_for(router.factory_for(sticky=False), 1)
+    assert not is_replica and router.down_until > time.monotonic()
+    await primary.dispose()
+
+
+def test_sticky_deadline_from_header_or_cookie():
+    future = f"{time.time() + 30:.3f}"
+    assert sticky_to_primary(make_request({STICKY_HEADER: future}))
+    assert sticky_to_primary(make_request({"cookie": f"{STICKY_COOKIE}={future}"}))
+    assert not sticky_to_primary(make_request({STICKY_HEADER: f"{time.time() - 1:.3f}"}))
+    assert not sticky_to_primary(make_request({STICKY_HEADER: "soon"}))
+    assert not sticky_to_primary(make_request({}))
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.seed import DatasetSpec, build_price, build_stock_flag, generate_rows, seed_products
+from app.models.product import Product
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def test_default_spec_matches_demo_catalogue():
+    rows = generate_rows(DatasetSpec(), 0, 250, NOW)
+    assert [row[0] for row in rows[:2]] == ["Demo Product 001", "Demo Product 002"]
+    assert [row[1] for row in rows] == [build_price(index) for index in range(250)]
+    assert [row[2] for row in rows] == [build_stock_flag(index) for index in range(250)]
+
+
+def test_synthetic_rows_are_seeded_and_bounded():
+    spec = DatasetSpec(rows=5000, seed=7, price_distribution="lognormal", in_stock_ratio=0.8, days=30)
+    rows = generate_rows(spec, 1000, 3000, NOW)
+    assert rows == generate_rows(spec, 1000, 3000, NOW)
+    assert rows != generate_rows(DatasetSpec(**{**spec.__dict__, "seed": 8}), 1000, 3000, NOW)
+    assert all(spec.price_min <= price <= spec.price_max for _, price, *_ in rows)
+    assert 0.75 < sum(row[2] for row in rows) / len(rows) < 0.85
+    assert all(NOW.replace(day=1, month=5) <= created <= updated <= NOW for *_, created, updated in rows)
+
+
+@pytest.mark.asyncio
+async def test_seed_products_bulk_loads_in_batches(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'seed.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    spec = DatasetSpec(rows=300, seed=3, price_distribution="uniform", in_stock_ratio=0.5, days=10)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession)() as session:
+        assert await seed_products(session, spec, batch_rows=64) == 300
+        await session.commit()
+        assert await seed_products(session, spec, batch_rows=64) == 0
+        count, low, high = (await session.execute(select(func.count(), func.min(Product.price), func.max(Product.price)))).one()
+        assert count == 300 and Decimal("50.00") <= low <= high <= Decimal("1500.00")
+        last = (await session.execute(select(Product).order_by(Product.id.desc()).limit(1))).scalar_one()
+        assert last.title == "Demo Product 300" and isinstance(last.created_at, datetime)
+    await engine.dispose()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution_and_its_errors():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def query() -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "page"
+
+    waiting = [asyncio.create_task(flights.do("key", query)) for _ in range(5)]
+    await asyncio.sleep(0)
+    other = asyncio.create_task(flights.do("other", query))
+    release.set()
+    assert await asyncio.gather(*waiting, other) == ["page"] * 6
+    assert calls == 2
+    assert flights.snapshot() == {"inflight": 0, "executions": 2, "coalesced": 4, "coalesced_ratio": 0.6667}
+
+    async def failing() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow() -> str:
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("key", slow))
+    await started.wait()
+    follower = asyncio.create_task(flights.do("key", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "done"
+    assert flights.leaders == 2 and flights.followers == 0
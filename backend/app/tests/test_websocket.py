@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import UserRole
+from app.tests.utils.simple_client import AsyncClient
+from app.utils import cbor
+
+
+async def open_socket(query: str, subprotocols: list[str]) -> tuple[asyncio.Queue, asyncio.Queue, asyncio.Task, dict]:
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": "/api/v1/ws/products",
+        "raw_path": b"/api/v1/ws/products",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+        "subprotocols": subprotocols,
+    }
+    incoming: asyncio.Queue = asyncio.Queue()
+    outgoing: asyncio.Queue = asyncio.Queue()
+    await incoming.put({"type": "websocket.connect"})
+    task = asyncio.create_task(app(scope, incoming.get, outgoing.put))
+    accepted = await asyncio.wait_for(outgoing.get(), timeout=5)
+    return incoming, outgoing, task, accepted
+
+
+def test_cbor_round_trip():
+    value = {
+        "id": 7,
+        "neg": -300,
+        "big": 2**40,
+        "price": 1.5,
+        "pi": 3.141592653589793,
+        "ok": True,
+        "none": None,
+        "title": "Телефон",
+        "raw": b"\x00\xff",
+        "items": [1, "a", False],
+    }
+    assert cbor.loads(cbor.dumps(value)) == value
+    assert cbor.dumps(1.5) == b"\xfa\x3f\xc0\x00\x00"
+    assert cbor.loads(cbor.dumps({"price": Decimal("10.50")})) == {"price": "10.50"}
+    with pytest.raises(ValueError):
+        cbor.loads(cbor.dumps(1) + b"\x00")
+
+
+@pytest.mark.asyncio
+async def test_update_event_is_a_cbor_diff(client: AsyncClient, seeded_admin):
+    headers = {"Authorization": f"Bearer {create_access_token('admin@test.kz', UserRole.admin)}"}
+    created = await client.post(
+        "/api/v1/products/", json={"title": f"WS {uuid4()}", "price": "10.00", "in_stock": True}, headers=headers
+    )
+    product = created.json()
+
+    token = create_access_token("admin@test.kz", UserRole.admin)
+    incoming, outgoing, task, accepted = await open_socket(f"token={token}", ["products.bogus", "products.cbor"])
+    assert accepted == {"type": "websocket.accept", "subprotocol": "products.cbor", "headers": []}
+    try:
+        await client.put(f"/api/v1/products/{product['id']}", json={"price": "12.50"}, headers=headers)
+        message = await asyncio.wait_for(outgoing.get(), timeout=5)
+    finally:
+        await incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await task
+
+    event = cbor.loads(message["bytes"])
+    assert event["event"] == "product.updated"
+    data = event["data"]
+    assert data["id"] == product["id"]
+    assert data["changes"] == {"price": "12.50"}
+    assert data["version"] >= data["base_version"] > 0
+
+
+@pytest.mark.asyncio
+async def test_json_is_the_default_encoding(client: AsyncClient, seeded_admin):
+    token = create_access_token("admin@test.kz", UserRole.admin)
+    incoming, outgoing, task, accepted = await open_socket(f"token={token}&encoding=nope", [])
+    assert accepted["subprotocol"] is None
+    try:
+        await client.post(
+            "/api/v1/products/",
+            json={"title": "WS json", "price": "3.00", "in_stock": True},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        message = await asyncio.wait_for(outgoing.get(), timeout=5)
+    finally:
+        await incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await task
+
+    event = json.loads(message["text"])
+    assert event["event"] == "product.created"
+    assert event["data"]["title"] == "WS json"
+    assert isinstance(event["data"]["version"], int)
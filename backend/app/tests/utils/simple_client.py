@@ -19,6 +19,10 @@ class Response:
     def text(self) -> str:
         return self._body.decode()
 
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {key.decode().lower(): value.decode() for key, value in self._headers.items()}
+
 
 class AsyncClient:
     def __init__(self, app, base_url: str = "http://testserver") -> None:
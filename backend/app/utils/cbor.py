@@ -0,0 +1,117 @@
+"""Minimal CBOR (RFC 8949) codec for JSON-like values.
+
+Covers what the WebSocket events carry: None, bools, integers, floats,
+strings, bytes, lists and string-keyed maps. Other values are encoded as
+``str(value)``, like the JSON encoder's ``default=str``.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Any
+
+
+def _head(major: int, length: int) -> bytes:
+    if length < 24:
+        return bytes((major << 5 | length,))
+    if length < 0x100:
+        return bytes((major << 5 | 24, length))
+    if length < 0x10000:
+        return bytes((major << 5 | 25,)) + struct.pack(">H", length)
+    if length < 0x100000000:
+        return bytes((major << 5 | 26,)) + struct.pack(">I", length)
+    return bytes((major << 5 | 27,)) + struct.pack(">Q", length)
+
+
+def _encode(value: Any, out: bytearray) -> None:
+    if value is None:
+        out.append(0xF6)
+    elif value is True:
+        out.append(0xF5)
+    elif value is False:
+        out.append(0xF4)
+    elif isinstance(value, int):
+        out += _head(0, value) if value >= 0 else _head(1, -1 - value)
+    elif isinstance(value, float):
+        single = struct.pack(">f", value)
+        if struct.unpack(">f", single)[0] == value:
+            out += b"\xfa" + single
+        else:
+            out += b"\xfb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        encoded = value.encode()
+        out += _head(3, len(encoded)) + encoded
+    elif isinstance(value, (bytes, bytearray)):
+        out += _head(2, len(value)) + value
+    elif isinstance(value, (list, tuple)):
+        out += _head(4, len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += _head(5, len(value))
+        for key, item in value.items():
+            _encode(key if isinstance(key, str) else str(key), out)
+            _encode(item, out)
+    else:
+        _encode(str(value), out)
+
+
+def dumps(value: Any) -> bytes:
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+
+def _decode(data: bytes, offset: int) -> tuple[Any, int]:
+    initial = data[offset]
+    major, info = initial >> 5, initial & 0x1F
+    offset += 1
+    if major == 7:
+        if info == 20:
+            return False, offset
+        if info == 21:
+            return True, offset
+        if info in (22, 23):
+            return None, offset
+        if info == 25:
+            return struct.unpack_from(">e", data, offset)[0], offset + 2
+        if info == 26:
+            return struct.unpack_from(">f", data, offset)[0], offset + 4
+        if info == 27:
+            return struct.unpack_from(">d", data, offset)[0], offset + 8
+        raise ValueError(f"unsupported CBOR simple value {info}")
+    if info < 24:
+        length = info
+    elif info <= 27:
+        size = 1 << (info - 24)
+        length = int.from_bytes(data[offset : offset + size], "big")
+        offset += size
+    else:
+        raise ValueError("indefinite-length CBOR items are not supported")
+    if major == 0:
+        return length, offset
+    if major == 1:
+        return -1 - length, offset
+    if major == 2:
+        return data[offset : offset + length], offset + length
+    if major == 3:
+        return data[offset : offset + length].decode(), offset + length
+    if major == 4:
+        items = []
+        for _ in range(length):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if major == 5:
+        mapping = {}
+        for _ in range(length):
+            key, offset = _decode(data, offset)
+            mapping[key], offset = _decode(data, offset)
+        return mapping, offset
+    raise ValueError(f"unsupported CBOR major type {major}")
+
+
+def loads(data: bytes) -> Any:
+    value, offset = _decode(data, 0)
+    if offset != len(data):
+        raise ValueError("trailing bytes after CBOR item")
+    return value
@@ -0,0 +1,60 @@
+"""HTTP validators (ETag / Last-Modified) and conditional request checks."""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Mapping
+
+# Authenticated data: caches may keep it per user but must revalidate each time.
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class Validator:
+    """Weak ETag plus optional Last-Modified for one representation."""
+
+    etag: str
+    last_modified: datetime | None = None
+
+    @classmethod
+    def from_parts(cls, *parts: Any, last_modified: datetime | None = None) -> "Validator":
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+        if last_modified is not None and last_modified.tzinfo is None:
+            # Timestamps are stored as naive UTC.
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return cls(etag=f'W/"{digest}"', last_modified=last_modified)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified.astimezone(timezone.utc), usegmt=True)
+        return headers
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request_headers: Mapping[str, str], validator: Validator) -> bool:
+    """True when the client's copy is current (RFC 9110: If-None-Match wins over If-Modified-Since)."""
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _opaque(validator.etag)
+        return any(_opaque(tag) == current for tag in if_none_match.split(","))
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None or validator.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision.
+    return validator.last_modified.replace(microsecond=0) <= since
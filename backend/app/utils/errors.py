@@ -10,6 +10,8 @@ class ErrorCodes:
     AUTH_FORBIDDEN = "AUTH_FORBIDDEN"
     PRODUCT_NOT_FOUND = "PRODUCT_NOT_FOUND"
     VALIDATION_ERROR = "VALIDATION_ERROR"
+    SERVICE_OVERLOADED = "SERVICE_OVERLOADED"
+    DEADLINE_EXCEEDED = "DEADLINE_EXCEEDED"
 
 
 def http_error(status_code: int, error_code: str, message: str, details: dict | None = None) -> HTTPException:
@@ -26,3 +28,12 @@ def forbidden(message: str = "Недостаточно прав") -> HTTPExcepti
 
 def not_found(message: str, error_code: str) -> HTTPException:
     return http_error(status.HTTP_404_NOT_FOUND, error_code, message)
+
+
+def deadline_exceeded(budget_ms: float) -> HTTPException:
+    return http_error(
+        status.HTTP_504_GATEWAY_TIMEOUT,
+        ErrorCodes.DEADLINE_EXCEEDED,
+        "Превышено время выполнения запроса",
+        {"deadline_ms": budget_ms},
+    )
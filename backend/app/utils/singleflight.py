@@ -0,0 +1,66 @@
+"""Coalescing of identical concurrent calls."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run one call per key at a time; callers arriving meanwhile await its result.
+
+    The first caller for a key (the leader) runs ``fn``; callers with the same
+    key that arrive before it finishes (followers) get the same result or
+    exception. If the leader is cancelled, e.g. because its client went away,
+    the next waiting caller runs ``fn`` itself instead of failing.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; take over instead.
+                continue
+            self.followers += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        # Followers may all be gone by the time a failure is set.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.leaders + self.followers
+        return {
+            "inflight": len(self._inflight),
+            "executions": self.leaders,
+            "coalesced": self.followers,
+            "coalesced_ratio": round(self.followers / calls, 4) if calls else 0.0,
+        }
@@ -2,16 +2,36 @@
 from __future__ import annotations
 
 import asyncio
+import gc
 import json
+import logging
+import mmap
+import multiprocessing
+import os
+import random
+import struct
+import sys
 import threading
-from datetime import datetime, timedelta
-from typing import Any, Iterable
-
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+from operator import attrgetter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import pydantic_core
 from fastapi import Body, FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
 app = FastAPI(title="FastAPI CRUD Booster", version="0.6.1")
+logger = logging.getLogger(__name__)
 
 
 class Product(BaseModel):
@@ -63,6 +83,31 @@ class PaginatedProducts(BaseModel):
     q: str | None = None
 
 
+class FacetCount(BaseModel):
+    """Number of matching products with one field value."""
+
+    value: Any
+    count: int
+
+
+class HistogramBucket(BaseModel):
+    """Matching products with ``start <= value < end`` (the last bucket includes ``end``)."""
+
+    start: float
+    end: float
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Value counts and histograms over the products matching a list query."""
+
+    total: int
+    counts: dict[str, list[FacetCount]]
+    histograms: dict[str, list[HistogramBucket]]
+    filters: list[dict[str, Any]]
+    q: str | None = None
+
+
 FIELD_META = {
     "id": {"type": int, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between", "in"}},
     "title": {"type": str, "ops": {"eq", "neq", "contains", "startswith", "endswith", "in"}},
@@ -75,11 +120,1294 @@ FIELD_META = {
     "updated_at": {"type": datetime, "ops": {"eq", "neq", "gt", "gte", "lt", "lte", "between"}},
 }
 SEARCH_FIELDS = ("title", "description", "category")
+SEARCH_WEIGHTS = {"title": 3.0, "category": 2.0, "description": 1.0}
+RELEVANCE_SORT = "relevance"
 DEFAULT_SORT = "id,asc"
 
-_DATA: list[dict[str, Any]] = []
+DATA_DIR = os.getenv("BOOSTER_DATA_DIR")
+FSYNC_POLICY = os.getenv("BOOSTER_FSYNC", "group")
+GROUP_COMMIT_MS = float(os.getenv("BOOSTER_GROUP_COMMIT_MS", "5"))
+SNAPSHOT_EVERY = int(os.getenv("BOOSTER_SNAPSHOT_EVERY", "50000"))
+QUERY_CACHE_BYTES = int(os.getenv("BOOSTER_QUERY_CACHE_BYTES", str(64 * 2**20)))
+POOL_WORKERS = int(os.getenv("BOOSTER_POOL_WORKERS", "0"))
+POOL_MIN_ROWS = int(os.getenv("BOOSTER_POOL_MIN_ROWS", "200000"))
+FACET_COUNT_FIELDS = ("category", "available")
+FACET_HISTOGRAM_FIELDS = ("price", "stock")
+FACET_CACHE_ENTRIES = int(os.getenv("BOOSTER_FACET_CACHE_ENTRIES", "256"))
+CATALOGUE_DIR = os.getenv("BOOSTER_CATALOGUE")
+# 0 keeps the 25 demo rows; otherwise startup generates this many rows from BOOSTER_SEED.
+SEED_ROWS = int(os.getenv("BOOSTER_SEED_ROWS", "0"))
+SEED = int(os.getenv("BOOSTER_SEED", "0"))
+SEED_CATEGORIES = ("Electronics", "Accessories", "Smartphones", "Wearables", "Audio", "Tablets")
+
+_EPOCH = datetime(1970, 1, 1)
+_TICK = timedelta(microseconds=1)
+
+
+def _to_ticks(value: datetime) -> int:
+    """Naive-UTC datetime -> integer microseconds since the Unix epoch."""
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _TICK
+
+
+def _from_ticks(ticks: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ticks)
+
+
+class ProductRow:
+    """Storage record for one product.
+
+    Slotted instead of a dict, with interned categories and timestamps kept as
+    epoch microseconds; rows become :class:`Product` only when returned.  The
+    row's JSON encoding is cached on first use; updates publish a new row, so
+    the cache never goes stale.
+    """
+
+    FIELDS = ("id", "title", "category", "price", "stock", "available", "description", "created_us", "updated_us")
+    __slots__ = FIELDS + ("_json",)
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        category: str,
+        price: float,
+        stock: int,
+        available: bool,
+        description: str | None,
+        created_us: int,
+        updated_us: int,
+    ) -> None:
+        self.id = id
+        self.title = title
+        self.category = sys.intern(category)
+        self.price = price
+        self.stock = stock
+        self.available = available
+        self.description = description
+        self.created_us = created_us
+        self.updated_us = updated_us
+        self._json: bytes | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ProductRow:
+        return cls(
+            data["id"],
+            data["title"],
+            data["category"],
+            data["price"],
+            data["stock"],
+            data["available"],
+            data.get("description"),
+            _to_ticks(data["created_at"]),
+            _to_ticks(data["updated_at"]),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "category": self.category,
+            "price": self.price,
+            "stock": self.stock,
+            "available": self.available,
+            "description": self.description,
+            "created_at": _from_ticks(self.created_us),
+            "updated_at": _from_ticks(self.updated_us),
+        }
+
+    def to_product(self) -> Product:
+        return Product(**self.as_dict())
+
+    def to_json(self) -> bytes:
+        """Encoded :class:`Product` JSON, cached on the row."""
+
+        if self._json is None:
+            self._json = _dumps(self.as_dict())
+        return self._json
+
+    def copy(self) -> ProductRow:
+        return ProductRow(*(getattr(self, name) for name in self.FIELDS))
+
+
+def _dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON matching what the Pydantic response models emit.
+
+    Goes through pydantic-core's serializer, not :mod:`json`: the two format
+    floats differently (``1e-07`` vs ``1e-7``).
+    """
+
+    return pydantic_core.to_json(value)
+
+
+# Public field name -> ProductRow attribute, for fields stored in another form.
+ROW_ATTRS = {"created_at": "created_us", "updated_at": "updated_us"}
+
+
+class Snapshot:
+    """Immutable, versioned view of the dataset.
+
+    Readers grab the current instance and iterate it without locking or
+    copying.  Rows live in a two-level tree of tuples: pages of ``CHUNK``
+    chunks of ``CHUNK`` slots.  A write copies one chunk, one page and the
+    (n / CHUNK**2 long) page directory, then publishes a new instance, so it
+    stays O(CHUNK) instead of O(n).  Rows are never mutated once published.
+
+    Slots are stable until compaction: ``ids`` maps product id -> slot and a
+    deleted row leaves a ``None`` tombstone.  The map is shared by every
+    version between two compactions and is only ever extended, so each
+    version resolves ids against its own chunks.
+    """
+
+    CHUNK = 256
+    COMPACT_RATIO = 0.25
+    __slots__ = ("version", "pages", "size", "slots", "ids")
+
+    def __init__(self, version: int, pages: tuple[tuple[tuple[ProductRow | None, ...], ...], ...], size: int, slots: int, ids: dict[int, int]) -> None:
+        self.version = version
+        self.pages = pages
+        self.size = size
+        self.slots = slots
+        self.ids = ids
+
+    @classmethod
+    def build(cls, rows: Iterable[ProductRow], version: int = 0) -> Snapshot:
+        items = list(rows)
+        step = cls.CHUNK
+        chunks = [tuple(items[i : i + step]) for i in range(0, len(items), step)]
+        pages = tuple(tuple(chunks[i : i + step]) for i in range(0, len(chunks), step))
+        return cls(version, pages, len(items), len(items), {row.id: slot for slot, row in enumerate(items)})
+
+    def __iter__(self) -> Iterator[ProductRow]:
+        return filter(None, chain.from_iterable(chain.from_iterable(self.pages)))
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def tombstones(self) -> int:
+        return self.slots - self.size
+
+    def needs_compaction(self) -> bool:
+        return self.tombstones >= self.CHUNK and self.tombstones >= self.slots * self.COMPACT_RATIO
+
+    def locate(self, product_id: int) -> int | None:
+        slot = self.ids.get(product_id)
+        if slot is None or slot >= self.slots or self.row_at(slot) is None:
+            return None
+        return slot
+
+    def get(self, product_id: int) -> ProductRow | None:
+        slot = self.locate(product_id)
+        return None if slot is None else self.row_at(slot)
+
+    def rows_for(self, product_ids: Iterable[int]) -> list[ProductRow]:
+        return [row for row in map(self.get, product_ids) if row is not None]
+
+    def row_at(self, slot: int) -> ProductRow | None:
+        page_no, rest = divmod(slot, self.CHUNK * self.CHUNK)
+        chunk_no, offset = divmod(rest, self.CHUNK)
+        return self.pages[page_no][chunk_no][offset]
+
+    def append(self, row: ProductRow) -> Snapshot:
+        pages = self.pages
+        if self.slots % (self.CHUNK * self.CHUNK) == 0:
+            pages = pages + (((row,),),)
+        elif self.slots % self.CHUNK == 0:
+            pages = pages[:-1] + (pages[-1] + ((row,),),)
+        else:
+            page = pages[-1]
+            pages = pages[:-1] + (page[:-1] + (page[-1] + (row,),),)
+        self.ids[row.id] = self.slots
+        return Snapshot(self.version + 1, pages, self.size + 1, self.slots + 1, self.ids)
+
+    def replace(self, slot: int, row: ProductRow) -> Snapshot:
+        return self._put(slot, row, self.size)
+
+    def remove(self, slot: int) -> Snapshot:
+        return self._put(slot, None, self.size - 1)
+
+    def compacted(self) -> Snapshot:
+        """Same rows in the same order without tombstones, with a fresh id map."""
+
+        return Snapshot.build(self, self.version)
+
+    def _put(self, slot: int, row: ProductRow | None, size: int) -> Snapshot:
+        page_no, rest = divmod(slot, self.CHUNK * self.CHUNK)
+        chunk_no, offset = divmod(rest, self.CHUNK)
+        page = self.pages[page_no]
+        chunk = page[chunk_no]
+        chunk = chunk[:offset] + (row,) + chunk[offset + 1 :]
+        page = page[:chunk_no] + (chunk,) + page[chunk_no + 1 :]
+        pages = self.pages[:page_no] + (page,) + self.pages[page_no + 1 :]
+        return Snapshot(self.version + 1, pages, size, self.slots, self.ids)
+
+
+_SNAPSHOT = Snapshot.build(())
+
+
+class QueryCache:
+    """LRU of ordered result ids per normalized query, bounded by a byte budget.
+
+    Entries belong to one dataset generation (``Snapshot.version``); the first
+    lookup for a newer generation drops everything.  An entry may hold only a
+    prefix of the ordering (pooled queries return the first ``limit`` ids) and
+    then serves pages inside that prefix.  Used from the event loop only.
+    """
+
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget = budget_bytes
+        self.generation = -1
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[Any, ...], tuple[array, int]] = OrderedDict()
+
+    def get(self, key: tuple[Any, ...], generation: int, needed: int) -> tuple[array, int] | None:
+        self._sync(generation)
+        entry = self._entries.get(key)
+        if entry is None or len(entry[0]) < min(needed, entry[1]):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple[Any, ...], generation: int, ids: array, total: int) -> None:
+        self._sync(generation)
+        if generation != self.generation:
+            return
+        cost = self._cost(ids)
+        if cost > self.budget:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.used -= self._cost(previous[0])
+        while self._entries and self.used + cost > self.budget:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.used -= self._cost(evicted)
+        self._entries[key] = (ids, total)
+        self.used += cost
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.used = 0
+
+    def _sync(self, generation: int) -> None:
+        if generation > self.generation:
+            self.clear()
+            self.generation = generation
+
+    def _cost(self, ids: array) -> int:
+        return len(ids) * ids.itemsize + self.ENTRY_OVERHEAD
+
+
+_QUERY_CACHE = QueryCache(QUERY_CACHE_BYTES)
+# Encoded facet responses for the current ``Snapshot.version`` only.
+_FACET_CACHE: OrderedDict[tuple[Any, ...], bytes] = OrderedDict()
+_FACET_VERSION = -1
+_QUERY_POOL: QueryPool | None = None
+
+# Serialises writers only; readers just load ``_SNAPSHOT``.
 _LOCK = threading.Lock()
 _NEXT_ID = 1
+# Ids written while a background compaction is running; ``None`` otherwise.
+_DIRTY: set[int] | None = None
+_COMPACTION: asyncio.Task[None] | None = None
+_HEAP_FROZEN = False
+
+
+class TrigramIndex:
+    """Inverted trigram index over ``SEARCH_FIELDS``.
+
+    Posting lists are sorted ``array('q')`` of product ids (8 bytes per entry
+    instead of ~40 for a ``set``).  Ids are issued in increasing order, so
+    inserts are almost always appends; re-indexing after an update only touches
+    the trigrams that actually changed.
+    """
+
+    GRAM = 3
+    # Intersecting with a posting list much larger than the current candidate
+    # set costs more than verifying the candidates directly.
+    INTERSECT_RATIO = 16
+
+    def __init__(self) -> None:
+        self._postings: dict[str, array] = {}
+
+    @classmethod
+    def grams(cls, text: str) -> set[str]:
+        lowered = text.lower()
+        return {lowered[i : i + cls.GRAM] for i in range(len(lowered) - cls.GRAM + 1)}
+
+    @classmethod
+    def row_grams(cls, row: ProductRow) -> set[str]:
+        result: set[str] = set()
+        for name in SEARCH_FIELDS:
+            text = getattr(row, name)
+            if isinstance(text, str):
+                result |= cls.grams(text)
+        return result
+
+    def rebuild(self, rows: Iterable[ProductRow]) -> None:
+        postings: dict[str, array] = {}
+        for row in sorted(rows, key=lambda item: item.id):
+            product_id = row.id
+            for gram in self.row_grams(row):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("q")
+                posting.append(product_id)
+        self._postings = postings
+
+    def add(self, row: ProductRow) -> None:
+        self._insert(row.id, self.row_grams(row))
+
+    def remove(self, row: ProductRow) -> None:
+        self._delete(row.id, self.row_grams(row))
+
+    def replace(self, old: ProductRow, new: ProductRow) -> None:
+        before, after = self.row_grams(old), self.row_grams(new)
+        self._delete(old.id, before - after)
+        self._insert(new.id, after - before)
+
+    def lookup(self, needle: str) -> set[int] | None:
+        """Return candidate ids for ``needle`` or ``None`` when it is too short to index."""
+
+        grams = self.grams(needle)
+        if not grams:
+            return None
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return set()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if len(posting) > len(candidates) * self.INTERSECT_RATIO:
+                break
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def memory_usage(self) -> int:
+        """Approximate index footprint in bytes (posting buffers plus dict)."""
+
+        total = sys.getsizeof(self._postings)
+        for gram, posting in self._postings.items():
+            total += sys.getsizeof(gram) + sys.getsizeof(posting)
+        return total
+
+    def _insert(self, product_id: int, grams: Iterable[str]) -> None:
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                self._postings[gram] = array("q", (product_id,))
+            elif not posting or posting[-1] < product_id:
+                posting.append(product_id)
+            else:
+                pos = bisect_left(posting, product_id)
+                if pos == len(posting) or posting[pos] != product_id:
+                    posting.insert(pos, product_id)
+
+    def _delete(self, product_id: int, grams: Iterable[str]) -> None:
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            pos = bisect_left(posting, product_id)
+            if pos < len(posting) and posting[pos] == product_id:
+                del posting[pos]
+            if not posting:
+                del self._postings[gram]
+
+
+_SEARCH_INDEX = TrigramIndex()
+
+
+# id, price, stock, created, updated, available, has_description, then
+# (offset, length) of title/category/description in the string heap.
+_ROW = struct.Struct("<qdqqq??6xIIIIII")
+_STRING_FIELDS = ("title", "category", "description")
+
+
+def _encode_rows(rows: Iterable[ProductRow]) -> tuple[bytearray, bytearray]:
+    """Pack rows into a fixed-width record table plus a UTF-8 string heap."""
+
+    table = bytearray()
+    heap = bytearray()
+    shared: dict[str, tuple[int, int]] = {}
+    for row in rows:
+        refs: list[int] = []
+        for name in _STRING_FIELDS:
+            text = getattr(row, name)
+            if name == "category" and text in shared:
+                refs.extend(shared[text])
+                continue
+            data = text.encode() if text is not None else b""
+            ref = (len(heap), len(data))
+            heap += data
+            if name == "category":
+                shared[text] = ref
+            refs.extend(ref)
+        table += _ROW.pack(
+            row.id,
+            row.price,
+            row.stock,
+            row.created_us,
+            row.updated_us,
+            row.available,
+            row.description is not None,
+            *refs,
+        )
+    return table, heap
+
+
+def _decode_row(fields: tuple[Any, ...], heap: Any) -> ProductRow:
+    pid, price, stock, created, updated, available, has_desc, t_off, t_len, c_off, c_len, d_off, d_len = fields
+    return ProductRow(
+        pid,
+        str(heap[t_off : t_off + t_len], "utf-8"),
+        sys.intern(str(heap[c_off : c_off + c_len], "utf-8")),
+        price,
+        stock,
+        available,
+        str(heap[d_off : d_off + d_len], "utf-8") if has_desc else None,
+        created,
+        updated,
+    )
+
+
+class SharedExport:
+    """A snapshot packed into one ``SharedMemory`` segment and split into row shards."""
+
+    __slots__ = ("snapshot", "dirty", "shm", "heap_offset", "rows", "shards", "users")
+
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot: Snapshot | None = snapshot
+        # Ids written after ``snapshot`` was taken; workers skip them.
+        self.dirty: set[int] = set()
+        self.shm: shared_memory.SharedMemory | None = None
+        self.heap_offset = 0
+        self.rows = 0
+        self.shards: list[tuple[int, int]] = []
+        self.users = 0
+
+    def pack(self, shards: int) -> None:
+        table, heap = _encode_rows(self.snapshot)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(table) + len(heap)))
+        shm.buf[: len(table)] = table
+        shm.buf[len(table) : len(table) + len(heap)] = heap
+        self.shm, self.heap_offset, self.rows = shm, len(table), len(table) // _ROW.size
+        step = max(1, -(-self.rows // shards))
+        self.shards = [(start, min(start + step, self.rows)) for start in range(0, self.rows, step)]
+        self.snapshot = None
+
+    def close(self) -> None:
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+# Worker-side decoded shard, keyed by segment name (one export at a time).
+_SHARD_ROWS: dict[str, list[ProductRow]] = {}
+
+
+def _load_shard(segment: str, start: int, stop: int, heap_offset: int) -> list[ProductRow]:
+    shm = shared_memory.SharedMemory(name=segment)
+    heap = shm.buf[heap_offset:]
+    try:
+        return [_decode_row(_ROW.unpack_from(shm.buf, slot * _ROW.size), heap) for slot in range(start, stop)]
+    finally:
+        heap.release()
+        shm.close()
+
+
+def _scan_shard(
+    segment: str,
+    start: int,
+    stop: int,
+    heap_offset: int,
+    skip: array,
+    filters: list[dict[str, Any]],
+    needle: str | None,
+    order: list[tuple[str, bool]],
+    limit: int,
+) -> tuple[int, array]:
+    """Worker side of :class:`QueryPool`: match count and first ``limit`` ids of one shard."""
+
+    rows = _SHARD_ROWS.get(segment)
+    if rows is None:
+        _SHARD_ROWS.clear()
+        rows = _SHARD_ROWS[segment] = _load_shard(segment, start, stop, heap_offset)
+    if skip:
+        excluded = set(skip)
+        rows = [row for row in rows if row.id not in excluded]
+    ordered = _apply_sort(_apply_filters(_apply_search(rows, needle), filters), order, needle)
+    return len(ordered), array("q", [row.id for row in ordered[:limit]])
+
+
+class QueryPool:
+    """Evaluate large list queries on worker processes over a shared-memory export.
+
+    The snapshot is packed once (``_ROW`` table plus string heap, as on disk)
+    into a ``SharedMemory`` segment with one contiguous shard per worker.  Each
+    worker decodes its shard on first use and then searches, filters and sorts
+    it per query, returning its match count and first ``limit`` ids.  Since
+    ``_parse_sort`` always ends on ``id`` the order is total, so re-sorting the
+    union of the per-shard heads yields the global head.
+
+    Writes after an export are tracked as dirty ids (see :func:`_touch`):
+    workers skip them and their current rows are evaluated in the parent.  Once
+    the dirty set outgrows ``REEXPORT_RATIO`` a fresh export is packed on a
+    thread while queries keep using the old one.
+    """
+
+    PREFIX = 1000
+    REEXPORT_RATIO = 0.01
+    REEXPORT_MIN = 1024
+
+    def __init__(self, workers: int) -> None:
+        context = multiprocessing.get_context("spawn")
+        self._executors = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(workers)]
+        self._current: SharedExport | None = None
+        self._pending: SharedExport | None = None
+        self._building: asyncio.Future[None] | None = None
+        self._retired: list[SharedExport] = []
+
+    def touch(self, product_id: int) -> None:
+        for export in (self._current, self._pending):
+            if export is not None:
+                export.dirty.add(product_id)
+
+    def invalidate(self) -> None:
+        """Forget every export (the dataset was replaced wholesale)."""
+
+        self._retire(self._current)
+        self._current = self._pending = None
+
+    async def run(
+        self, filters: list[dict[str, Any]], needle: str | None, order: list[tuple[str, bool]], limit: int
+    ) -> tuple[Snapshot, array, int]:
+        while self._current is None:
+            await self._rebuild()
+        export = self._current
+        if self._building is None and len(export.dirty) > max(self.REEXPORT_MIN, export.rows * self.REEXPORT_RATIO):
+            # Background re-export; failures are logged by ``_build_done`` and retried by a later query.
+            self._start_build()
+        # Taken together, without an await in between: ids unchanged since the
+        # export are identical in ``snapshot``; everything else is in ``dirty``.
+        snapshot = _SNAPSHOT
+        dirty = array("q", export.dirty)
+        loop = asyncio.get_running_loop()
+        export.users += 1
+        try:
+            parts = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor, _scan_shard, export.shm.name, start, stop, export.heap_offset, dirty, filters, needle, order, limit
+                    )
+                    for executor, (start, stop) in zip(self._executors, export.shards)
+                )
+            )
+        finally:
+            export.users -= 1
+            self._sweep()
+        changed = _apply_filters(_apply_search(snapshot.rows_for(dirty), needle), filters)
+        heads = snapshot.rows_for(chain.from_iterable(ids for _, ids in parts))
+        ordered = _apply_sort(chain(heads, changed), order, needle)
+        total = sum(count for count, _ in parts) + len(changed)
+        return snapshot, array("q", [row.id for row in ordered[:limit]]), total
+
+    def _rebuild(self) -> asyncio.Future[None]:
+        return asyncio.shield(self._start_build())
+
+    def _start_build(self) -> asyncio.Future[None]:
+        if self._building is None:
+            export = self._pending = SharedExport(_SNAPSHOT)
+            self._building = asyncio.ensure_future(self._build(export))
+            self._building.add_done_callback(self._build_done)
+        return self._building
+
+    @staticmethod
+    def _build_done(task: asyncio.Future[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Query pool export failed", exc_info=task.exception())
+
+    async def _build(self, export: SharedExport) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, export.pack, len(self._executors))
+        except BaseException:
+            if self._pending is export:
+                self._pending = None
+            export.close()
+            raise
+        finally:
+            self._building = None
+        if self._pending is not export:
+            export.close()
+            return
+        self._retire(self._current)
+        self._current, self._pending = export, None
+
+    def _retire(self, export: SharedExport | None) -> None:
+        if export is not None:
+            self._retired.append(export)
+            self._sweep()
+
+    def _sweep(self) -> None:
+        for export in [export for export in self._retired if not export.users]:
+            self._retired.remove(export)
+            export.close()
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for export in (self._current, self._pending, *self._retired):
+            if export is not None:
+                export.close()
+        self._current = self._pending = None
+        self._retired.clear()
+
+
+class WriteAheadStore:
+    """Append-only WAL segments plus periodic compacted snapshots.
+
+    Layout of ``directory``::
+
+        snapshot.bin      header | record table | string heap (see ``_ROW``)
+        wal-00000042.log  [length, crc32, op][payload] ...
+
+    A snapshot names the first WAL segment it does not cover; recovery maps the
+    snapshot and replays the remaining segments, truncating a torn tail.
+
+    ``fsync_policy``:
+        ``always``   every write waits for its own fsync;
+        ``group``    writers wait for a shared fsync issued every ``group_commit_ms``;
+        ``interval`` writers do not wait, fsync runs every ``group_commit_ms``;
+        ``off``      leave flushing to the OS.
+    """
+
+    SNAPSHOT = "snapshot.bin"
+    MAGIC = b"BMSNAP01"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct("<8sIIQQQQ")  # magic, version, crc32, rows, next_id, wal segment, heap size
+    RECORD = struct.Struct("<IIB")  # payload length, crc32(op + payload), op
+    OP_UPSERT = 1
+    OP_DELETE = 2
+    _ID = struct.Struct("<q")
+    POLICIES = ("always", "group", "interval", "off")
+
+    def __init__(self, directory: str | os.PathLike[str], *, fsync_policy: str = "group", group_commit_ms: float = 5.0, snapshot_every: int = 50_000) -> None:
+        if fsync_policy not in self.POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy!r}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync_policy = fsync_policy
+        self.group_commit = group_commit_ms / 1000
+        self.snapshot_every = snapshot_every
+        self._segment = 0
+        self._file: Any = None
+        self._lsn = 0
+        self._synced_lsn = 0
+        self._since_snapshot = 0
+        self._io_lock = threading.Lock()
+        # Segments rotated out but not yet fsynced; the next flush syncs and closes them.
+        self._sealed: list[Any] = []
+        self._pending: asyncio.Future[None] | None = None
+        self._background: asyncio.Task[None] | None = None
+        self._snapshot_task: asyncio.Task[None] | None = None
+
+    # -- recovery -------------------------------------------------------
+    def recover(self) -> tuple[list[ProductRow], int] | None:
+        """Load the snapshot and replay newer segments; ``None`` when the directory is empty."""
+
+        rows: dict[int, ProductRow] = {}
+        next_id = 1
+        first_segment = 0
+        found = False
+        snapshot = self.directory / self.SNAPSHOT
+        if snapshot.exists():
+            loaded, next_id, first_segment = self._load_snapshot(snapshot)
+            rows = {row.id: row for row in loaded}
+            found = True
+        last_segment = first_segment
+        for seq, path in self._segments():
+            if seq < first_segment:
+                path.unlink()
+                continue
+            next_id = self._replay(path, rows, next_id)
+            last_segment = max(last_segment, seq)
+            found = True
+        self._open_segment(last_segment + 1)
+        return (list(rows.values()), next_id) if found else None
+
+    def _segments(self) -> list[tuple[int, Path]]:
+        return sorted((int(path.stem.split("-")[1]), path) for path in self.directory.glob("wal-*.log"))
+
+    def _load_snapshot(self, path: Path) -> tuple[list[ProductRow], int, int]:
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                magic, version, crc, count, next_id, segment, heap_size = self.HEADER.unpack_from(view, 0)
+                if magic != self.MAGIC or version != self.FORMAT_VERSION:
+                    raise RuntimeError(f"Unsupported snapshot format in {path}")
+                start = self.HEADER.size
+                heap_start = start + count * _ROW.size
+                body = view[start : heap_start + heap_size]
+                if zlib.crc32(body) != crc:
+                    raise RuntimeError(f"Snapshot checksum mismatch in {path}")
+                heap = view[heap_start : heap_start + heap_size]
+                rows = [_decode_row(fields, heap) for fields in _ROW.iter_unpack(view[start:heap_start])]
+                body.release()
+                heap.release()
+            finally:
+                view.release()
+        return rows, next_id, segment
+
+    def _replay(self, path: Path, rows: dict[int, ProductRow], next_id: int) -> int:
+        data = path.read_bytes()
+        pos = 0
+        while pos + self.RECORD.size <= len(data):
+            length, crc, op = self.RECORD.unpack_from(data, pos)
+            start = pos + self.RECORD.size
+            payload = data[start : start + length]
+            if len(payload) != length or zlib.crc32(payload, zlib.crc32(bytes((op,)))) != crc:
+                break
+            if op == self.OP_UPSERT:
+                row = _decode_row(_ROW.unpack_from(payload, 0), payload[_ROW.size :])
+                rows[row.id] = row
+                next_id = max(next_id, row.id + 1)
+            elif op == self.OP_DELETE:
+                rows.pop(self._ID.unpack(payload)[0], None)
+            pos = start + length
+        if pos != len(data):
+            os.truncate(path, pos)
+        return next_id
+
+    # -- logging --------------------------------------------------------
+    def _open_segment(self, seq: int) -> None:
+        self._segment = seq
+        self._file = open(self.directory / f"wal-{seq:08d}.log", "ab", buffering=0)
+
+    def _append(self, op: int, payload: bytes) -> int:
+        crc = zlib.crc32(payload, zlib.crc32(bytes((op,))))
+        self._file.write(self.RECORD.pack(len(payload), crc, op) + payload)
+        self._lsn += 1
+        self._since_snapshot += 1
+        return self._lsn
+
+    def log_upsert(self, row: ProductRow) -> int:
+        table, heap = _encode_rows((row,))
+        return self._append(self.OP_UPSERT, bytes(table + heap))
+
+    def log_delete(self, product_id: int) -> int:
+        return self._append(self.OP_DELETE, self._ID.pack(product_id))
+
+    def _fsync(self) -> int:
+        with self._io_lock:
+            target = self._lsn
+            for sealed in self._sealed:
+                os.fsync(sealed.fileno())
+                sealed.close()
+            self._sealed.clear()
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+        self._synced_lsn = max(self._synced_lsn, target)
+        return target
+
+    async def commit(self, lsn: int) -> None:
+        """Return once ``lsn`` is as durable as the policy promises."""
+
+        if lsn <= self._synced_lsn or self.fsync_policy in {"off", "interval"}:
+            if self.fsync_policy == "interval" and self._background is None:
+                self._background = asyncio.get_running_loop().create_task(self._interval_flusher())
+            return
+        loop = asyncio.get_running_loop()
+        if self.fsync_policy == "always":
+            await loop.run_in_executor(None, self._fsync)
+            return
+        if self._pending is None:
+            self._pending = loop.create_future()
+            loop.create_task(self._group_flush(self._pending))
+        await asyncio.shield(self._pending)
+
+    async def _group_flush(self, waiter: asyncio.Future[None]) -> None:
+        try:
+            await asyncio.sleep(self.group_commit)
+            if self._pending is waiter:
+                self._pending = None
+            await asyncio.get_running_loop().run_in_executor(None, self._fsync)
+        except OSError as exc:
+            waiter.set_exception(exc)
+        except BaseException as exc:
+            # Cancelled (e.g. at shutdown) or worse: committers must not wait forever.
+            if self._pending is waiter:
+                self._pending = None
+            waiter.set_exception(exc)
+            raise
+        else:
+            waiter.set_result(None)
+
+    async def _interval_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.group_commit)
+            if self._synced_lsn < self._lsn:
+                await loop.run_in_executor(None, self._fsync)
+
+    # -- snapshots ------------------------------------------------------
+    def snapshot_due(self) -> bool:
+        return self._since_snapshot >= self.snapshot_every and (self._snapshot_task is None or self._snapshot_task.done())
+
+    def rotate(self) -> int:
+        """Seal the current segment and start a new one; returns the first uncovered segment.
+
+        No fsync happens here: the sealed segment is synced by the next
+        :meth:`_fsync`, which :meth:`write_snapshot` runs first.
+        """
+
+        with self._io_lock:
+            self._sealed.append(self._file)
+            self._open_segment(self._segment + 1)
+        self._since_snapshot = 0
+        return self._segment
+
+    def start_snapshot(self, rows: Iterable[ProductRow], next_id: int, segment: int) -> None:
+        loop = asyncio.get_running_loop()
+        self._snapshot_task = loop.create_task(self._snapshot_async(rows, next_id, segment))
+
+    async def _snapshot_async(self, rows: Iterable[ProductRow], next_id: int, segment: int) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.write_snapshot, rows, next_id, segment)
+
+    def write_snapshot(self, rows: Iterable[ProductRow], next_id: int, segment: int) -> None:
+        """Write ``rows`` atomically and drop the WAL segments they cover."""
+
+        self._fsync()
+        table, heap = _encode_rows(rows)
+        crc = zlib.crc32(heap, zlib.crc32(table))
+        header = self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION, crc, len(table) // _ROW.size, next_id, segment, len(heap))
+        target = self.directory / self.SNAPSHOT
+        temp = target.with_suffix(".tmp")
+        with open(temp, "wb") as fh:
+            fh.write(header)
+            fh.write(table)
+            fh.write(heap)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp, target)
+        self._fsync_directory()
+        for seq, path in self._segments():
+            if seq < segment:
+                path.unlink()
+
+    def _fsync_directory(self) -> None:
+        if os.name == "nt":
+            return
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    async def close(self) -> None:
+        if self._background is not None:
+            self._background.cancel()
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        self._fsync()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_STORE: WriteAheadStore | None = None
+# Catalogue mode: ``_CATALOGUE`` in HTTP workers, ``_CATALOGUE_WRITER`` in the writer.
+_CATALOGUE: SharedCatalogue | None = None
+_CATALOGUE_WRITER: CatalogueWriter | None = None
+_FOLLOWER: asyncio.Task[None] | None = None
+
+
+# Catalogue slot: born/dead version and previous slot of the same id, then a
+# ``_ROW`` record whose string refs point into the catalogue heap.
+_SLOT = struct.Struct("<qqq" + _ROW.format[1:])
+_SLOT_ID = 3
+
+
+class CatalogueRow:
+    """Row read in place from the shared catalogue; strings are decoded on access."""
+
+    __slots__ = ("_fields", "_heap")
+
+    def __init__(self, fields: tuple[Any, ...], heap: memoryview) -> None:
+        self._fields = fields
+        self._heap = heap
+
+    def _text(self, index: int) -> str:
+        offset, length = self._fields[index], self._fields[index + 1]
+        return str(self._heap[offset : offset + length], "utf-8")
+
+    @property
+    def id(self) -> int:
+        return self._fields[3]
+
+    @property
+    def price(self) -> float:
+        return self._fields[4]
+
+    @property
+    def stock(self) -> int:
+        return self._fields[5]
+
+    @property
+    def created_us(self) -> int:
+        return self._fields[6]
+
+    @property
+    def updated_us(self) -> int:
+        return self._fields[7]
+
+    @property
+    def available(self) -> bool:
+        return self._fields[8]
+
+    @property
+    def title(self) -> str:
+        return self._text(10)
+
+    @property
+    def category(self) -> str:
+        return self._text(12)
+
+    @property
+    def description(self) -> str | None:
+        return self._text(14) if self._fields[9] else None
+
+    def to_row(self) -> ProductRow:
+        return _decode_row(self._fields[_SLOT_ID:], self._heap)
+
+    def as_dict(self) -> dict[str, Any]:
+        return self.to_row().as_dict()
+
+    def to_json(self) -> bytes:
+        return self.to_row().to_json()
+
+
+class CatalogueView:
+    """Version-pinned read view of the shared catalogue; duck-types :class:`Snapshot`.
+
+    A slot is visible at ``version`` when ``born <= version`` and it was not
+    killed at or before it.  The writer only appends slots past the published
+    count and sets ``dead`` once, so a pinned view never changes under a reader.
+    """
+
+    __slots__ = ("version", "live", "_count", "_table", "_heap", "_slots")
+
+    def __init__(self, version: int, live: int, count: int, table: memoryview, heap: memoryview, slots: array) -> None:
+        self.version = version
+        self.live = live
+        self._count = count
+        self._table = table
+        self._heap = heap
+        self._slots = slots
+
+    def __iter__(self) -> Iterator[CatalogueRow]:
+        version, heap = self.version, self._heap
+        for fields in _SLOT.iter_unpack(self._table[: self._count * _SLOT.size]):
+            born, dead = fields[0], fields[1]
+            if born <= version and (not dead or dead > version):
+                yield CatalogueRow(fields, heap)
+
+    def __len__(self) -> int:
+        return self.live
+
+    def get(self, product_id: int) -> CatalogueRow | None:
+        slot = self._slots[product_id] if 0 <= product_id < len(self._slots) else -1
+        while slot >= 0:
+            fields = _SLOT.unpack_from(self._table, slot * _SLOT.size)
+            born, dead = fields[0], fields[1]
+            if born <= self.version:
+                return CatalogueRow(fields, self._heap) if not dead or dead > self.version else None
+            slot = fields[2]
+        return None
+
+    def rows_for(self, product_ids: Iterable[int]) -> list[CatalogueRow]:
+        return [row for row in map(self.get, product_ids) if row is not None]
+
+
+class CatalogueUnavailable(RuntimeError):
+    """The catalogue header stayed mid-publish past the seqlock budget (writer likely died)."""
+
+
+class SharedCatalogue:
+    """Memory-mapped product catalogue shared by every worker process.
+
+    Layout of ``catalogue-%08d.bin``::
+
+        header (seqlock) | slot table (``capacity`` x ``_SLOT``) | string heap
+
+    One writer process (:class:`CatalogueWriter`) appends row versions and then
+    publishes the header under a seqlock: ``seq`` is odd while the header is
+    being rewritten and ``2 * version`` otherwise.  Readers map the file
+    read-only and build :class:`CatalogueView` objects over it without copying
+    rows.  When the writer outgrows a file it writes a compacted successor and
+    records its number in the old header; readers follow it on the next view.
+    """
+
+    MAGIC = b"BMCATL01"
+    LAYOUT = 1
+    # magic, layout, seq, live, count, capacity, heap used, heap capacity, successor
+    HEADER = struct.Struct("<8sIxxxxQQQQQQQ")
+    TABLE_OFFSET = 128
+    # Seqlock reads spin this many times, then back off (doubling sleeps up
+    # to ``SEQLOCK_MAX_SLEEP``) for at most ``SEQLOCK_BUDGET`` seconds.
+    SEQLOCK_SPINS = 64
+    SEQLOCK_MAX_SLEEP = 0.005
+    SEQLOCK_BUDGET = 0.05
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._number = 0
+        self._map: mmap.mmap | None = None
+        self._view: memoryview | None = None
+        self._slots = array("q")
+        self._seen = 0
+
+    @staticmethod
+    def path_for(directory: Path, number: int) -> Path:
+        return directory / f"catalogue-{number:08d}.bin"
+
+    @classmethod
+    def latest(cls, directory: Path) -> int:
+        numbers = [int(path.stem.split("-")[1]) for path in directory.glob("catalogue-*.bin")]
+        if not numbers:
+            raise FileNotFoundError(f"no catalogue in {directory}")
+        return max(numbers)
+
+    def view(self) -> CatalogueView:
+        if self._map is None:
+            self._open_latest()
+        while True:
+            try:
+                _, _, seq, live, count, capacity, _, _, successor = self._header()
+            except CatalogueUnavailable:
+                # A restarted writer publishes a new file; the stuck one is abandoned.
+                if self.latest(self.directory) == self._number:
+                    raise
+                self._open_latest()
+                continue
+            if not successor:
+                break
+            try:
+                self._open(successor)
+            except FileNotFoundError:
+                # Skipped more than one generation; the chain is gone, the newest file is not.
+                self._open_latest()
+        table = self._view[self.TABLE_OFFSET : self.TABLE_OFFSET + capacity * _SLOT.size]
+        heap = self._view[self.TABLE_OFFSET + capacity * _SLOT.size :]
+        self._catch_up(table, count)
+        return CatalogueView(seq // 2, live, count, table, heap, self._slots)
+
+    def _header(self) -> tuple[Any, ...]:
+        spins, delay, waited = 0, 1e-5, 0.0
+        while True:
+            fields = self.HEADER.unpack_from(self._map, 0)
+            if fields[2] & 1 == 0 and self.HEADER.unpack_from(self._map, 0)[2] == fields[2]:
+                return fields
+            spins += 1
+            if spins <= self.SEQLOCK_SPINS:
+                continue
+            if waited >= self.SEQLOCK_BUDGET:
+                raise CatalogueUnavailable(f"catalogue {self._number} is stuck mid-publish")
+            time.sleep(delay)
+            waited += delay
+            delay = min(2 * delay, self.SEQLOCK_MAX_SLEEP)
+
+    def _open_latest(self) -> None:
+        while True:
+            number = self.latest(self.directory)
+            try:
+                return self._open(number)
+            except FileNotFoundError:
+                # The writer replaced it between the listing and the open.
+                if self.latest(self.directory) == number:
+                    raise
+
+    def _open(self, number: int) -> None:
+        with open(self.path_for(self.directory, number), "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, layout = self.HEADER.unpack_from(mapped, 0)[:2]
+        if magic != self.MAGIC or layout != self.LAYOUT:
+            raise RuntimeError(f"unsupported catalogue file {number}")
+        # Views handed out earlier keep the previous mapping alive.
+        self._number, self._map, self._view = number, mapped, memoryview(mapped)
+        self._slots = array("q")
+        self._seen = 0
+
+    def _catch_up(self, table: memoryview, count: int) -> None:
+        """Point the local id -> newest slot map at slots published since the last view."""
+
+        slots = self._slots
+        for offset, fields in enumerate(_SLOT.iter_unpack(table[self._seen * _SLOT.size : count * _SLOT.size])):
+            product_id = fields[_SLOT_ID]
+            if product_id >= len(slots):
+                slots.extend(array("q", [-1]) * (max(product_id + 1, 2 * len(slots)) - len(slots)))
+            slots[product_id] = self._seen + offset
+        self._seen = max(self._seen, count)
+
+
+class CatalogueWriter:
+    """Writer side of :class:`SharedCatalogue`; runs in the ``writer`` process only.
+
+    The writer keeps the regular in-process engine as the source of truth and
+    mirrors every published change into the catalogue (see :func:`_touch`).
+    Numbering and versions continue from an existing catalogue so readers that
+    outlive a writer restart follow it to the new file.
+    """
+
+    MIN_CAPACITY = 1024
+    SEQ = struct.Struct("<Q")
+    SEQ_OFFSET = 16
+    SUCCESSOR_OFFSET = SharedCatalogue.HEADER.size - 8
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.version = 0
+        self._number = 0
+        self._map: mmap.mmap | None = None
+        self._slots: dict[int, int] = {}
+        self._categories: dict[str, tuple[int, int]] = {}
+        self._live = self._count = self._capacity = self._heap_used = self._heap_capacity = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        try:
+            self._number = SharedCatalogue.latest(directory)
+        except FileNotFoundError:
+            return
+        self._map = self._open(self._number)
+        self.version = self.SEQ.unpack_from(self._map, self.SEQ_OFFSET)[0] // 2
+
+    def rebuild(self, snapshot: Snapshot) -> None:
+        """Write ``snapshot`` into a fresh, compacted file and retire the current one."""
+
+        table, heap = _encode_rows(snapshot)
+        rows = len(table) // _ROW.size
+        capacity = max(self.MIN_CAPACITY, 2 * rows)
+        heap_capacity = max(2**20, 2 * len(heap))
+        heap_offset = SharedCatalogue.TABLE_OFFSET + capacity * _SLOT.size
+        number = self._number + 1
+        path = SharedCatalogue.path_for(self.directory, number)
+        temp = path.with_suffix(".tmp")
+        with open(temp, "w+b") as handle:
+            handle.truncate(heap_offset + heap_capacity)
+            mapped = mmap.mmap(handle.fileno(), 0)
+        self.version += 1
+        slots: dict[int, int] = {}
+        for slot, fields in enumerate(_ROW.iter_unpack(table)):
+            _SLOT.pack_into(mapped, SharedCatalogue.TABLE_OFFSET + slot * _SLOT.size, self.version, 0, -1, *fields)
+            slots[fields[0]] = slot
+        mapped[heap_offset : heap_offset + len(heap)] = heap
+        previous, previous_number = self._map, self._number
+        self._map, self._number, self._slots, self._categories = mapped, number, slots, {}
+        self._live = self._count = rows
+        self._capacity, self._heap_used, self._heap_capacity = capacity, len(heap), heap_capacity
+        self._publish()
+        os.replace(temp, path)
+        if previous is not None:
+            # Readers find the successor through the old header; after that the
+            # old file only lives on in their mappings.
+            self.SEQ.pack_into(previous, self.SUCCESSOR_OFFSET, number)
+            previous.close()
+            SharedCatalogue.path_for(self.directory, previous_number).unlink(missing_ok=True)
+
+    def publish(self, snapshot: Snapshot, product_id: int) -> None:
+        """Append the current version of ``product_id`` (or its deletion) as a new catalogue version."""
+
+        row = snapshot.get(product_id)
+        full = row is not None and (self._count >= self._capacity or not self._heap_fits(row))
+        if full or self._count - self._live > max(self.MIN_CAPACITY, self._live):
+            self.rebuild(snapshot)
+            return
+        version = self.version + 1
+        previous = self._slots.pop(product_id, -1)
+        if previous >= 0:
+            self.SEQ.pack_into(self._map, SharedCatalogue.TABLE_OFFSET + previous * _SLOT.size + 8, version)
+            self._live -= 1
+        if row is not None:
+            _SLOT.pack_into(
+                self._map,
+                SharedCatalogue.TABLE_OFFSET + self._count * _SLOT.size,
+                version,
+                0,
+                previous,
+                row.id,
+                row.price,
+                row.stock,
+                row.created_us,
+                row.updated_us,
+                row.available,
+                row.description is not None,
+                *self._store_strings(row),
+            )
+            self._slots[product_id] = self._count
+            self._count += 1
+            self._live += 1
+        self.version = version
+        self._publish()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _open(self, number: int) -> mmap.mmap:
+        with open(SharedCatalogue.path_for(self.directory, number), "r+b") as handle:
+            return mmap.mmap(handle.fileno(), 0)
+
+    def _heap_fits(self, row: ProductRow) -> bool:
+        needed = sum(len(text.encode()) for text in (row.title, row.category, row.description) if text)
+        return self._heap_used + needed <= self._heap_capacity
+
+    def _store_strings(self, row: ProductRow) -> list[int]:
+        heap_offset = SharedCatalogue.TABLE_OFFSET + self._capacity * _SLOT.size
+        refs: list[int] = []
+        for name in _STRING_FIELDS:
+            text = getattr(row, name)
+            if name == "category" and text in self._categories:
+                refs.extend(self._categories[text])
+                continue
+            data = text.encode() if text is not None else b""
+            ref = (self._heap_used, len(data))
+            start = heap_offset + self._heap_used
+            self._map[start : start + len(data)] = data
+            self._heap_used += len(data)
+            if name == "category":
+                self._categories[text] = ref
+            refs.extend(ref)
+        return refs
+
+    def _publish(self) -> None:
+        """Rewrite the header under the seqlock: odd while writing, ``2 * version`` after."""
+
+        seq = 2 * self.version
+        self.SEQ.pack_into(self._map, self.SEQ_OFFSET, seq - 1)
+        SharedCatalogue.HEADER.pack_into(
+            self._map,
+            0,
+            SharedCatalogue.MAGIC,
+            SharedCatalogue.LAYOUT,
+            seq - 1,
+            self._live,
+            self._count,
+            self._capacity,
+            self._heap_used,
+            self._heap_capacity,
+            0,
+        )
+        self.SEQ.pack_into(self._map, self.SEQ_OFFSET, seq)
 
 
 class ConnectionManager:
@@ -120,26 +1448,104 @@ def _jsonify(value: Any) -> Any:
     raise TypeError(f"Unsupported type: {type(value)!r}")
 
 
-def _seed() -> None:
-    """Fill the in-memory dataset."""
-
-    global _DATA, _NEXT_ID
-    base = datetime.utcnow() - timedelta(days=30)
-    _DATA = [
-        {
-            "id": idx,
-            "title": f"Product {idx}",
-            "category": "Electronics" if idx % 2 else "Accessories",
-            "price": round(59 + idx * 3.2, 2),
-            "stock": 120 - idx * 2,
-            "available": idx % 3 != 0,
-            "description": None if idx % 5 == 0 else f"SKU {idx}",
-            "created_at": base + timedelta(days=idx),
-            "updated_at": base + timedelta(days=idx // 2),
-        }
+def _synthetic_rows(count: int, seed: int, now_us: int) -> list[ProductRow]:
+    """``count`` generated rows with ids 1..count; the same seed gives the same catalogue.
+
+    Prices are log-normal (median ~250), 80% of rows are available, a fifth
+    have no description, and rows were created over the last two years.
+    """
+
+    rnd = random.Random(seed)
+    span = 2 * 365 * 86_400_000_000
+    rows = []
+    for idx in range(1, count + 1):
+        created = now_us - int(rnd.random() * span)
+        rows.append(
+            ProductRow(
+                idx,
+                f"Product {idx}",
+                SEED_CATEGORIES[int(rnd.paretovariate(1.2)) % len(SEED_CATEGORIES)],
+                round(min(max(rnd.lognormvariate(5.5, 0.8), 1.0), 10_000.0), 2),
+                rnd.randint(0, 500),
+                rnd.random() < 0.8,
+                None if rnd.random() < 0.2 else f"SKU {idx}",
+                created,
+                created + int((now_us - created) * rnd.random()),
+            )
+        )
+    return rows
+
+
+def _seed(rows: int | None = None) -> None:
+    """Fill the in-memory dataset: the demo rows, or ``rows`` (default SEED_ROWS) generated ones."""
+
+    count = SEED_ROWS if rows is None else rows
+    if count:
+        generated = _synthetic_rows(count, SEED, _to_ticks(datetime.utcnow()))
+        _install(generated, count + 1)
+        return
+    base = _to_ticks(datetime.utcnow() - timedelta(days=30))
+    day = 86_400_000_000
+    rows = [
+        ProductRow(
+            idx,
+            f"Product {idx}",
+            "Electronics" if idx % 2 else "Accessories",
+            round(59 + idx * 3.2, 2),
+            120 - idx * 2,
+            idx % 3 != 0,
+            None if idx % 5 == 0 else f"SKU {idx}",
+            base + idx * day,
+            base + idx // 2 * day,
+        )
         for idx in range(1, 26)
     ]
-    _NEXT_ID = len(_DATA) + 1
+    _install(rows, len(rows) + 1)
+
+
+def _install(rows: list[ProductRow], next_id: int) -> None:
+    global _SNAPSHOT, _NEXT_ID
+    with _LOCK:
+        _SNAPSHOT = Snapshot.build(rows, _SNAPSHOT.version + 1)
+        _NEXT_ID = next_id
+        _SEARCH_INDEX.rebuild(_SNAPSHOT)
+        if _QUERY_POOL is not None:
+            _QUERY_POOL.invalidate()
+        if _CATALOGUE_WRITER is not None:
+            _CATALOGUE_WRITER.rebuild(_SNAPSHOT)
+
+
+def _freeze_heap() -> None:
+    """Move the startup bulk load into the GC's permanent generation, once per process.
+
+    Slotted rows are GC-tracked (dicts of scalars are not), so full
+    collections would otherwise walk every row.  Frozen objects are never
+    collected, which is why this runs only after the initial seed or recovery
+    and not on every ``_install``.
+    """
+
+    global _HEAP_FROZEN
+    if _HEAP_FROZEN:
+        return
+    _HEAP_FROZEN = True
+    gc.collect()
+    gc.freeze()
+
+
+async def _persist(lsn: int) -> None:
+    """Wait for durability of ``lsn`` and kick off a snapshot when the WAL has grown enough."""
+
+    if _STORE is None:
+        return
+    await _STORE.commit(lsn)
+    if _STORE.snapshot_due():
+        # Only the capture and the segment switch are serialised with writers;
+        # every fsync runs in the executor inside the snapshot task.
+        with _LOCK:
+            snapshot = _SNAPSHOT
+            segment = _STORE.rotate()
+            next_id = _NEXT_ID
+        _STORE.start_snapshot(snapshot, next_id, segment)
 
 
 def _error(message: str, *, details: dict[str, Any] | None = None) -> HTTPException:
@@ -218,14 +1624,28 @@ def _normalize_filters(filters: str | None, field: str | None, operator: str | N
     return normalized
 
 
-def _apply_filters(items: list[dict[str, Any]], filters: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def _storage_value(field: str, value: Any) -> Any:
+    """Convert a parsed filter value to the representation kept on :class:`ProductRow`."""
+
+    if field not in ROW_ATTRS:
+        return value
+    if isinstance(value, datetime):
+        return _to_ticks(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_to_ticks(item) for item in value)
+    return value
+
+
+def _apply_filters(items: Iterable[ProductRow], filters: list[dict[str, Any]]) -> Iterable[ProductRow]:
     if not filters:
         return items
+    compiled = [
+        (ROW_ATTRS.get(flt["field"], flt["field"]), flt["operator"], _storage_value(flt["field"], flt["value"]))
+        for flt in filters
+    ]
 
-    def match(row: dict[str, Any], flt: dict[str, Any]) -> bool:
-        actual = row.get(flt["field"])
-        op = flt["operator"]
-        expected = flt["value"]
+    def match(row: ProductRow, attr: str, op: str, expected: Any) -> bool:
+        actual = getattr(row, attr)
         if op == "eq":
             return actual == expected
         if op == "neq":
@@ -257,16 +1677,42 @@ def _apply_filters(items: list[dict[str, Any]], filters: list[dict[str, Any]]) -
             return actual is None
         return False
 
-    return [row for row in items if all(match(row, flt) for flt in filters)]
+    return [row for row in items if all(match(row, *flt) for flt in compiled)]
 
 
-def _apply_search(items: list[dict[str, Any]], query: str | None) -> list[dict[str, Any]]:
+def _normalize_query(query: str | None) -> str | None:
     if not query:
-        return items
-    needle = query.strip().lower()
+        return None
+    return query.strip().lower() or None
+
+
+def _matches_query(row: ProductRow, needle: str) -> bool:
+    return any(isinstance(text, str) and needle in text.lower() for text in (getattr(row, f) for f in SEARCH_FIELDS))
+
+
+def _apply_search(items: Iterable[ProductRow], needle: str | None) -> Iterable[ProductRow]:
     if not needle:
         return items
-    return [row for row in items if any(isinstance(row.get(f), str) and needle in row[f].lower() for f in SEARCH_FIELDS)]
+    return [row for row in items if _matches_query(row, needle)]
+
+
+def _relevance(row: ProductRow, needle: str) -> float:
+    """Score a verified match: weighted field hits with bonuses for exact and prefix matches."""
+
+    score = 0.0
+    for name in SEARCH_FIELDS:
+        text = getattr(row, name)
+        if not isinstance(text, str):
+            continue
+        lowered = text.lower()
+        position = lowered.find(needle)
+        if position < 0:
+            continue
+        weight = SEARCH_WEIGHTS[name]
+        score += weight * (1.0 + len(needle) / len(lowered))
+        if position == 0:
+            score += weight * (2.0 if lowered == needle else 0.5)
+    return score
 
 
 def _parse_sort(sort: str | None) -> list[tuple[str, bool]]:
@@ -276,7 +1722,7 @@ def _parse_sort(sort: str | None) -> list[tuple[str, bool]]:
         parts = [piece.strip() for piece in chunk.split(",") if piece.strip()]
         field = parts[0]
         direction = parts[1].lower() if len(parts) > 1 else "asc"
-        if field not in FIELD_META or direction not in {"asc", "desc"}:
+        if (field not in FIELD_META and field != RELEVANCE_SORT) or direction not in {"asc", "desc"}:
             raise _error("Некорректная сортировка", details={"segment": chunk})
         order.append((field, direction == "desc"))
     if all(field != "id" for field, _ in order):
@@ -284,30 +1730,203 @@ def _parse_sort(sort: str | None) -> list[tuple[str, bool]]:
     return order
 
 
-def _apply_sort(items: list[dict[str, Any]], order: list[tuple[str, bool]]) -> list[dict[str, Any]]:
+def _sort_key(field: str) -> Any:
+    attr = ROW_ATTRS.get(field, field)
+    if FIELD_META[field]["type"] is str:
+        return lambda row: value.lower() if isinstance(value := getattr(row, attr), str) else value
+    return attrgetter(attr)
+
+
+def _apply_sort(items: Iterable[ProductRow], order: list[tuple[str, bool]], needle: str | None = None) -> list[ProductRow]:
     result = list(items)
     for field, desc in reversed(order):
-        result.sort(key=lambda row: row.get(field).lower() if isinstance(row.get(field), str) else row.get(field), reverse=desc)
+        if field == RELEVANCE_SORT:
+            result.sort(key=lambda row: _relevance(row, needle), reverse=desc)
+            continue
+        result.sort(key=_sort_key(field), reverse=desc)
     return result
 
 
-def _paginate(items: list[dict[str, Any]], page: int, size: int) -> tuple[list[dict[str, Any]], int]:
-    total = len(items)
-    start = (page - 1) * size
-    end = start + size
-    return items[start:end], total
+def _query_key(filters: list[dict[str, Any]], needle: str | None, order: list[tuple[str, bool]]) -> tuple[Any, ...]:
+    """Hashable cache key; filters are order-independent (they are AND-ed)."""
+
+    def freeze(value: Any) -> Any:
+        return tuple(freeze(item) for item in value) if isinstance(value, (list, tuple)) else value
+
+    normalized = sorted((flt["field"], flt["operator"], repr(freeze(flt["value"]))) for flt in filters)
+    return tuple(normalized), needle, tuple(order)
+
+
+def _histogram(values: list[float], buckets: int) -> list[dict[str, Any]]:
+    if not values:
+        return []
+    low, high = float(min(values)), float(max(values))
+    if low == high:
+        return [{"start": low, "end": high, "count": len(values)}]
+    width = (high - low) / buckets
+    counts = [0] * buckets
+    last = buckets - 1
+    for value in values:
+        counts[min(int((value - low) / width), last)] += 1
+    return [
+        {"start": round(low + index * width, 2), "end": round(high if index == last else low + (index + 1) * width, 2), "count": count}
+        for index, count in enumerate(counts)
+    ]
+
+
+def _facets(rows: Iterable[ProductRow], buckets: int) -> dict[str, Any]:
+    """Value counts and histograms for ``rows`` in a single pass."""
+
+    counters: dict[str, dict[Any, int]] = {name: {} for name in FACET_COUNT_FIELDS}
+    columns: dict[str, list[float]] = {name: [] for name in FACET_HISTOGRAM_FIELDS}
+    count_getters = [(counters[name], attrgetter(name)) for name in FACET_COUNT_FIELDS]
+    column_getters = [(columns[name].append, attrgetter(name)) for name in FACET_HISTOGRAM_FIELDS]
+    total = 0
+    for row in rows:
+        total += 1
+        for counter, getter in count_getters:
+            value = getter(row)
+            counter[value] = counter.get(value, 0) + 1
+        for append, getter in column_getters:
+            append(getter(row))
+    return {
+        "total": total,
+        "counts": {
+            name: [{"value": value, "count": count} for value, count in sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))]
+            for name, counter in counters.items()
+        },
+        "histograms": {name: _histogram(values, buckets) for name, values in columns.items()},
+    }
+
+
+def _view() -> Snapshot | CatalogueView:
+    if _CATALOGUE is None:
+        return _SNAPSHOT
+    try:
+        return _CATALOGUE.view()
+    except CatalogueUnavailable as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error_code": "catalogue_unavailable", "message": "Каталог недоступен", "details": {"reason": str(exc)}},
+        ) from exc
+
+
+async def _execute(
+    filters: list[dict[str, Any]], needle: str | None, order: list[tuple[str, bool]], limit: int
+) -> tuple[Snapshot, array, int]:
+    """Ordered ids (at least the first ``limit``) and match count of a list query.
+
+    Scans of ``POOL_MIN_ROWS`` rows or more go to the process pool when one is
+    configured; smaller ones run inline, where the trigram index prunes them.
+    """
+
+    snapshot = _view()
+    candidates = _SEARCH_INDEX.lookup(needle) if needle and _CATALOGUE is None else None
+    scanned = len(snapshot) if candidates is None else len(candidates)
+    if _QUERY_POOL is not None and _CATALOGUE is None and scanned >= POOL_MIN_ROWS:
+        return await _QUERY_POOL.run(filters, needle, order, max(limit, QueryPool.PREFIX))
+    rows = snapshot if candidates is None else snapshot.rows_for(candidates)
+    ordered = _apply_sort(_apply_filters(_apply_search(rows, needle), filters), order, needle)
+    return snapshot, array("q", [row.id for row in ordered]), len(ordered)
+
+
+def _find(snapshot: Snapshot, product_id: int) -> int:
+    slot = snapshot.locate(product_id)
+    if slot is None:
+        raise _error("Товар не найден", details={"product_id": product_id})
+    return slot
+
+
+def _touch(product_id: int) -> None:
+    """Record a write for a running compaction, the pool export and the catalogue (call under ``_LOCK``)."""
+
+    if _DIRTY is not None:
+        _DIRTY.add(product_id)
+    if _QUERY_POOL is not None:
+        _QUERY_POOL.touch(product_id)
+    if _CATALOGUE_WRITER is not None:
+        _CATALOGUE_WRITER.publish(_SNAPSHOT, product_id)
+
+
+def _maybe_compact() -> None:
+    global _COMPACTION, _DIRTY
+    if (_COMPACTION is not None and not _COMPACTION.done()) or not _SNAPSHOT.needs_compaction():
+        return
+    with _LOCK:
+        _DIRTY = set()
+        base = _SNAPSHOT
+    _COMPACTION = asyncio.get_running_loop().create_task(_compact(base))
+    _COMPACTION.add_done_callback(_compaction_done)
 
 
-def _find(product_id: int) -> int:
-    for idx, row in enumerate(_DATA):
-        if row["id"] == product_id:
-            return idx
-    raise _error("Товар не найден", details={"product_id": product_id})
+def _compaction_done(task: asyncio.Future[None]) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Snapshot compaction failed", exc_info=task.exception())
+
+
+async def _compact(base: Snapshot) -> None:
+    """Rebuild ``base`` without tombstones off the loop, then replay writes made meanwhile."""
+
+    global _SNAPSHOT, _DIRTY
+    try:
+        compacted = await asyncio.get_running_loop().run_in_executor(None, base.compacted)
+        with _LOCK:
+            current = _SNAPSHOT
+            if current.ids is not base.ids:
+                return  # the dataset was replaced wholesale (_install)
+            created = []
+            for product_id in _DIRTY or ():
+                row = current.get(product_id)
+                slot = compacted.locate(product_id)
+                if slot is None:
+                    if row is not None:
+                        created.append(row)
+                    continue
+                compacted = compacted.replace(slot, row) if row is not None else compacted.remove(slot)
+            for row in sorted(created, key=attrgetter("id")):
+                compacted = compacted.append(row)
+            _SNAPSHOT = Snapshot(current.version, compacted.pages, compacted.size, compacted.slots, compacted.ids)
+    finally:
+        _DIRTY = None
 
 
 @app.on_event("startup")
 async def _startup() -> None:
-    _seed()
+    global _STORE, _QUERY_POOL, _CATALOGUE, _FOLLOWER
+    if CATALOGUE_DIR and _CATALOGUE_WRITER is None:
+        # HTTP worker in catalogue mode: rows, persistence and writes belong
+        # to the writer process.
+        _CATALOGUE = SharedCatalogue(Path(CATALOGUE_DIR))
+        _FOLLOWER = asyncio.create_task(_follow_writer())
+        return
+    if POOL_WORKERS and _QUERY_POOL is None:
+        _QUERY_POOL = QueryPool(POOL_WORKERS)
+    opened = recovered = None
+    if DATA_DIR and _STORE is None:
+        _STORE = opened = WriteAheadStore(DATA_DIR, fsync_policy=FSYNC_POLICY, group_commit_ms=GROUP_COMMIT_MS, snapshot_every=SNAPSHOT_EVERY)
+        recovered = opened.recover()
+    # Recovery comes first so a persisted catalogue is never rebuilt from the seed.
+    if recovered is not None:
+        _install(*recovered)
+    else:
+        _seed()
+        if opened is not None:
+            opened.write_snapshot(_SNAPSHOT, _NEXT_ID, opened.rotate())
+    _freeze_heap()
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    global _STORE, _QUERY_POOL, _FOLLOWER
+    if _FOLLOWER is not None:
+        _FOLLOWER.cancel()
+        _FOLLOWER = None
+    if _STORE is not None:
+        await _STORE.close()
+        _STORE = None
+    if _QUERY_POOL is not None:
+        _QUERY_POOL.close()
+        _QUERY_POOL = None
 
 
 @app.get("/products", response_model=PaginatedProducts)
@@ -319,69 +1938,140 @@ async def list_products(
     field: str | None = Query(None, description="Поле одиночного фильтра"),
     operator: str | None = Query(None, description="Оператор одиночного фильтра"),
     value: str | None = Query(None, description="Значение одиночного фильтра"),
-    sort: str | None = Query(None, description="Сортировка вида field,asc;field2,desc"),
-) -> PaginatedProducts:
+    sort: str | None = Query(None, description="Сортировка вида field,asc;field2,desc; relevance,desc при заданном q"),
+) -> Response:
     normalized = _normalize_filters(filters, field, operator, value)
     order = _parse_sort(sort)
-    with _LOCK:
-        snapshot = list(_DATA)
-    filtered = _apply_filters(snapshot, normalized)
-    searched = _apply_search(filtered, q)
-    ordered = _apply_sort(searched, order)
-    items, total = _paginate(ordered, page, page_size)
+    needle = _normalize_query(q)
+    if needle is None and any(field == RELEVANCE_SORT for field, _ in order):
+        raise _error("Сортировка по релевантности требует q", details={"sort": sort})
+    start = (page - 1) * page_size
+    end = start + page_size
+    snapshot = _view()
+    key = _query_key(normalized, needle, order)
+    cached = _QUERY_CACHE.get(key, snapshot.version, end)
+    if cached is None:
+        snapshot, ids, total = await _execute(normalized, needle, order, end)
+        _QUERY_CACHE.put(key, snapshot.version, ids, total)
+    else:
+        ids, total = cached
+    items = snapshot.rows_for(ids[start:end])
     if page > 1 and not items:
         raise _error("Страница вне диапазона", details={"page": page})
-    return PaginatedProducts(
-        items=[Product(**item) for item in items],
-        page=page,
-        page_size=page_size,
-        total=total,
-        total_pages=(total + page_size - 1) // page_size,
-        sort=";".join(f"{field},{'desc' if desc else 'asc'}" for field, desc in order),
-        filters=normalized,
-        q=q,
+    # The body is assembled from cached row fragments; PaginatedProducts only
+    # documents the schema, the layout below must stay in sync with it.
+    meta = _dumps(
+        {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size,
+            "sort": ";".join(f"{field},{'desc' if desc else 'asc'}" for field, desc in order),
+            "filters": normalized,
+            "q": q,
+        }
     )
+    body = b'{"items":[' + b",".join(item.to_json() for item in items) + b"]," + meta[1:]
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/products/facets", response_model=ProductFacets)
+async def product_facets(
+    q: str | None = Query(None, description="Поисковая строка"),
+    filters: str | None = Query(None, description="JSON-массив фильтров"),
+    field: str | None = Query(None, description="Поле одиночного фильтра"),
+    operator: str | None = Query(None, description="Оператор одиночного фильтра"),
+    value: str | None = Query(None, description="Значение одиночного фильтра"),
+    buckets: int = Query(10, ge=1, le=100, description="Число интервалов гистограмм"),
+) -> Response:
+    global _FACET_VERSION
+    normalized = _normalize_filters(filters, field, operator, value)
+    needle = _normalize_query(q)
+    snapshot = _view()
+    if snapshot.version != _FACET_VERSION:
+        _FACET_CACHE.clear()
+        _FACET_VERSION = snapshot.version
+    key = (_query_key(normalized, needle, []), buckets, q)
+    body = _FACET_CACHE.get(key)
+    if body is None:
+        candidates = _SEARCH_INDEX.lookup(needle) if needle and _CATALOGUE is None else None
+        rows = snapshot if candidates is None else snapshot.rows_for(candidates)
+        body = _dumps({**_facets(_apply_filters(_apply_search(rows, needle), normalized), buckets), "filters": normalized, "q": q})
+        _FACET_CACHE[key] = body
+        if len(_FACET_CACHE) > FACET_CACHE_ENTRIES:
+            _FACET_CACHE.popitem(last=False)
+    else:
+        _FACET_CACHE.move_to_end(key)
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/products", response_model=Product, status_code=status.HTTP_201_CREATED)
 async def create_product(payload: ProductCreate = Body(...)) -> Product:
-    now = datetime.utcnow()
+    if _CATALOGUE is not None:
+        return Product(**await _forward({"op": "create", "payload": payload.model_dump()}))
+    now = _to_ticks(datetime.utcnow())
+    global _SNAPSHOT, _NEXT_ID
     with _LOCK:
-        global _NEXT_ID
-        record = {
-            "id": _NEXT_ID,
-            "title": payload.title,
-            "category": payload.category,
-            "price": payload.price,
-            "stock": payload.stock,
-            "available": payload.available,
-            "description": payload.description,
-            "created_at": now,
-            "updated_at": now,
-        }
-        _DATA.append(record)
+        record = ProductRow(
+            _NEXT_ID,
+            payload.title,
+            payload.category,
+            payload.price,
+            payload.stock,
+            payload.available,
+            payload.description,
+            now,
+            now,
+        )
+        _SNAPSHOT = _SNAPSHOT.append(record)
+        _touch(record.id)
+        _SEARCH_INDEX.add(record)
         _NEXT_ID += 1
-    await manager.broadcast({"event": "product.created", "payload": record})
-    return Product(**record)
+        lsn = _STORE.log_upsert(record) if _STORE else 0
+        body = record.as_dict()
+    await _persist(lsn)
+    await manager.broadcast({"event": "product.created", "payload": body})
+    return Product(**body)
 
 
 @app.put("/products/{product_id}", response_model=Product)
 async def update_product(product_id: int, payload: ProductUpdate = Body(...)) -> Product:
+    global _SNAPSHOT
+    updates = payload.model_dump(exclude_unset=True)
+    if _CATALOGUE is not None:
+        return Product(**await _forward({"op": "update", "id": product_id, "payload": updates}))
     with _LOCK:
-        index = _find(product_id)
-        record = _DATA[index]
-        updates = payload.model_dump(exclude_unset=True)
-        record.update(updates)
-        record["updated_at"] = datetime.utcnow()
-    await manager.broadcast({"event": "product.updated", "payload": record})
-    return Product(**record)
+        slot = _find(_SNAPSHOT, product_id)
+        previous = _SNAPSHOT.row_at(slot)
+        record = previous.copy()
+        for name, change in updates.items():
+            setattr(record, name, sys.intern(change) if name == "category" and change is not None else change)
+        record.updated_us = _to_ticks(datetime.utcnow())
+        _SNAPSHOT = _SNAPSHOT.replace(slot, record)
+        _touch(product_id)
+        if any(name in updates for name in SEARCH_FIELDS):
+            _SEARCH_INDEX.replace(previous, record)
+        lsn = _STORE.log_upsert(record) if _STORE else 0
+        body = record.as_dict()
+    await _persist(lsn)
+    await manager.broadcast({"event": "product.updated", "payload": body})
+    return Product(**body)
 
 
 @app.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(product_id: int) -> JSONResponse:
+    global _SNAPSHOT
+    if _CATALOGUE is not None:
+        await _forward({"op": "delete", "id": product_id})
+        return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
     with _LOCK:
-        index = _find(product_id)
-        _DATA.pop(index)
+        slot = _find(_SNAPSHOT, product_id)
+        _SEARCH_INDEX.remove(_SNAPSHOT.row_at(slot))
+        _SNAPSHOT = _SNAPSHOT.remove(slot)
+        _touch(product_id)
+        lsn = _STORE.log_delete(product_id) if _STORE else 0
+    _maybe_compact()
+    await _persist(lsn)
     await manager.broadcast({"event": "product.deleted", "payload": {"id": product_id}})
     return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
 
@@ -398,4 +2088,130 @@ async def products_socket(websocket: WebSocket) -> None:
         await manager.disconnect(websocket)
 
 
-_seed()
+def _writer_socket() -> str:
+    return str(Path(CATALOGUE_DIR) / "writer.sock")
+
+
+def _writer_unavailable(exc: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"error_code": "writer_unavailable", "message": "Процесс записи недоступен", "details": {"reason": str(exc)}},
+    )
+
+
+async def _forward(request: dict[str, Any]) -> Any:
+    """Send a mutation to the writer process; its reply is published before it arrives."""
+
+    try:
+        reader, writer = await asyncio.open_unix_connection(_writer_socket())
+    except OSError as exc:
+        raise _writer_unavailable(exc) from exc
+    try:
+        writer.write(_dumps(request) + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        if not isinstance(reply, dict) or "status" not in reply:
+            raise ValueError(f"malformed writer reply: {reply!r}")
+    except (OSError, ValueError) as exc:
+        # The writer died mid-request or answered with something that is not a reply.
+        raise _writer_unavailable(exc) from exc
+    finally:
+        writer.close()
+    if reply["status"] >= 400:
+        raise HTTPException(status_code=reply["status"], detail=reply["body"])
+    return reply["body"]
+
+
+async def _follow_writer() -> None:
+    """Relay the writer's product events to this worker's WebSocket clients."""
+
+    while True:
+        try:
+            reader, writer = await asyncio.open_unix_connection(_writer_socket())
+            writer.write(b'{"op":"subscribe"}\n')
+            await writer.drain()
+            while line := await reader.readline():
+                await manager.broadcast(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        await asyncio.sleep(1.0)
+
+
+class _Subscriber:
+    """Stands in for a WebSocket in :data:`manager`: one worker's event stream."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, message: str) -> None:
+        self._writer.write(message.encode() + b"\n")
+        await self._writer.drain()
+
+
+async def _apply(request: dict[str, Any]) -> tuple[int, Any]:
+    op = request["op"]
+    if op == "create":
+        product = await create_product(ProductCreate(**request["payload"]))
+        return status.HTTP_201_CREATED, product.model_dump()
+    if op == "update":
+        product = await update_product(request["id"], ProductUpdate(**request["payload"]))
+        return status.HTTP_200_OK, product.model_dump()
+    if op == "delete":
+        await delete_product(request["id"])
+        return status.HTTP_204_NO_CONTENT, None
+    raise _error("Неизвестная операция", details={"op": op})
+
+
+async def _serve_worker(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = json.loads(await reader.readline())
+        if isinstance(request, dict) and request.get("op") == "subscribe":
+            subscriber = _Subscriber(writer)
+            await manager.connect(subscriber)
+            try:
+                await reader.read()
+            finally:
+                await manager.disconnect(subscriber)
+            return
+        try:
+            if not isinstance(request, dict):
+                raise _error("Некорректный запрос", details={"type": type(request).__name__})
+            code, body = await _apply(request)
+        except HTTPException as exc:
+            code, body = exc.status_code, exc.detail
+        except (KeyError, TypeError, ValueError) as exc:
+            code, body = status.HTTP_400_BAD_REQUEST, _error("Некорректный запрос", details={"reason": repr(exc)}).detail
+        writer.write(_dumps({"status": code, "body": body}) + b"\n")
+        await writer.drain()
+    except (OSError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _run_writer() -> None:
+    """Own the catalogue: apply workers' mutations over a Unix socket and fan out events."""
+
+    global _CATALOGUE_WRITER
+    if not CATALOGUE_DIR:
+        raise SystemExit("BOOSTER_CATALOGUE is not set")
+    _CATALOGUE_WRITER = CatalogueWriter(Path(CATALOGUE_DIR))
+    await _startup()  # seeding or recovery publishes the first catalogue file via _install
+    Path(_writer_socket()).unlink(missing_ok=True)
+    server = await asyncio.start_unix_server(_serve_worker, path=_writer_socket())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await _shutdown()
+        _CATALOGUE_WRITER.close()
+
+
+# Demo rows for importers (scripts, tests); startup installs the configured dataset.
+_seed(0)
+
+if __name__ == "__main__" and sys.argv[1:] == ["writer"]:
+    asyncio.run(_run_writer())
@@ -0,0 +1,392 @@
+"""Performance suite for the ``backend/app`` API with JSON results and regression checks.
+
+Usage::
+
+    python benchmarks/api_bench.py run --targets inprocess uvicorn --sizes 1000 10000 100000 --out bench.json
+    python benchmarks/api_bench.py run --scenarios list-price-range deep-page --sizes 10000 --out new.json
+    python benchmarks/api_bench.py compare bench.json new.json --threshold 0.15
+
+``run`` seeds one SQLite database up to each size in turn (via
+``app.db.seed``) and drives every scenario through ``simple_client``
+(``inprocess``, straight into the ASGI app) and/or HTTP against a uvicorn
+subprocess on the same database (``uvicorn``). Each scenario reports
+throughput and p50/p95/p99 latency; in-process runs also report the
+tracemalloc peak over a separate, shorter pass (tracing slows requests
+down, so it is not mixed into the timings).
+
+``compare`` matches results by (target, scenario, size) and exits with
+status 1 when p95 latency grows or throughput drops by more than
+``--threshold`` (a fraction) in any of them.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend"
+sys.path.insert(0, str(BACKEND))
+
+_DB_DIR = tempfile.mkdtemp(prefix="api-bench-")
+atexit.register(shutil.rmtree, _DB_DIR, True)
+DATABASE_URL = f"sqlite+aiosqlite:///{_DB_DIR}/bench.db"
+SECRET_KEY = "bench-secret"
+# Settings are read when ``app`` is imported; point it at the benchmark database first.
+os.environ.update(DATABASE_URL=DATABASE_URL, SECRET_KEY=SECRET_KEY, LOG_LEVEL="WARNING", DB_POOL_PREWARM="false")
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.seed import DatasetSpec, seed_products, seed_users  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+from app.tests.utils.simple_client import AsyncClient  # noqa: E402
+
+ADMIN_EMAIL = "admin@oppo.kz"
+ADMIN_PASSWORD = "Admin123!"
+NOW = datetime.now(timezone.utc)
+
+LIST_SCENARIOS: dict[str, dict[str, Any]] = {
+    "list-plain": {},
+    "list-title-contains": {"title_contains": "Product 1"},
+    "list-title-eq": {"title_eq": "Demo Product 500"},
+    "list-price-range": {"price_from": 100, "price_to": 300},
+    "list-price-in": {"price_in": ["99.99", "150.00", "250.00"]},
+    "list-in-stock": {"in_stock": "false"},
+    "list-created-range": {
+        "created_from": (NOW - timedelta(days=90)).isoformat(),
+        "created_to": (NOW - timedelta(days=30)).isoformat(),
+    },
+    "list-dsl": {
+        "filters": json.dumps(
+            [
+                {"field": "price", "operator": "between", "value": [200, 800]},
+                {"field": "title", "operator": "startswith", "value": "Demo Product 1"},
+            ]
+        )
+    },
+    "sort-price-desc": {"sort_by": "price", "sort_order": "desc"},
+    "sort-title": {"sort_by": "title", "sort_order": "asc"},
+    "sort-created-desc": {"sort_by": "created_at", "sort_order": "desc"},
+    "sort-multi": {"sort": "price,desc;created_at,asc"},
+}
+SCENARIOS = [*LIST_SCENARIOS, "deep-page", "crud", "login", "ws-fanout"]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Context:
+    """Per-(target, size) state shared by the scenarios."""
+
+    def __init__(self, target: str, client: Any, size: int, base_url: str) -> None:
+        self.target = target
+        self.client = client
+        self.size = size
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {create_access_token(ADMIN_EMAIL, UserRole.admin)}"}
+        self.rnd = random.Random(size)
+
+
+async def _expect(response: Any, status_code: int) -> None:
+    if response.status_code != status_code:
+        raise RuntimeError(f"unexpected status {response.status_code}: {response.text[:200]}")
+
+
+def list_request(params: dict[str, Any]) -> Callable[[Context], Awaitable[None]]:
+    async def run(ctx: Context) -> None:
+        await _expect(await ctx.client.get("/api/v1/products/", params={**params, "size": 20}, headers=ctx.headers), 200)
+
+    return run
+
+
+async def deep_page(ctx: Context) -> None:
+    offset = max(0, ctx.size - 20 - ctx.rnd.randint(0, 100))
+    await _expect(await ctx.client.get("/api/v1/products/", params={"limit": 20, "offset": offset}, headers=ctx.headers), 200)
+
+
+async def crud(ctx: Context) -> None:
+    created = await ctx.client.post(
+        "/api/v1/products/", json={"title": "Bench item", "price": "19.99", "in_stock": True}, headers=ctx.headers
+    )
+    await _expect(created, 201)
+    product_id = created.json()["id"]
+    await _expect(
+        await ctx.client.put(f"/api/v1/products/{product_id}", json={"price": "24.99"}, headers=ctx.headers), 200
+    )
+    await _expect(await ctx.client.delete(f"/api/v1/products/{product_id}", headers=ctx.headers), 204)
+
+
+async def login(ctx: Context) -> None:
+    await _expect(
+        await ctx.client.post("/api/v1/auth/login", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD}), 200
+    )
+
+
+class AsgiWebSocket:
+    """Minimal in-process WebSocket client speaking ASGI directly to ``app``."""
+
+    def __init__(self, path: str, query: str) -> None:
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+            "subprotocols": [],
+        }
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+        self.task: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        await self.incoming.put({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(self.scope, self.incoming.get, self.outgoing.put))
+        accepted = await self.outgoing.get()
+        if accepted["type"] != "websocket.accept":
+            raise RuntimeError(f"websocket rejected: {accepted}")
+
+    async def recv(self) -> Any:
+        while True:
+            message = await self.outgoing.get()
+            if message["type"] == "websocket.send":
+                return message.get("text") or message.get("bytes")
+            if message["type"] == "websocket.close":
+                raise RuntimeError("websocket closed")
+
+    async def close(self) -> None:
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        if self.task is not None:
+            await self.task
+
+
+async def open_subscribers(ctx: Context, count: int) -> list[Any]:
+    token = create_access_token(ADMIN_EMAIL, UserRole.admin)
+    sockets: list[Any] = []
+    for _ in range(count):
+        if ctx.target == "inprocess":
+            sock = AsgiWebSocket("/api/v1/ws/products", f"token={token}")
+            await sock.connect()
+        else:
+            sock = await websockets.connect(f"{ctx.base_url.replace('http', 'ws')}/api/v1/ws/products?token={token}")
+        sockets.append(sock)
+    return sockets
+
+
+def ws_fanout(sockets: list[Any]) -> Callable[[Context], Awaitable[None]]:
+    """One create + delete; done when every subscriber has both events."""
+
+    async def run(ctx: Context) -> None:
+        created = await ctx.client.post(
+            "/api/v1/products/", json={"title": "Fan-out", "price": "9.99", "in_stock": True}, headers=ctx.headers
+        )
+        await _expect(created, 201)
+        await _expect(await ctx.client.delete(f"/api/v1/products/{created.json()['id']}", headers=ctx.headers), 204)
+        await asyncio.gather(*(sock.recv() for sock in sockets))
+        await asyncio.gather(*(sock.recv() for sock in sockets))
+
+    return run
+
+
+async def measure(run: Callable[[Context], Awaitable[None]], ctx: Context, requests: int, concurrency: int) -> dict[str, Any]:
+    for _ in range(min(10, requests)):
+        await run(ctx)
+    samples: list[float] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await run(ctx)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+    }
+
+
+async def allocation_peak(run: Callable[[Context], Awaitable[None]], ctx: Context, requests: int) -> float:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(requests):
+        await run(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round((peak - baseline) / 1024, 1)
+
+
+async def run_scenarios(ctx: Context, args: argparse.Namespace) -> list[dict[str, Any]]:
+    results = []
+    for name in args.scenarios:
+        sockets: list[Any] = []
+        concurrency, requests = args.concurrency, args.requests
+        if name in LIST_SCENARIOS:
+            run = list_request(LIST_SCENARIOS[name])
+        elif name == "deep-page":
+            run = deep_page
+        elif name == "crud":
+            run = crud
+        elif name == "login":
+            # bcrypt dominates; fewer iterations keep the suite short.
+            run, requests = login, max(1, requests // 10)
+        else:
+            sockets = await open_subscribers(ctx, args.subscribers)
+            # Events from concurrent writes would interleave on the sockets.
+            run, concurrency, requests = ws_fanout(sockets), 1, max(1, requests // 4)
+        result = {"target": ctx.target, "scenario": name, "size": ctx.size, **await measure(run, ctx, requests, concurrency)}
+        if ctx.target == "inprocess":
+            result["alloc_peak_kib"] = await allocation_peak(run, ctx, min(20, requests))
+        for sock in sockets:
+            await sock.close()
+        print(
+            f"  {ctx.target:<9} {name:<20} n={ctx.size:<8} {result['throughput_rps']:8.1f} req/s"
+            f"  p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms"
+            + (f"  peak={result['alloc_peak_kib']:.0f}KiB" if "alloc_peak_kib" in result else ""),
+            flush=True,
+        )
+        results.append(result)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_uvicorn() -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient() as probe:
+        for _ in range(100):
+            try:
+                if (await probe.get(f"{base_url}/api/v1/health")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def prepare(size: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    spec = DatasetSpec(rows=size, seed=7, price_distribution="lognormal", in_stock_ratio=0.8, days=365)
+    async with AsyncSessionLocal() as session:
+        await seed_users(session)
+        await seed_products(session, spec)
+        await session.commit()
+
+
+async def run_suite(args: argparse.Namespace) -> dict[str, Any]:
+    results: list[dict[str, Any]] = []
+    for size in sorted(args.sizes):
+        await prepare(size)
+        for target in args.targets:
+            if target == "inprocess":
+                results.extend(await run_scenarios(Context(target, AsyncClient(app=app), size, "http://testserver"), args))
+                continue
+            process, base_url = await start_uvicorn()
+            try:
+                async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+                    results.extend(await run_scenarios(Context(target, client, size, base_url), args))
+            finally:
+                process.terminate()
+                process.wait()
+    await engine.dispose()
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": "sqlite",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline_path: Path, current_path: Path, threshold: float) -> int:
+    baseline = {(r["target"], r["scenario"], r["size"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    current = {(r["target"], r["scenario"], r["size"]): r for r in json.loads(current_path.read_text())["results"]}
+    regressions = []
+    for key in sorted(baseline.keys() & current.keys(), key=str):
+        old, new = baseline[key], current[key]
+        p95_change = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps_change = new["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        failed = p95_change > threshold or rps_change < -threshold
+        print(f"{'FAIL' if failed else 'ok':<4} {'/'.join(map(str, key)):<40} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}")
+        if failed:
+            regressions.append(key)
+    for key in sorted(baseline.keys() - current.keys(), key=str):
+        print(f"miss {'/'.join(map(str, key))} (not in {current_path.name})")
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run the scenarios and write JSON results")
+    run.add_argument("--targets", nargs="+", choices=["inprocess", "uvicorn"], default=["inprocess"])
+    run.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000])
+    run.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    run.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--subscribers", type=int, default=50, help="WebSocket clients for ws-fanout")
+    run.add_argument("--out", type=Path, default=Path("api-bench.json"))
+    check = sub.add_parser("compare", help="fail when a scenario regresses against a baseline")
+    check.add_argument("baseline", type=Path)
+    check.add_argument("current", type=Path)
+    check.add_argument("--threshold", type=float, default=0.15, help="allowed relative p95 increase / throughput drop")
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args.baseline, args.current, args.threshold))
+    report = asyncio.run(run_suite(args))
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"wrote {len(report['results'])} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
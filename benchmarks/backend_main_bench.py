@@ -0,0 +1,569 @@
+"""Micro-benchmarks for the in-memory engine in ``backend_main.py``.
+
+Usage::
+
+    python benchmarks/backend_main_bench.py search --rows 100000 1000000
+    python benchmarks/backend_main_bench.py persistence --rows 1000000 --writes 20000
+    python benchmarks/backend_main_bench.py rows --rows 1000000
+    python benchmarks/backend_main_bench.py snapshots --rows 1000000 --readers 4 --writers 2
+    python benchmarks/backend_main_bench.py point-ops --rows 100000 1000000
+    python benchmarks/backend_main_bench.py serialize --page-size 100
+    python benchmarks/backend_main_bench.py query-cache --rows 1000000
+    python benchmarks/backend_main_bench.py pool --rows 1000000 --workers 1 2 4 8
+    python benchmarks/backend_main_bench.py catalogue --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import backend_main as bm  # noqa: E402
+
+CATEGORIES = ("Electronics", "Accessories", "Smartphones", "Wearables", "Audio", "Tablets")
+WORDS = ("oppo", "reno", "find", "pro", "ultra", "lite", "case", "charger", "buds", "watch", "band", "cable", "glass")
+
+
+def synthetic_dicts(total: int, seed: int = 42) -> list[dict[str, Any]]:
+    """Rows in the pre-``ProductRow`` layout (one dict with datetimes per product)."""
+
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for idx in range(1, total + 1):
+        words = " ".join(rnd.choice(WORDS) for _ in range(3))
+        rows.append(
+            {
+                "id": idx,
+                "title": f"{words.title()} {idx}",
+                "category": rnd.choice(CATEGORIES),
+                "price": round(rnd.uniform(10, 1500), 2),
+                "stock": rnd.randint(0, 500),
+                "available": rnd.random() > 0.3,
+                "description": None if idx % 5 == 0 else f"SKU {idx:08d} {rnd.choice(WORDS)}",
+                "created_at": base + timedelta(minutes=idx),
+                "updated_at": base + timedelta(minutes=idx, seconds=rnd.randint(0, 3600)),
+            }
+        )
+    return rows
+
+
+def synthetic_rows(total: int, seed: int = 42) -> list[bm.ProductRow]:
+    return [bm.ProductRow.from_dict(row) for row in synthetic_dicts(total, seed)]
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": statistics.median(samples), "max_ms": max(samples)}
+
+
+def bench_search(rows_list: list[int], repeat: int) -> None:
+    needles = ("reno pro", "00004242", "charger", "wearables", "zz-no-match")
+    for total in rows_list:
+        rows = synthetic_rows(total)
+        gc.collect()
+        snapshot = bm.Snapshot.build(rows)
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = bm.TrigramIndex()
+        index.rebuild(rows)
+        build_s = time.perf_counter() - started
+        traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"rows={total:>9} build={build_s:6.2f}s index_mem={traced / 2**20:7.1f}MiB "
+            f"(getsizeof {index.memory_usage() / 2**20:.1f}MiB, {traced / total:.0f} B/row)"
+        )
+        for needle in needles:
+            scan = timed(lambda: bm._apply_search(snapshot, needle), repeat)
+            indexed = timed(lambda: bm._apply_search(snapshot.rows_for(index.lookup(needle)), needle), repeat)
+            lookup = timed(lambda: index.lookup(needle), repeat)
+            hits = len(bm._apply_search(snapshot.rows_for(index.lookup(needle)), needle))
+            print(
+                f"  q={needle!r:<15} hits={hits:>8} scan={scan['p50_ms']:8.1f}ms "
+                f"indexed={indexed['p50_ms']:8.1f}ms (lookup {lookup['p50_ms']:.2f}ms)"
+            )
+
+
+async def _write_load(store: bm.WriteAheadStore, rows: list[dict[str, Any]], writers: int) -> float:
+    queue = iter(rows)
+
+    async def writer() -> None:
+        for row in queue:
+            await store.commit(store.log_upsert(row))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    return time.perf_counter() - started
+
+
+def bench_persistence(total: int, writes: int, writers: int, group_commit_ms: float) -> None:
+    rows = synthetic_rows(total)
+    updates = rows[:writes]
+    for policy in bm.WriteAheadStore.POLICIES:
+        directory = tempfile.mkdtemp(prefix="bm-wal-")
+        try:
+            store = bm.WriteAheadStore(directory, fsync_policy=policy, group_commit_ms=group_commit_ms, snapshot_every=10**12)
+            store.recover()
+            elapsed = asyncio.run(_write_load(store, updates, writers))
+            asyncio.run(store.close())
+            print(f"policy={policy:<8} writers={writers} writes={writes} -> {writes / elapsed:10.0f} writes/s")
+        finally:
+            shutil.rmtree(directory)
+
+    directory = tempfile.mkdtemp(prefix="bm-recover-")
+    try:
+        store = bm.WriteAheadStore(directory, fsync_policy="off", snapshot_every=10**12)
+        store.recover()
+        started = time.perf_counter()
+        store.write_snapshot(rows, total + 1, store.rotate())
+        snapshot_s = time.perf_counter() - started
+        asyncio.run(_write_load(store, updates, 1))
+        asyncio.run(store.close())
+        size = (Path(directory) / store.SNAPSHOT).stat().st_size
+        del store
+        gc.collect()
+        started = time.perf_counter()
+        recovered, _ = bm.WriteAheadStore(directory).recover()
+        recover_s = time.perf_counter() - started
+        print(
+            f"snapshot rows={total} size={size / 2**20:.1f}MiB ({size / total:.0f} B/row) write={snapshot_s:.2f}s; "
+            f"recovery snapshot+{writes} WAL records -> {len(recovered)} rows in {recover_s:.2f}s"
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+def _measure_layout(build: Callable[[], list[Any]], freeze: bool = False) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    rows = build()
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    pauses = []
+    for _ in range(3):
+        started = time.perf_counter()
+        gc.collect()
+        pauses.append((time.perf_counter() - started) * 1000)
+    if freeze:
+        gc.unfreeze()
+    per_row = traced / len(rows)
+    del rows
+    gc.collect()
+    return per_row, statistics.median(pauses)
+
+
+def bench_rows(total: int) -> None:
+    layouts = (
+        ("dict+datetime", lambda: synthetic_dicts(total), False),
+        ("ProductRow", lambda: synthetic_rows(total), False),
+        ("ProductRow+freeze", lambda: synthetic_rows(total), True),
+    )
+    for name, build, freeze in layouts:
+        per_row, pause = _measure_layout(build, freeze)
+        print(f"{name:<18} rows={total} {per_row:6.0f} B/row  full gc.collect() {pause:7.1f}ms")
+
+
+class LockedList:
+    """The pre-snapshot layout: readers copy the whole list under the writers' lock."""
+
+    def __init__(self, rows: list[bm.ProductRow]) -> None:
+        self.rows = list(rows)
+        self.lock = threading.Lock()
+
+    def begin_read(self) -> list[bm.ProductRow]:
+        with self.lock:
+            return list(self.rows)
+
+    def write(self, index: int, row: bm.ProductRow) -> None:
+        with self.lock:
+            self.rows[index] = row
+
+
+class CowSnapshots:
+    """``bm.Snapshot`` publishing as done by the endpoints."""
+
+    def __init__(self, rows: list[bm.ProductRow]) -> None:
+        self.current = bm.Snapshot.build(rows)
+        self.lock = threading.Lock()
+
+    def begin_read(self) -> bm.Snapshot:
+        return self.current
+
+    def write(self, index: int, row: bm.ProductRow) -> None:
+        with self.lock:
+            self.current = self.current.replace(index, row)
+
+
+def _run_mixed(store: Any, rows: list[bm.ProductRow], readers: int, writers: int, duration: float, scan: bool) -> tuple[int, int]:
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0] * writers
+    price_filter = [{"field": "price", "operator": "between", "value": (100.0, 101.0)}]
+
+    def reader(slot: int) -> None:
+        while not stop.is_set():
+            rows = store.begin_read()
+            if scan:
+                sum(1 for _ in bm._apply_filters(rows, price_filter))
+            else:
+                list(islice(iter(rows), 20))
+            reads[slot] += 1
+
+    def writer(slot: int) -> None:
+        rnd = random.Random(slot)
+        while not stop.is_set():
+            index = rnd.randrange(len(rows))
+            store.write(index, rows[index].copy())
+            writes[slot] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads), sum(writes)
+
+
+def bench_snapshots(total: int, readers: int, writers: int, duration: float) -> None:
+    rows = synthetic_rows(total)
+    for store_cls in (LockedList, CowSnapshots):
+        store = store_cls(rows)
+        begin = timed(store.begin_read, 20)
+        write = timed(lambda: store.write(total // 2, rows[0]), 20)
+        print(f"{store_cls.__name__:<12} rows={total} begin_read={begin['p50_ms'] * 1000:9.1f}us write={write['p50_ms'] * 1000:7.1f}us")
+        for scan in (False, True):
+            read_ops, write_ops = _run_mixed(store, rows, readers, writers, duration, scan)
+            kind = "full-scan" if scan else "first-page"
+            print(
+                f"  {kind:<10} readers={readers} writers={writers}: "
+                f"{read_ops / duration:9.1f} reads/s {write_ops / duration:9.1f} writes/s"
+            )
+
+
+def bench_point_ops(rows_list: list[int], repeat: int) -> None:
+    for total in rows_list:
+        rows = synthetic_rows(total)
+        rnd = random.Random(total)
+        legacy = list(rows)
+        holder = [bm.Snapshot.build(rows)]
+
+        def ids(count: int) -> Iterator[int]:
+            return iter(rnd.sample(range(1, total + 1), count))
+
+        def legacy_update(targets: Iterator[int] = ids(repeat)) -> None:
+            product_id = next(targets)
+            index = next(i for i, row in enumerate(legacy) if row.id == product_id)
+            legacy[index] = legacy[index].copy()
+
+        def legacy_delete(targets: Iterator[int] = ids(repeat)) -> None:
+            product_id = next(targets)
+            legacy.pop(next(i for i, row in enumerate(legacy) if row.id == product_id))
+
+        def update(targets: Iterator[int] = ids(repeat)) -> None:
+            snapshot = holder[0]
+            slot = snapshot.locate(next(targets))
+            holder[0] = snapshot.replace(slot, snapshot.row_at(slot).copy())
+
+        def delete(targets: Iterator[int] = ids(repeat)) -> None:
+            snapshot = holder[0]
+            slot = snapshot.locate(next(targets))
+            if slot is not None:
+                holder[0] = snapshot.remove(slot)
+
+        def create(next_id: Iterator[int] = iter(range(total + 1, total + repeat + 1))) -> None:
+            row = rows[0].copy()
+            row.id = next(next_id)
+            holder[0] = holder[0].append(row)
+
+        results = {
+            "legacy update": timed(legacy_update, min(repeat, 20)),
+            "legacy delete": timed(legacy_delete, min(repeat, 20)),
+            "update": timed(update, repeat),
+            "delete": timed(delete, repeat),
+            "create": timed(create, repeat),
+        }
+        print(f"rows={total:>9} " + " ".join(f"{name}={stats['p50_ms'] * 1000:8.1f}us" for name, stats in results.items()))
+
+        snapshot = holder[0]
+        for product_id in rnd.sample(range(1, total + 1), total // 4):
+            slot = snapshot.locate(product_id)
+            if slot is not None:
+                snapshot = snapshot.remove(slot)
+        compact = timed(snapshot.compacted, 1)
+        print(f"  compaction with {snapshot.tombstones} tombstones: {compact['p50_ms']:.0f}ms (background thread)")
+
+
+def bench_serialize(page_size: int, repeat: int) -> None:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    rows = synthetic_rows(page_size * repeat)
+    route = next(r for r in bm.app.routes if getattr(r, "path", None) == "/products" and "GET" in r.methods)
+    meta = {"page": 1, "page_size": page_size, "total": len(rows), "total_pages": repeat, "sort": "id,asc", "filters": [], "q": None}
+    pages = [rows[i : i + page_size] for i in range(0, len(rows), page_size)]
+
+    async def legacy(page: list[bm.ProductRow]) -> bytes:
+        model = bm.PaginatedProducts(items=[row.to_product() for row in page], **meta)
+        content = await serialize_response(field=route.response_field, response_content=model, is_coroutine=True)
+        return JSONResponse(content=jsonable_encoder(content)).body
+
+    def assembled(page: list[bm.ProductRow]) -> bytes:
+        body = b'{"items":[' + b",".join(row.to_json() for row in page) + b"]," + bm._dumps(meta)[1:]
+        return bm.Response(content=body, media_type="application/json").body
+
+    loop = asyncio.new_event_loop()
+    cursor = iter(pages)
+    results = {
+        "pydantic models": timed(lambda: loop.run_until_complete(legacy(pages[0])), repeat),
+        "cold row cache": timed(lambda: assembled(next(cursor)), repeat),
+        "warm row cache": timed(lambda: assembled(pages[0]), repeat),
+    }
+    loop.close()
+    body = assembled(pages[1])
+    assert json.loads(body) == json.loads(asyncio.run(legacy(pages[1])))
+    print(f"page_size={page_size} body={len(body)} bytes")
+    for name, stats in results.items():
+        print(f"  {name:<16} p50={stats['p50_ms'] * 1000:8.1f}us max={stats['max_ms'] * 1000:8.1f}us")
+
+
+def bench_query_cache(total: int, repeat: int) -> None:
+    bm._install(synthetic_rows(total), total + 1)
+    queries = {
+        "filter+sort": {"filters": '[{"field":"category","operator":"eq","value":"Audio"},{"field":"price","operator":"gte","value":100}]', "sort": "price,desc"},
+        "search+relevance": {"q": "reno pro", "sort": "relevance,desc"},
+        "full scan sort": {"sort": "updated_at,desc;id,asc"},
+    }
+    loop = asyncio.new_event_loop()
+
+    def fetch(params: dict[str, Any], page: int) -> bytes:
+        call = {"page": page, "page_size": 20, "q": None, "filters": None, "field": None, "operator": None, "value": None, "sort": None}
+        return loop.run_until_complete(bm.list_products(**{**call, **params})).body
+
+    print(f"rows={total}")
+    for name, params in queries.items():
+        def cold() -> None:
+            bm._QUERY_CACHE.clear()
+            fetch(params, 1)
+
+        cold_stats = timed(cold, repeat)
+        total_hits = json.loads(fetch(params, 1))["total"]
+        last_page = max(1, (total_hits + 19) // 20)
+        first = timed(lambda: fetch(params, 1), repeat * 20)
+        deep = timed(lambda: fetch(params, last_page), repeat * 20)
+        print(
+            f"  {name:<17} hits={total_hits:>8} miss={cold_stats['p50_ms']:8.2f}ms "
+            f"hit page 1={first['p50_ms'] * 1000:7.1f}us hit page {last_page}={deep['p50_ms'] * 1000:7.1f}us"
+        )
+    for params in queries.values():
+        fetch(params, 1)
+    loop.close()
+    cache = bm._QUERY_CACHE
+    print(f"  cache: {len(cache._entries)} entries, {cache.used / 2**20:.1f}MiB of {cache.budget / 2**20:.0f}MiB budget")
+
+
+async def _loop_stall(work: Callable[[], Any]) -> tuple[float, float]:
+    """Run ``work`` next to a 1ms ticker; return (elapsed ms, longest tick gap ms)."""
+
+    gaps: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.005)
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    return elapsed * 1000, max(gaps) * 1000
+
+
+def bench_pool(total: int, workers_list: list[int], repeat: int) -> None:
+    bm._install(synthetic_rows(total), total + 1)
+    queries = {
+        "filter+sort": ([{"field": "category", "operator": "eq", "value": "Audio"}, {"field": "price", "operator": "gte", "value": 100.0}], None, "price,desc"),
+        "search": ([], "pro", "relevance,desc"),
+        "full scan sort": ([], None, "updated_at,desc"),
+    }
+    parsed = {name: (filters, needle, bm._parse_sort(sort)) for name, (filters, needle, sort) in queries.items()}
+
+    async def measure(label: str) -> None:
+        results = []
+        for name, (filters, needle, order) in parsed.items():
+            await bm._execute(filters, needle, order, 20)
+            samples = [await _loop_stall(lambda: bm._execute(filters, needle, order, 20)) for _ in range(repeat)]
+            elapsed = statistics.median(sample[0] for sample in samples)
+            stall = statistics.median(sample[1] for sample in samples)
+            results.append(f"{name}={elapsed:7.0f}ms (loop stall {stall:6.0f}ms)")
+        print(f"  {label:<10} " + " ".join(results))
+
+    async def run() -> None:
+        print(f"rows={total} cpus={os.cpu_count()}")
+        await measure("inline")
+        for workers in workers_list:
+            bm._QUERY_POOL = pool = bm.QueryPool(workers)
+            started = time.perf_counter()
+            await bm._execute([], None, [("id", False)], 20)
+            warm = time.perf_counter() - started
+            try:
+                await measure(f"workers={workers}")
+            finally:
+                bm._QUERY_POOL = None
+                pool.close()
+            print(f"  {'':<10} (export + shard decode on first query: {warm:.1f}s)")
+
+    bm.POOL_MIN_ROWS = 0
+    asyncio.run(run())
+
+
+def bench_catalogue(total: int, repeat: int) -> None:
+    rows = synthetic_rows(total)
+    directory = Path(tempfile.mkdtemp(prefix="bm-catalogue-"))
+    try:
+        gc.collect()
+        tracemalloc.start()
+        snapshot = bm.Snapshot.build(rows)
+        index = bm.TrigramIndex()
+        index.rebuild(snapshot)
+        private, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        writer = bm.CatalogueWriter(directory)
+        started = time.perf_counter()
+        writer.rebuild(snapshot)
+        rebuild_s = time.perf_counter() - started
+        file_size = bm.SharedCatalogue.path_for(directory, 1).stat().st_size
+        del rows, index
+        gc.collect()
+
+        reader = bm.SharedCatalogue(directory)
+        tracemalloc.start()
+        reader.view()
+        attach, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"rows={total} per-worker private heap: in-process engine {private / 2**20:.0f}MiB, "
+            f"catalogue reader {attach / 2**20:.1f}MiB (id->slot map); shared file {file_size / 2**20:.0f}MiB "
+            f"built in {rebuild_s:.1f}s"
+        )
+
+        rnd = random.Random(7)
+        targets = iter(rnd.sample(range(1, total + 1), repeat * 2))
+
+        def publish() -> None:
+            product_id = next(targets)
+            row = snapshot.get(product_id).copy()
+            row.price += 1
+            holder[0] = holder[0].replace(holder[0].locate(product_id), row)
+            writer.publish(holder[0], product_id)
+
+        holder = [snapshot]
+        filters = [{"field": "category", "operator": "eq", "value": "Audio"}, {"field": "price", "operator": "gte", "value": 100.0}]
+        order = bm._parse_sort("price,desc")
+        results = {
+            "publish": timed(publish, repeat),
+            "view": timed(reader.view, repeat),
+            "get (engine)": timed(lambda: snapshot.get(rnd.randint(1, total)), repeat),
+            "get (catalogue)": timed(lambda: reader.view().get(rnd.randint(1, total)), repeat),
+        }
+        for name, stats in results.items():
+            print(f"  {name:<16} p50={stats['p50_ms'] * 1000:8.1f}us")
+        for name, source in (("engine", lambda: holder[0]), ("catalogue", reader.view)):
+            scan = timed(lambda: bm._apply_sort(bm._apply_filters(source(), filters), order), 3)
+            print(f"  filter+sort ({name}) p50={scan['p50_ms']:8.0f}ms")
+        writer.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="scenario", required=True)
+    search = sub.add_parser("search", help="trigram index vs substring scan")
+    search.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    search.add_argument("--repeat", type=int, default=5)
+    persistence = sub.add_parser("persistence", help="WAL write throughput per fsync policy and recovery time")
+    persistence.add_argument("--rows", type=int, default=1_000_000)
+    persistence.add_argument("--writes", type=int, default=20_000)
+    persistence.add_argument("--writers", type=int, default=64)
+    persistence.add_argument("--group-commit-ms", type=float, default=5.0)
+    rows = sub.add_parser("rows", help="bytes per row and GC pause per row layout")
+    rows.add_argument("--rows", type=int, default=1_000_000)
+    snapshots = sub.add_parser("snapshots", help="concurrent read/write throughput: locked copy vs COW snapshots")
+    snapshots.add_argument("--rows", type=int, default=1_000_000)
+    snapshots.add_argument("--readers", type=int, default=4)
+    snapshots.add_argument("--writers", type=int, default=2)
+    snapshots.add_argument("--duration", type=float, default=3.0)
+    point_ops = sub.add_parser("point-ops", help="PUT/DELETE cost: linear scan vs id->slot map with tombstones")
+    point_ops.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    point_ops.add_argument("--repeat", type=int, default=200)
+    serialize = sub.add_parser("serialize", help="list page serialisation: Pydantic models vs cached row JSON")
+    serialize.add_argument("--page-size", type=int, default=100)
+    serialize.add_argument("--repeat", type=int, default=200)
+    query_cache = sub.add_parser("query-cache", help="list latency on result-cache miss vs hit, first and deep pages")
+    query_cache.add_argument("--rows", type=int, default=1_000_000)
+    query_cache.add_argument("--repeat", type=int, default=5)
+    pool = sub.add_parser("pool", help="list query latency and event-loop stall: inline vs process pool")
+    pool.add_argument("--rows", type=int, default=1_000_000)
+    pool.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    pool.add_argument("--repeat", type=int, default=3)
+    catalogue = sub.add_parser("catalogue", help="per-worker memory, publish cost and reads: private engine vs shared catalogue")
+    catalogue.add_argument("--rows", type=int, default=1_000_000)
+    catalogue.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    if args.scenario == "search":
+        bench_search(args.rows, args.repeat)
+    elif args.scenario == "persistence":
+        bench_persistence(args.rows, args.writes, args.writers, args.group_commit_ms)
+    elif args.scenario == "rows":
+        bench_rows(args.rows)
+    elif args.scenario == "snapshots":
+        bench_snapshots(args.rows, args.readers, args.writers, args.duration)
+    elif args.scenario == "point-ops":
+        bench_point_ops(args.rows, args.repeat)
+    elif args.scenario == "serialize":
+        bench_serialize(args.page_size, args.repeat)
+    elif args.scenario == "query-cache":
+        bench_query_cache(args.rows, args.repeat)
+    elif args.scenario == "pool":
+        bench_pool(args.rows, args.workers, args.repeat)
+    elif args.scenario == "catalogue":
+        bench_catalogue(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
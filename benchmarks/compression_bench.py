@@ -0,0 +1,152 @@
+"""CPU cost of JSON encoding and response compression against bytes saved.
+
+Usage::
+
+    python benchmarks/compression_bench.py --repeat 50 --link-kbps 1000
+
+Payloads (synthetic products shaped like ``ProductRead``):
+
+* ``page-200``   - one ``GET /api/v1/products/?size=200`` body
+* ``export-10k`` - 10 000 products as NDJSON, compressed as one stream of
+  1 000-row chunks (what ``CompressionMiddleware`` does for streaming bodies)
+* ``ws-batch``   - 50 ``product.updated`` events
+
+For encoding, all rows start from the model: ``stdlib`` is FastAPI's default
+path (JSON-mode dump plus ``JSONResponse``'s ``json.dumps``), ``fast`` is
+``FastJSONResponse`` (same dump, ``app.core.responses.dumps``) and ``pydantic``
+is ``model_dump_json`` as used for the coalesced list body.
+
+For each coding/level the table shows CPU time, output size, bytes saved, and
+the time those saved bytes take on a ``--link-kbps`` link, to weigh CPU
+against transfer.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.core import compression, responses  # noqa: E402
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.schemas.product import PaginatedProducts, ProductRead  # noqa: E402
+
+EXPORT_CHUNK_ROWS = 1000
+
+
+def products(count: int) -> list[ProductRead]:
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    return [
+        ProductRead(
+            id=index + 1,
+            title=f"OPPO Reno{index % 12} {['Black', 'Blue', 'Green'][index % 3]} {index:05d}",
+            price=Decimal(5000 + index * 37 % 90000) / 100,
+            in_stock=index % 3 != 0,
+            created_at=now - timedelta(minutes=index),
+            updated_at=now - timedelta(seconds=index * 7),
+        )
+        for index in range(count)
+    ]
+
+
+def page(items: list[ProductRead]) -> PaginatedProducts:
+    sort = {"by": "id", "order": "asc"}
+    return PaginatedProducts(
+        total=100_000,
+        page=1,
+        size=len(items),
+        sort=sort,
+        sort_keys=[sort],
+        filters_applied={},
+        next_offset=len(items),
+        prev_offset=None,
+        items=items,
+    )
+
+
+def best_us(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e6
+
+
+def compress_chunks(coding: str, level: int, chunks: list[bytes]) -> bytes:
+    compressor = compression._Compressor(coding, gzip_level=level, brotli_quality=level)
+    out = [compressor.chunk(chunk) for chunk in chunks[:-1]]
+    out.append(compressor.finish(chunks[-1]))
+    return b"".join(out)
+
+
+def codings() -> list[tuple[str, int]]:
+    levels = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("deflate", 6)]
+    if compression.brotli is not None:
+        levels += [("br", 1), ("br", 4), ("br", 11)]
+    return levels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--link-kbps", type=float, default=1000.0, help="link speed used to price saved bytes")
+    parser.add_argument("--out", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    page_model = page(products(200))
+    export_rows = [item.model_dump(mode="json") for item in products(10_000)]
+    events = [{"event": "product.updated", "data": item.model_dump(mode="json")} for item in products(50)]
+    results: dict[str, Any] = {"encoding": {}, "compression": {}}
+
+    print("JSON encoding, page-200 (µs)")
+    encoders = {
+        "stdlib": lambda: JSONResponse(page_model.model_dump(mode="json")).body,
+        "fast": lambda: FastJSONResponse(page_model.model_dump(mode="json")).body,
+        "pydantic": lambda: page_model.model_dump_json().encode(),
+    }
+    for name, encode in encoders.items():
+        results["encoding"][name] = {"us": round(best_us(encode, args.repeat), 1), "bytes": len(encode())}
+        print(f"  {name:<9} {results['encoding'][name]['us']:9.1f}  {results['encoding'][name]['bytes']:8d} B")
+
+    payloads = {
+        "page-200": [page_model.model_dump_json().encode()],
+        "export-10k": [
+            b"".join(responses.dumps(row) + b"\n" for row in export_rows[start : start + EXPORT_CHUNK_ROWS])
+            for start in range(0, len(export_rows), EXPORT_CHUNK_ROWS)
+        ],
+        "ws-batch": [responses.dumps(events)],
+    }
+    print(f"\nCompression (saved bytes priced at {args.link_kbps:g} kbit/s)")
+    print(f"  {'payload':<11}{'coding':<11}{'cpu µs':>10}{'bytes':>10}{'ratio':>8}{'saved':>10}{'link ms saved':>15}{'µs/KiB saved':>14}")
+    for name, chunks in payloads.items():
+        raw = sum(len(chunk) for chunk in chunks)
+        print(f"  {name:<11}{'identity':<11}{0:10.1f}{raw:10d}{1:8.2f}{0:10d}{0:15.1f}{'-':>14}")
+        rows = []
+        for coding, level in codings():
+            repeat = max(3, args.repeat // (10 if name == "export-10k" or level >= 9 else 1))
+            cpu_us = best_us(lambda: compress_chunks(coding, level, chunks), repeat)
+            size = len(compress_chunks(coding, level, chunks))
+            saved = raw - size
+            link_ms = saved * 8 / args.link_kbps
+            per_kib = cpu_us / (saved / 1024) if saved > 0 else float("inf")
+            label = f"{coding}-{level}"
+            print(f"  {name:<11}{label:<11}{cpu_us:10.1f}{size:10d}{raw / size:8.2f}{saved:10d}{link_ms:15.1f}{per_kib:14.2f}")
+            rows.append({"coding": coding, "level": level, "cpu_us": round(cpu_us, 1), "bytes": size, "saved": saved})
+        results["compression"][name] = {"raw_bytes": raw, "codings": rows}
+    if compression.brotli is None:
+        print("\n(brotli not installed: `pip install brotli` to include br)")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Open-loop load generator for soak-testing a running ``backend/app`` node.
+
+Usage::
+
+    python benchmarks/loadgen.py --base-url http://staging:8000 --rps 200 --duration 3600 \\
+        --mix list=60,facets=10,create=10,update=15,delete=5 --subscribers 20 --out soak.json
+
+Logs in through ``/api/v1/auth/login`` and schedules requests at ``--rps``
+with Poisson (default) or uniform inter-arrival times, independently of how
+fast responses come back (open loop): a slow server builds up in-flight
+requests instead of silently lowering the offered load.
+
+Latency is recorded twice per request into log-bucketed histograms:
+
+* ``response`` - from the *scheduled* send time to completion. This is the
+  coordinated-omission-corrected latency: time a request spent waiting
+  because the generator or the server fell behind is counted.
+* ``service``  - from the actual send to completion (what a closed-loop tool
+  would report).
+
+``--max-inflight`` caps the correction: an arrival that finds that many
+requests in flight is not sent. It is counted as a ``skipped`` error and its
+wait so far (scheduled time to drop) goes into ``response`` - a lower bound,
+so past the cap the corrected percentiles understate what a client would see.
+
+WS subscribers receive the product events; delivery lag is measured from
+the send of the write that caused the event (matched by title marker for
+create/update, by id for delete). Every ``--interval`` seconds a line with
+throughput, error rate, latency percentiles and WS lag is printed, and the
+same series goes into ``--out``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+import websockets
+
+OPERATIONS = ("list", "facets", "create", "update", "delete")
+
+
+class Histogram:
+    """Log-bucketed latency histogram (about 1% relative precision), mergeable."""
+
+    GROWTH = 1.01
+
+    def __init__(self) -> None:
+        self.buckets: Counter[int] = Counter()
+        self.count = 0
+        self.max_ms = 0.0
+
+    def record(self, value_ms: float) -> None:
+        self.buckets[int(math.log(max(value_ms, 0.001) * 1000, self.GROWTH))] += 1
+        self.count += 1
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def merge(self, other: Histogram) -> None:
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * fraction)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.GROWTH ** (bucket + 1) / 1000, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            **{f"p{label}_ms": round(self.percentile(q), 3) for label, q in (("50", 0.5), ("90", 0.9), ("99", 0.99), ("999", 0.999))},
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class Window:
+    """Counters for one reporting interval."""
+
+    def __init__(self) -> None:
+        self.response = Histogram()
+        self.service = Histogram()
+        self.ws_lag = Histogram()
+        self.per_op: dict[str, Histogram] = {op: Histogram() for op in OPERATIONS}
+        self.completed = 0
+        self.errors: Counter[str] = Counter()
+        self.skipped = 0
+
+    def merge(self, other: Window) -> None:
+        self.response.merge(other.response)
+        self.service.merge(other.service)
+        self.ws_lag.merge(other.ws_lag)
+        for op, histogram in other.per_op.items():
+            self.per_op[op].merge(histogram)
+        self.completed += other.completed
+        self.errors.update(other.errors)
+        self.skipped += other.skipped
+
+
+class LoadGenerator:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.rnd = random.Random(args.seed)
+        self.window = Window()
+        self.total = Window()
+        self.series: list[dict[str, Any]] = []
+        self.owned: list[int] = []
+        self.pending_events: dict[Any, float] = {}
+        self.inflight = 0
+        self.token = ""
+
+    async def login(self, client: httpx.AsyncClient) -> None:
+        response = await client.post(
+            "/api/v1/auth/login", data={"username": self.args.email, "password": self.args.password}
+        )
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {self.token}"
+
+    def choose(self) -> str:
+        op = self.rnd.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if op in {"update", "delete"} and not self.owned:
+            return "create"
+        return op
+
+    async def call(self, client: httpx.AsyncClient, op: str) -> httpx.Response:
+        marker = f"loadgen {uuid.uuid4().hex[:12]}"
+        if op == "list":
+            params: dict[str, Any] = {"page": self.rnd.randint(1, 50), "size": 20}
+            if self.rnd.random() < 0.5:
+                low = self.rnd.randint(50, 1200)
+                params.update(price_from=low, price_to=low + 200)
+            return await client.get("/api/v1/products/", params=params)
+        if op == "facets":
+            return await client.get("/api/v1/products/facets", params={"in_stock": self.rnd.random() < 0.5})
+        if op == "create":
+            self.pending_events[marker] = time.perf_counter()
+            response = await client.post(
+                "/api/v1/products/", json={"title": marker, "price": f"{self.rnd.uniform(50, 1500):.2f}", "in_stock": True}
+            )
+            if response.status_code == 201:
+                self.owned.append(response.json()["id"])
+            return response
+        product_id = self.owned[self.rnd.randrange(len(self.owned))]
+        if op == "update":
+            self.pending_events[marker] = time.perf_counter()
+            return await client.put(f"/api/v1/products/{product_id}", json={"title": marker})
+        self.owned.remove(product_id)
+        self.pending_events[("id", product_id)] = time.perf_counter()
+        return await client.delete(f"/api/v1/products/{product_id}")
+
+    async def fire(self, client: httpx.AsyncClient, op: str, scheduled: float) -> None:
+        started = time.perf_counter()
+        try:
+            response = await self.call(client, op)
+            failed = None if response.status_code < 400 else str(response.status_code)
+        except httpx.HTTPError as exc:
+            failed = type(exc).__name__
+        finally:
+            self.inflight -= 1
+        finished = time.perf_counter()
+        window = self.window
+        if failed:
+            window.errors[f"{op}:{failed}"] += 1
+        window.completed += 1
+        window.response.record((finished - scheduled) * 1000)
+        window.service.record((finished - started) * 1000)
+        window.per_op[op].record((finished - scheduled) * 1000)
+
+    async def subscriber(self, stop: asyncio.Event) -> None:
+        url = self.args.base_url.replace("http", "ws", 1) + f"/api/v1/ws/products?token={self.token}"
+        async with websockets.connect(url) as socket:
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(socket.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.perf_counter()
+                message = json.loads(raw)
+                data = message.get("data") or {}
+                if message.get("event") == "product.deleted":
+                    key = ("id", data.get("id"))
+                else:
+                    key = data.get("title") or (data.get("changes") or {}).get("title")
+                sent = self.pending_events.get(key)
+                if sent is not None:
+                    self.window.ws_lag.record((received - sent) * 1000)
+
+    def report(self, elapsed: float, interval: float) -> None:
+        window, self.window = self.window, Window()
+        self.total.merge(window)
+        errors = sum(window.errors.values())
+        offered = window.completed + window.skipped
+        row = {
+            "elapsed_s": round(elapsed, 1),
+            "throughput_rps": round(window.completed / interval, 1),
+            "error_rate": round(errors / offered, 4) if offered else 0.0,
+            "inflight": self.inflight,
+            "skipped": window.skipped,
+            "response": window.response.summary(),
+            "service": window.service.summary(),
+            "ws_lag": window.ws_lag.summary(),
+        }
+        self.series.append(row)
+        # Events for writes older than a few intervals will not be matched any more.
+        horizon = time.perf_counter() - 5 * interval
+        self.pending_events = {key: sent for key, sent in self.pending_events.items() if sent > horizon}
+        print(
+            f"[{row['elapsed_s']:7.1f}s] {row['throughput_rps']:7.1f} rps  err={row['error_rate']:.2%}"
+            f"  p50={row['response']['p50_ms']:7.1f}ms p99={row['response']['p99_ms']:7.1f}ms"
+            f" (service p99={row['service']['p99_ms']:7.1f}ms)"
+            f"  ws lag p50={row['ws_lag']['p50_ms']:6.1f}ms p99={row['ws_lag']['p99_ms']:6.1f}ms"
+            f"  inflight={self.inflight}",
+            flush=True,
+        )
+
+    async def run(self) -> dict[str, Any]:
+        args = self.args
+        limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            await self.login(client)
+            stop = asyncio.Event()
+            subscribers = [asyncio.create_task(self.subscriber(stop)) for _ in range(args.subscribers)]
+            tasks: set[asyncio.Task] = set()
+            began = next_report = time.perf_counter()
+            scheduled = began
+            end = began + args.duration
+            while scheduled < end:
+                now = time.perf_counter()
+                if now >= next_report + args.interval:
+                    next_report += args.interval
+                    self.report(next_report - began, args.interval)
+                if scheduled > now:
+                    await asyncio.sleep(scheduled - now)
+                if self.inflight >= args.max_inflight:
+                    # Offered load the server cannot absorb: not sent, but its wait still counts.
+                    self.window.skipped += 1
+                    self.window.errors["skipped"] += 1
+                    self.window.response.record((time.perf_counter() - scheduled) * 1000)
+                else:
+                    self.inflight += 1
+                    task = asyncio.create_task(self.fire(client, self.choose(), scheduled))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                gap = self.rnd.expovariate(args.rps) if args.arrivals == "poisson" else 1 / args.rps
+                scheduled += gap
+            if tasks:
+                await asyncio.wait(tasks, timeout=args.timeout)
+            self.report(time.perf_counter() - began, max(time.perf_counter() - next_report, 1e-3))
+            stop.set()
+            await asyncio.gather(*subscribers, return_exceptions=True)
+        total = self.total
+        offered = total.completed + total.skipped
+        return {
+            "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+            "totals": {
+                "completed": total.completed,
+                "skipped": total.skipped,
+                "errors": dict(total.errors),
+                "error_rate": round(sum(total.errors.values()) / offered, 4) if offered else 0.0,
+                "response": total.response.summary(),
+                "service": total.service.summary(),
+                "ws_lag": total.ws_lag.summary(),
+                "per_operation": {op: histogram.summary() for op, histogram in total.per_op.items() if histogram.count},
+            },
+            "series": self.series,
+        }
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="admin@oppo.kz")
+    parser.add_argument("--password", default="Admin123!")
+    parser.add_argument("--rps", type=float, default=50.0, help="target arrival rate")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of offered load")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--mix", default="list=70,facets=10,create=8,update=8,delete=4")
+    parser.add_argument("--subscribers", type=int, default=5, help="WS clients listening for product events")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds per report line")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="arrivals beyond this many in-flight are skipped (and cap the latency correction)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="write config, totals and the per-interval series as JSON")
+    args = parser.parse_args()
+    report = asyncio.run(LoadGenerator(args).run())
+    totals = report["totals"]
+    print(json.dumps(totals, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+    sys.exit(1 if totals["completed"] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
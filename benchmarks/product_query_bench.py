@@ -0,0 +1,143 @@
+"""Statement build/compile overhead per request for the product list query.
+
+Usage::
+
+    python benchmarks/product_query_bench.py --rows 2000 --requests 3000
+
+Three ways to run the same filtered, sorted page query with values that change
+on every request:
+
+* ``rebuilt, no cache``   - new statement per request, compiled cache disabled
+* ``rebuilt, cached``     - new statement per request, SQLAlchemy compiled cache
+* ``shape cache``         - ``query.list_statements`` reused per shape, only
+  the bound values change
+
+Timings use a synchronous in-memory SQLite engine so that driver and network
+time stay small next to the Python-side statement work.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from sqlalchemy import and_, asc, create_engine, desc, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services.products import query  # noqa: E402
+
+import app.models.user  # noqa: E402,F401  (registers the users table)
+
+
+def request_specs(rnd: random.Random) -> list[query.FilterSpec]:
+    low = rnd.randint(0, 500)
+    return [
+        query.parse_filter("title", "contains", f"item {rnd.randint(0, 9)}"),
+        query.parse_filter("price", "between", [low, low + rnd.randint(10, 500)]),
+        query.parse_filter("in_stock", "eq", rnd.random() < 0.5),
+        query.parse_filter("id", "in", rnd.sample(range(1, 5000), rnd.randint(1, 20))),
+    ]
+
+
+ORDER = query.parse_sort("price,desc;title,asc")
+
+
+def rebuilt(specs: list[query.FilterSpec]) -> tuple[Any, Any]:
+    conditions = query.compile_filters(specs)
+    page = (
+        select(Product)
+        .where(and_(*conditions))
+        .order_by(*(desc(getattr(Product, f)) if d else asc(getattr(Product, f)) for f, d in ORDER))
+        .offset(20)
+        .limit(20)
+    )
+    count = select(func.count()).select_from(Product).where(and_(*conditions))
+    return page, count
+
+
+def run_rebuilt(session: Session, specs: list[query.FilterSpec]) -> None:
+    page, count = rebuilt(specs)
+    session.execute(page).scalars().all()
+    session.execute(count).scalar_one()
+
+
+def run_shape(session: Session, specs: list[query.FilterSpec]) -> None:
+    page, count = query.list_statements(query.shape_of(specs, ORDER))
+    values = query.bind_values(specs)
+    session.execute(page, {**values, "offset": 20, "limit": 20}).scalars().all()
+    session.execute(count, values).scalar_one()
+
+
+def prepare_rebuilt(session: Session, specs: list[query.FilterSpec]) -> None:
+    page, count = rebuilt(specs)
+    page.compile(session.bind)
+    count.compile(session.bind)
+
+
+def prepare_shape(session: Session, specs: list[query.FilterSpec]) -> None:
+    query.list_statements(query.shape_of(specs, ORDER))
+    query.bind_values(specs)
+
+
+def measure(fn: Callable[[Session, list[query.FilterSpec]], None], session: Session, requests: int) -> dict[str, float]:
+    rnd = random.Random(1)
+    batches = [request_specs(rnd) for _ in range(requests)]
+    for specs in batches[:50]:
+        fn(session, specs)
+    samples = []
+    for specs in batches:
+        started = time.perf_counter()
+        fn(session, specs)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return {"p50_us": statistics.median(samples), "p95_us": samples[int(len(samples) * 0.95)]}
+
+
+def seeded_engine(rows: int, cache_size: int) -> Any:
+    engine = create_engine("sqlite://", query_cache_size=cache_size)
+    Base.metadata.create_all(engine)
+    rnd = random.Random(0)
+    with Session(engine) as session:
+        session.add_all(
+            Product(title=f"Item {i % 10} #{i}", price=Decimal(rnd.randint(100, 100_000)) / 100, in_stock=i % 3 != 0)
+            for i in range(rows)
+        )
+        session.commit()
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    cases = [
+        ("rebuilt, no cache", 0, run_rebuilt, prepare_rebuilt),
+        ("rebuilt, cached", 500, run_rebuilt, None),
+        ("shape cache", 500, run_shape, prepare_shape),
+    ]
+    print(f"rows={args.rows} requests={args.requests} (page + count per request)")
+    for name, cache_size, run, prepare in cases:
+        engine = seeded_engine(args.rows, cache_size)
+        with Session(engine) as session:
+            total = measure(run, session, args.requests)
+            line = f"  {name:<18} request p50={total['p50_us']:7.0f}us p95={total['p95_us']:7.0f}us"
+            if prepare is not None:
+                prep = measure(prepare, session, args.requests)
+                line += f" | statement prep p50={prep['p50_us']:6.1f}us"
+        print(line)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Mixed read/write load against a file-backed SQLite database, stock vs tuned.
+
+Usage::
+
+    python benchmarks/sqlite_profile_bench.py --rows 20000 --clients 16 --seconds 10 --write-ratio 0.2
+
+``stock`` is ``create_async_engine(url)`` as the app used to run it: default
+pragmas (rollback journal, ``synchronous=FULL``) and one connection per
+session for reads and writes alike. ``tuned`` is the ``app.db.session``
+profile: WAL and the other pragmas on every connection, a pooled read engine
+and a single-connection writer engine.
+
+Each client loops for ``--seconds``: a write updates one product's price and
+commits, a read fetches a filtered page of 20 plus its count.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from sqlalchemy import func, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.core.settings import Settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import create_engine_for, create_writer_engine  # noqa: E402
+from app.models.product import Product  # noqa: E402
+
+import app.models.user  # noqa: E402,F401  (registers the users table)
+
+
+async def seed(url: str, rows: int) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            Product.__table__.insert(),
+            [{"title": f"Item {i % 50} #{i}", "price": Decimal(i % 5000) / 10, "in_stock": i % 3 != 0} for i in range(rows)],
+        )
+    await engine.dispose()
+
+
+def profile(name: str, url: str) -> tuple[list[AsyncEngine], Any, Any]:
+    if name == "stock":
+        engine = create_async_engine(url)
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        return [engine], factory, factory
+    config = Settings(db_pool_size=8, db_max_overflow=8, db_pool_prewarm=False)
+    reader = create_engine_for(url, config)
+    writer = create_writer_engine(url, config)
+    engines = [reader, writer]
+    return (
+        engines,
+        async_sessionmaker(bind=reader, expire_on_commit=False, class_=AsyncSession),
+        async_sessionmaker(bind=writer, expire_on_commit=False, class_=AsyncSession),
+    )
+
+
+async def client(rows: int, seconds: float, write_ratio: float, readers: Any, writers: Any, seed_value: int, out: dict) -> None:
+    rnd = random.Random(seed_value)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        kind = "write" if rnd.random() < write_ratio else "read"
+        try:
+            if kind == "write":
+                async with writers() as session:
+                    await session.execute(
+                        update(Product).where(Product.id == rnd.randint(1, rows)).values(price=Decimal(rnd.randint(1, 99999)) / 100)
+                    )
+                    await session.commit()
+            else:
+                low = rnd.randint(0, 400)
+                condition = Product.price.between(low, low + 50), Product.in_stock.is_(True)
+                async with readers() as session:
+                    await session.execute(select(Product).where(*condition).order_by(Product.price).limit(20))
+                    await session.execute(select(func.count()).select_from(Product).where(*condition))
+        except OperationalError:
+            out["errors"] += 1
+            continue
+        out[kind].append((time.perf_counter() - started) * 1000)
+
+
+def summary(samples: list[float]) -> str:
+    if not samples:
+        return "n=0"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"n={len(samples):6d} p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms"
+
+
+async def run(name: str, args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        await seed(url, args.rows)
+        engines, readers, writers = profile(name, url)
+        out: dict[str, Any] = {"read": [], "write": [], "errors": 0}
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(client(args.rows, args.seconds, args.write_ratio, readers, writers, i, out) for i in range(args.clients))
+        )
+        elapsed = time.perf_counter() - started
+        for engine in engines:
+            await engine.dispose()
+    total = len(out["read"]) + len(out["write"])
+    print(f"{name:<6} {total / elapsed:8.0f} ops/s  errors={out['errors']}")
+    print(f"       read  {summary(out['read'])}")
+    print(f"       write {summary(out['write'])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--profiles", nargs="+", default=["stock", "tuned"], choices=["stock", "tuned"])
+    args = parser.parse_args()
+    print(f"rows={args.rows} clients={args.clients} seconds={args.seconds} write_ratio={args.write_ratio}")
+    for name in args.profiles:
+        asyncio.run(run(name, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Bytes per event and server CPU for WebSocket fan-out to many subscribers.
+
+Usage::
+
+    python benchmarks/ws_fanout_bench.py --subscribers 10000 --events 200
+
+Each event is a ``product.updated`` for a synthetic product where one or two
+fields change. Variants:
+
+* ``full-json``    - the whole product as JSON (the pre-diff payload)
+* ``diff-json``    - ``product_diff`` as JSON
+* ``diff-cbor``    - ``product_diff`` as CBOR
+* ``diff-msgpack`` - ``product_diff`` as msgpack (when msgpack is installed)
+
+Encoding happens once per event (as ``broadcast_product_event`` does), so
+its CPU does not grow with subscribers. permessage-deflate does: each
+connection keeps its own compression context, so the deflate columns run a
+per-connection ``zlib`` stream (``wbits=-12, memLevel=5``, roughly what
+uvicorn's websockets backend negotiates) over ``--sample`` connections and
+scale the result to ``--subscribers``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.api.v1.routes.websocket import ENCODERS  # noqa: E402
+from app.schemas.product import ProductRead  # noqa: E402
+from app.services.products.service import product_diff, product_version  # noqa: E402
+
+
+def updates(count: int, seed: int) -> list[tuple[ProductRead, ProductRead]]:
+    rnd = random.Random(seed)
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    pairs = []
+    for index in range(count):
+        before = ProductRead(
+            id=index + 1,
+            title=f"OPPO Reno{index % 12} {['Black', 'Blue', 'Green'][index % 3]} {index:05d}",
+            price=Decimal(5000 + index * 37 % 90000) / 100,
+            in_stock=index % 3 != 0,
+            created_at=now - timedelta(days=30, minutes=index),
+            updated_at=now - timedelta(seconds=index * 7),
+        )
+        changes: dict[str, Any] = {"updated_at": before.updated_at + timedelta(seconds=rnd.randint(1, 600))}
+        if rnd.random() < 0.7:
+            changes["price"] = before.price + Decimal(rnd.randint(-500, 500)) / 100
+        if rnd.random() < 0.4 or len(changes) == 1:
+            changes["in_stock"] = not before.in_stock
+        pairs.append((before, before.model_copy(update=changes)))
+    return pairs
+
+
+def envelopes(pairs: list[tuple[ProductRead, ProductRead]]) -> dict[str, tuple[Callable[[Any], bytes], list[dict]]]:
+    full = [
+        {"event": "product.updated", "data": {**after.model_dump(mode="json"), "version": product_version(after.updated_at)}}
+        for _, after in pairs
+    ]
+    diffs = [{"event": "product.updated", "data": product_diff(before, after)} for before, after in pairs]
+    variants = {"full-json": (ENCODERS["json"], full)}
+    for encoding, encode in ENCODERS.items():
+        variants[f"diff-{encoding}"] = (encode, diffs)
+    return variants
+
+
+def deflate_cost(messages: list[bytes], sample: int) -> tuple[float, float]:
+    """(CPU seconds, mean compressed bytes) for ``sample`` connections receiving every message."""
+
+    contexts = [zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -12, 5) for _ in range(sample)]
+    total = 0
+    started = time.process_time()
+    for message in messages:
+        for context in contexts:
+            # RFC 7692: sync flush per message, trailing 00 00 ff ff stripped.
+            total += len(context.compress(message) + context.flush(zlib.Z_SYNC_FLUSH)) - 4
+    return time.process_time() - started, total / (sample * len(messages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--sample", type=int, default=200, help="connections actually deflated, scaled to --subscribers")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    sample = min(args.sample, args.subscribers)
+    scale = args.subscribers / sample
+    pairs = updates(args.events, args.seed)
+    results: dict[str, Any] = {}
+    print(f"{args.events} product.updated events fanned out to {args.subscribers} subscribers")
+    print(
+        f"  {'variant':<14}{'B/event':>9}{'encode µs/event':>17}"
+        f"{'deflated B':>12}{'deflate CPU s':>15}{'MB sent':>10}{'MB deflated':>13}"
+    )
+    for name, (encode, events) in envelopes(pairs).items():
+        started = time.process_time()
+        messages = [encode(event) for event in events]
+        encode_us = (time.process_time() - started) / len(events) * 1e6
+        size = sum(len(message) for message in messages) / len(messages)
+        deflate_s, deflated = deflate_cost(messages, sample)
+        row = {
+            "bytes_per_event": round(size, 1),
+            "encode_us_per_event": round(encode_us, 1),
+            "deflated_bytes_per_event": round(deflated, 1),
+            "deflate_cpu_s": round(deflate_s * scale, 2),
+            "mb_sent": round(size * args.subscribers * args.events / 1e6, 1),
+            "mb_sent_deflated": round(deflated * args.subscribers * args.events / 1e6, 1),
+        }
+        results[name] = row
+        print(
+            f"  {name:<14}{row['bytes_per_event']:9.1f}{row['encode_us_per_event']:17.1f}"
+            f"{row['deflated_bytes_per_event']:12.1f}{row['deflate_cpu_s']:15.2f}"
+            f"{row['mb_sent']:10.1f}{row['mb_sent_deflated']:13.1f}"
+        )
+    if "diff-msgpack" not in results:
+        print("\n(msgpack not installed: `pip install msgpack` to include it)")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()